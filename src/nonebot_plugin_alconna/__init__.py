@@ -42,6 +42,7 @@ from .consts import ALCONNA_ARG_KEY as ALCONNA_ARG_KEY
 from .consts import ALCONNA_EXEC_RESULT as ALCONNA_EXEC_RESULT
 from .consts import ALCONNA_RESULT as ALCONNA_RESULT
 from .consts import log
+from .dispatch import apply_dispatch_index as apply_dispatch_index
 from .extension import Extension as Extension
 from .extension import Interface as Interface
 from .extension import add_global_extension as add_global_extension
@@ -102,6 +103,7 @@ from .uniseg import File as File
 from .uniseg import Hyper as Hyper
 from .uniseg import Image as Image
 from .uniseg import Keyboard as Keyboard
+from .uniseg import MediaPayload as MediaPayload
 from .uniseg import MessageId as MessageId
 from .uniseg import MessageTarget as MessageTarget
 from .uniseg import MsgId as MsgId
@@ -127,6 +129,8 @@ from .uniseg import Voice as Voice
 from .uniseg import apply_fetch_targets as apply_fetch_targets
 from .uniseg import apply_filehost as apply_filehost
 from .uniseg import apply_media_to_url as apply_media_to_url
+from .uniseg import apply_receipt_scheduler as apply_receipt_scheduler
+from .uniseg import apply_upload_cache as apply_upload_cache
 from .uniseg import at_in as at_in
 from .uniseg import at_me as at_me
 from .uniseg import custom_handler as custom_handler
@@ -195,9 +199,19 @@ with contextlib.suppress(ValueError, LookupError):
         load_from_path(path)
     if _config.alconna_apply_filehost:
         apply_filehost()
+    if _config.alconna_upload_cache:
+        apply_upload_cache(ttl=_config.alconna_upload_cache_ttl, persist=_config.alconna_upload_cache_persist)
     if _config.alconna_enable_saa_patch:
         patch_saa()
     if _config.alconna_apply_fetch_targets:
-        apply_fetch_targets()
+        apply_fetch_targets(
+            _config.alconna_fetch_targets_ttl,
+            _config.alconna_fetch_targets_concurrency,
+            _config.alconna_fetch_targets_persist,
+        )
+    if _config.alconna_receipt_scheduler_persist:
+        apply_receipt_scheduler(persist=True)
+    if _config.alconna_dispatch_index:
+        apply_dispatch_index()
     if _config.alconna_builtin_plugins:
         load_builtin_plugins(*_config.alconna_builtin_plugins)
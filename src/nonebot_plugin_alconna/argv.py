@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from bisect import bisect_left
 from collections.abc import Iterable
 from contextvars import ContextVar
 from typing import TYPE_CHECKING, Any, Literal
@@ -29,7 +30,12 @@ def _default_builder(self: MessageArgv, data: UniMessage[Segment]):
 class MessageArgv(Argv[UniMessage]):
     @staticmethod
     def generate_token(data: list) -> int:
-        return hash("".join(i.__class__.__name__ + i.__repr__() for i in data))
+        return hash(
+            tuple(
+                i if i.__class__ is str else i.fingerprint() if isinstance(i, Segment) else f"{i.__class__}{i!r}"
+                for i in data
+            )
+        )
 
     def enter(self, ctx: dict[str, Any] | None = None) -> Self:
         super().enter(ctx)
@@ -57,7 +63,7 @@ class MessageArgv(Argv[UniMessage]):
         else:
             data = UniMessage(data)
         self.origin = data
-        styles = self.context.setdefault("__styles__", {"record": {}, "index": 0, "msg": ""})
+        styles = self.context.setdefault("__styles__", {"record": {}, "runs": [], "span": 0, "index": 0, "msg": ""})
         styles["msg"] = data.extract_plain_text()
         _index = 0
         for index, unit in enumerate(data):
@@ -86,6 +92,9 @@ class MessageArgv(Argv[UniMessage]):
             start = styles["msg"].find(text, _index)
             for scale, style in _styles.items():
                 styles["record"][(start + scale[0], start + scale[1])] = style
+        # 按起点排序并记录最长区间，便于 spliter 二分查找与 token 相交的样式
+        styles["runs"] = sorted(styles["record"])
+        styles["span"] = max((end - start for start, end in styles["runs"]), default=0)
         if self.ndata < 1:
             raise NullMessage(lang.require("argv", "null_message").format(target=data))
         self.bak_data = self.raw_data.copy()
@@ -144,19 +153,18 @@ class _Text(BasePattern[Text, str | Text, Literal[MatchMode.TYPE_CONVERT]]):
         start = styles["msg"].find(x, styles["index"])
         if start == -1:
             return Text(x)
-        styles["index"] = start + len(x)
-        if maybe := styles["record"].get((start, styles["index"])):
+        end = styles["index"] = start + len(x)
+        record = styles["record"]
+        if maybe := record.get((start, end)):
             return Text(x, {(0, len(x)): maybe})
-        _styles = {}
-        for scale, style in styles["record"].items():
-            if start <= scale[0] < styles["index"] <= scale[1]:
-                _styles[(scale[0] - start, styles["index"] - start)] = style
-            elif scale[0] <= start < scale[1] <= styles["index"]:
-                _styles[(0, scale[1] - start)] = style
-            elif start <= scale[0] < scale[1] <= styles["index"]:
-                _styles[(scale[0] - start, scale[1] - start)] = style
-            elif scale[0] <= start < styles["index"] <= scale[1]:
-                _styles[(0, styles["index"] - start)] = style
+        runs = styles.get("runs") or sorted(record)
+        lower = bisect_left(runs, (start - styles.get("span", end) + 1,))
+        upper = bisect_left(runs, (end,), lower)
+        _styles = {
+            (max(_start, start) - start, min(_end, end) - start): record[(_start, _end)]
+            for _start, _end in runs[lower:upper]
+            if _end > start
+        }
         return Text(x, _styles)
 
     def match(self, input_: str | Text) -> Text:
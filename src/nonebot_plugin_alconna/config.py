@@ -35,9 +35,30 @@ class Config(BaseModel):
     alconna_apply_filehost: bool = False
     """是否启用文件托管"""
 
+    alconna_upload_cache: bool = False
+    """是否启用媒体上传缓存"""
+
+    alconna_upload_cache_ttl: float = 86400
+    """媒体上传缓存的有效期 (秒)"""
+
+    alconna_upload_cache_persist: bool = False
+    """是否将媒体上传缓存保存至本地"""
+
     alconna_apply_fetch_targets: bool = False
     """是否启动时拉取一次发送对象列表"""
 
+    alconna_fetch_targets_ttl: float = 600
+    """发送对象列表的缓存有效期 (秒)，过期后会在后台刷新"""
+
+    alconna_fetch_targets_concurrency: int = 4
+    """同时拉取发送对象列表的 Bot 数量上限"""
+
+    alconna_fetch_targets_persist: bool = False
+    """是否将发送对象列表缓存至本地，重启后先使用本地缓存并在后台重新拉取"""
+
+    alconna_receipt_scheduler_persist: bool = False
+    """是否将尚未执行的回执延时操作保存至本地，重启后在对应 Bot 连接时继续执行"""
+
     alconna_builtin_plugins: set[str] = Field(default_factory=set)
     """需要加载的alc内置插件集合"""
 
@@ -49,3 +70,6 @@ class Config(BaseModel):
 
     alconna_cache_message: bool = True
     """是否缓存已解析的消息"""
+
+    alconna_dispatch_index: bool = False
+    """是否启用全局命令头索引，以在解析前跳过头部不可能匹配的命令"""
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Any, Callable
+from weakref import WeakSet
+
+from arclet.alconna import Alconna, command_manager
+from nonebot.adapters import Bot, Event
+from tarina.trie import CharTrie
+
+from .extension import default_message_provider
+from .uniseg import Text
+
+if TYPE_CHECKING:
+    from .rule import AlconnaRule
+
+_REGEX_META = frozenset("()[]{}?*+|^$\\.")
+_QUOTES = frozenset("\"'\\")
+_WHITESPACE = " \t\n\r\xa0"
+
+
+def _unescape(key: str) -> str | None:
+    """将快捷指令的正则键还原为字面量，无法还原时返回 None"""
+    chars = []
+    escaped = False
+    for index, char in enumerate(key):
+        if escaped:
+            if char.isalnum():
+                return None
+            chars.append(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "$" and index == len(key) - 1:
+            break
+        elif char in _REGEX_META:
+            return None
+        else:
+            chars.append(char)
+    return None if escaped else "".join(chars)
+
+
+def literal_heads(command: Alconna) -> set[str] | None:
+    """计算命令所有可能的字面量头部（前缀 + 命令名 + 快捷指令）
+
+    只要命令头部含有正则、非字符串前缀、上下文插值或模糊匹配等无法静态判定的部分，便返回 None
+    """
+    if command.union or command.meta.context_style or command.meta.fuzzy_match:
+        return None
+    name = command.command
+    if not isinstance(name, str) or _REGEX_META.intersection(name):
+        return None
+    if not all(isinstance(prefix, str) for prefix in command.prefixes):
+        return None
+    heads = {f"{prefix}{name}" for prefix in command.prefixes} if command.prefixes else {name}
+    for key, args in command_manager.get_shortcut(command).items():
+        if getattr(args, "flags", 0) & re.IGNORECASE:
+            return None
+        origin = getattr(args, "origin_key", key)
+        if (short := _unescape(origin)) is None:
+            return None
+        if prefixes := getattr(args, "prefixes", None):
+            heads.update(f"{prefix}{short}" for prefix in prefixes)
+        else:
+            heads.add(short)
+    if any(sep in head for head in heads for sep in command.separators):
+        return None
+    return heads
+
+
+def _signature(rule: AlconnaRule) -> tuple | None:
+    if not (command := rule.command()) or not (executor := getattr(rule, "executor", None)):
+        return None
+    try:
+        shortcuts = tuple(command_manager.get_shortcut(command))
+    except ValueError:
+        return None
+    return command._hash, shortcuts, len(executor.extensions)
+
+
+class DispatchIndex:
+    """全局命令头索引
+
+    以字典树记录所有可静态判定头部的 AlconnaRule，每个事件只需遍历一次消息开头，
+    即可得知哪些命令的头部有可能匹配；其余命令可直接跳过，无需转换消息、执行扩展与解析。
+
+    无法静态判定的命令（正则头部、非字符串前缀、自定义 message_provider/receive_wrapper 的扩展等）总是视为可能匹配。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.version = 0
+        self._rules: WeakSet[AlconnaRule] = WeakSet()
+        self._indexed: dict[int, tuple | None] = {}
+        self._trie: CharTrie[set[int]] = CharTrie()
+        self._seps = _WHITESPACE
+        self._max_len = 0
+        self._dirty = True
+
+    def register(self, rule: AlconnaRule) -> None:
+        self._rules.add(rule)
+        self._dirty = True
+
+    def unregister(self, rule: AlconnaRule) -> None:
+        self._rules.discard(rule)
+        self._indexed.pop(id(rule), None)
+        self._dirty = True
+
+    def rebuild(self) -> None:
+        """重新构建索引"""
+        self._trie = CharTrie()
+        self._indexed.clear()
+        seps = set(_WHITESPACE)
+        self._max_len = 0
+        for rule in list(self._rules):
+            key = id(rule)
+            sig = _signature(rule)
+            self._indexed[key] = sig
+            if sig is None:
+                continue
+            if any(
+                ext._overrides["message_provider"] or ext._overrides["receive_wrapper"]
+                for ext in rule.executor.extensions
+            ):
+                self._indexed[key] = None
+                continue
+            command: Alconna = rule.command()  # type: ignore
+            if (heads := literal_heads(command)) is None:
+                self._indexed[key] = None
+                continue
+            seps.update(command.separators)
+            for head in heads:
+                self._max_len = max(self._max_len, len(head))
+                if head in self._trie:
+                    self._trie[head].add(key)
+                else:
+                    self._trie[head] = {key}
+        self._seps = "".join(seps)
+        self.version += 1
+        self._dirty = False
+
+    def lookup(self, text: str) -> set[int] | None:
+        """查询头部可能匹配给定文本开头的命令，文本含有影响分词的引号或转义时返回 None"""
+        if self._dirty:
+            self.rebuild()
+        lead = len(text) - len(text.lstrip(self._seps))
+        if _QUOTES.intersection(text[: lead + self._max_len + 1]):
+            return None
+        result: set[int] = set()
+        for offset in range(lead + 1):
+            for step in self._trie.prefixes(text[offset:]):
+                result.update(step.value)
+        return result
+
+    async def candidates(self, bot: Bot, event: Event, use_origin: bool) -> set[int] | None:
+        """获取当前事件下头部可能匹配的命令集合，结果会缓存在事件上"""
+        cache: dict[bool, tuple[int, set[int] | None]] = getattr(event, "__alconna_dispatch__", None) or {}
+        if (cached := cache.get(use_origin)) and cached[0] == self.version:
+            return cached[1]
+        if (msg := await default_message_provider(event, bot, use_origin)) is None:
+            result = None
+        else:
+            text = []
+            for seg in msg:
+                if not isinstance(seg, Text):
+                    break
+                text.append(seg.text)
+            result = self.lookup("".join(text))
+        cache[use_origin] = (self.version, result)
+        setattr(event, "__alconna_dispatch__", cache)
+        return result
+
+    async def check(self, rule: AlconnaRule, bot: Bot, event: Event) -> bool:
+        """判断命令头部是否有可能匹配当前事件。索引过期的命令会标记重建并视为可能匹配"""
+        if self._dirty:
+            self.rebuild()
+        key = id(rule)
+        if key not in self._indexed:
+            self._dirty = True
+            return True
+        if (sig := self._indexed[key]) is None:
+            return True
+        if sig != _signature(rule):
+            self._dirty = True
+            return True
+        if (result := await self.candidates(bot, event, rule.use_origin)) is None:
+            return True
+        return key in result
+
+
+dispatch_index = DispatchIndex()
+
+
+def apply_dispatch_index() -> Callable[[], Any]:
+    """启用全局命令头索引，返回关闭索引的函数"""
+    dispatch_index.enabled = True
+    dispatch_index._dirty = True
+
+    def dispose():
+        dispatch_index.enabled = False
+
+    return dispose
@@ -7,7 +7,8 @@ import inspect
 import re
 from abc import ABCMeta, abstractmethod
 from contextlib import AsyncExitStack
-from dataclasses import dataclass
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any, ClassVar, Generic, Literal, TypeVar, final, overload
 from weakref import finalize
 
@@ -19,10 +20,11 @@ from nonebot.dependencies import Dependent, Param
 from nonebot.internal.params import DependencyCache, DependParam, DependsInner
 from nonebot.typing import T_State, _DependentCallable
 from pydantic.fields import FieldInfo
-from tarina import LRU, lang
+from tarina import lang
 
 from .config import Config
-from .uniseg import UniMessage, get_message_id
+from .uniseg import UniMessage
+from .uniseg.functions import get_event_message
 
 OutputType = Literal["help", "shortcut", "completion", "error"]
 T = TypeVar("T")
@@ -61,9 +63,25 @@ class Extension(metaclass=ABCMeta):
             "context_provider": cls.context_provider != Extension.context_provider,
             "parse_wrapper": cls.parse_wrapper != Extension.parse_wrapper,
             "catch": cls.catch != Extension.catch and cls.before_catch != Extension.before_catch,
+            "validate": cls.validate != Extension.validate,
         }
 
-    executor: ExtensionExecutor
+    _executor: ExtensionExecutor
+
+    @property
+    def executor(self) -> ExtensionExecutor:
+        """使用该扩展的执行器
+
+        规则检查、依赖注入与事件处理中取当前上下文的执行器，使被多个执行器共用的扩展实例互不影响；
+        不在上述上下文中时取最近载入该扩展的执行器。
+        """
+        if (executor := current_executor.get(None)) is not None:
+            return executor
+        return self._executor
+
+    @executor.setter
+    def executor(self, value: ExtensionExecutor) -> None:
+        self._executor = value
 
     @property
     @abstractmethod
@@ -117,7 +135,7 @@ class Extension(metaclass=ABCMeta):
                     break
             else:
                 raise ValueError(f"Unknown parameter {dependent[0]} with type {dependent[1]}")
-        return await self.executor._dependent_executor(param)
+        return await current_dependent.get()(param)
 
     async def output_converter(self, output_type: OutputType, content: str) -> UniMessage:
         """依据输出信息的类型，将字符串转换为消息对象以便发送。"""
@@ -174,65 +192,72 @@ class DefaultExtension(Extension):
 
 _callbacks = set()
 
-unimsg_cache: LRU[str, UniMessage] = LRU(16)
-unimsg_origin_cache: LRU[str, UniMessage] = LRU(16)
+
+async def default_message_provider(event: Event, bot: Bot, use_origin: bool = False) -> UniMessage | None:
+    """未有扩展提供消息时，由事件本身的消息转换得到的消息对象。"""
+    if event.get_type() != "message":
+        return None
+    origin = use_origin and getattr(event, "original_message", None) is not None
+    return await get_event_message(event, bot, origin, reply=origin, cache=cache_msg)
+
+
+_HOOKS = (
+    "message_provider",
+    "output_converter",
+    "send_wrapper",
+    "receive_wrapper",
+    "permission_check",
+    "context_provider",
+    "parse_wrapper",
+    "catch",
+)
+
+
+def compile_chains(context: list[Extension]) -> dict[str, list[Extension]]:
+    """按钩子预先筛选出重写了该钩子的扩展，保持 context 中的顺序"""
+    return {hook: [ext for ext in context if ext._overrides[hook]] for hook in _HOOKS}
 
 
 @dataclass
 class SelectedExtensions:
     context: list[Extension]
+    chains: dict[str, list[Extension]] = field(default_factory=dict, repr=False)
+    """各钩子的调用链，未提供时由 context 生成"""
+
+    def __post_init__(self):
+        if not self.chains:
+            self.chains = compile_chains(self.context)
 
     async def message_provider(
         self, event: Event, state: T_State, bot: Bot, use_origin: bool = False
     ) -> UniMessage | None:
         exc = None
-        for ext in self.context:
-            if not ext._overrides["message_provider"]:
-                continue
+        for ext in self.chains["message_provider"]:
             try:
                 if (msg1 := await ext.message_provider(event, state, bot, use_origin)) is not None:
                     return msg1
-            except Exception as e:
+            except Exception as e:  # noqa: PERF203
                 exc = e
         if exc is not None:
             raise exc
-        if event.get_type() == "message":
-            msg_id = get_message_id(event, bot)
-            if use_origin and cache_msg and (uni_msg := unimsg_origin_cache.get(msg_id)) is not None:
-                return uni_msg
-            if cache_msg and (uni_msg := unimsg_cache.get(msg_id)) is not None:
-                return uni_msg
-            msg = event.get_message()
-            uni_msg = UniMessage.of(message=msg, bot=bot)
-            unimsg_cache[msg_id] = uni_msg
-            if (ori_msg := getattr(event, "original_message", None)) is not None:
-                ori_uni_msg = await UniMessage.of(message=ori_msg, bot=bot).attach_reply(event=event, bot=bot)
-                unimsg_origin_cache[msg_id] = ori_uni_msg
-                if use_origin:
-                    return ori_uni_msg
-            return uni_msg
-        return None
+        return await default_message_provider(event, bot, use_origin)
 
     async def receive_wrapper(self, bot: Bot, event: Event, command: Alconna, receive: UniMessage) -> UniMessage:
         res = receive
-        for ext in self.context:
-            if ext._overrides["receive_wrapper"]:
-                res = await ext.receive_wrapper(bot, event, command, res)
+        for ext in self.chains["receive_wrapper"]:
+            res = await ext.receive_wrapper(bot, event, command, res)
         return res
 
     async def permission_check(self, bot: Bot, event: Event, medium: Arparma | CompSession) -> bool:
-        for ext in self.context:
-            if ext._overrides["permission_check"]:
-                if await ext.permission_check(bot, event, medium) is False:
-                    return False
-                continue
+        for ext in self.chains["permission_check"]:
+            if await ext.permission_check(bot, event, medium) is False:
+                return False
         return True
 
     async def context_provider(self, event: Event, bot: Bot, state: T_State) -> dict[str, Any]:
         ctx = {}
-        for ext in self.context:
-            if ext._overrides["context_provider"]:
-                ctx = await ext.context_provider(ctx, event, bot, state)
+        for ext in self.chains["context_provider"]:
+            ctx = await ext.context_provider(ctx, event, bot, state)
         ctx["event"] = event
         ctx["bot.self_id"] = bot.self_id
         if (platform := hasattr("bot", "platform")) and isinstance(platform, str):
@@ -241,18 +266,15 @@ class SelectedExtensions:
         return ctx
 
     async def parse_wrapper(self, bot: Bot, state: T_State, event: Event, res: Arparma) -> None:
-        await asyncio.gather(
-            *(ext.parse_wrapper(bot, state, event, res) for ext in self.context if ext._overrides["parse_wrapper"])
-        )
+        if chain := self.chains["parse_wrapper"]:
+            await asyncio.gather(*(ext.parse_wrapper(bot, state, event, res) for ext in chain))
 
     async def output_converter(self, output_type: OutputType, content: str) -> UniMessage:
         exc = None
-        for ext in self.context:
-            if not ext._overrides["output_converter"]:
-                continue
+        for ext in self.chains["output_converter"]:
             try:
                 return await ext.output_converter(output_type, content)
-            except Exception as e:
+            except Exception as e:  # noqa: PERF203
                 exc = e
         if not exc:
             return UniMessage()
@@ -260,9 +282,8 @@ class SelectedExtensions:
 
     async def send_wrapper(self, bot: Bot, event: Event, send: TM) -> TM:
         res = send
-        for ext in self.context:
-            if ext._overrides["send_wrapper"]:
-                res = await ext.send_wrapper(bot, event, res)
+        for ext in self.chains["send_wrapper"]:
+            res = await ext.send_wrapper(bot, event, res)
         return res
 
 
@@ -287,10 +308,16 @@ class _DependentExecutor:
         )
 
 
+current_dependent: ContextVar[_DependentExecutor] = ContextVar("current_dependent")
+"""当前规则检查或事件处理的依赖注入上下文，各协程相互隔离"""
+
+current_executor: ContextVar[ExtensionExecutor] = ContextVar("current_executor")
+"""当前规则检查或事件处理所属的扩展执行器，各协程相互隔离"""
+
+
 class ExtensionExecutor(SelectedExtensions):
     globals: ClassVar[list[type[Extension] | Extension]] = [DefaultExtension()]
     _rule: AlconnaRule
-    _dependent_executor: _DependentExecutor
 
     def __init__(
         self,
@@ -299,17 +326,9 @@ class ExtensionExecutor(SelectedExtensions):
         excludes: list[str | type[Extension]] | None = None,
     ):
         self.params: tuple[type[Param], ...] = ()
-        self.extensions: list[Extension] = []
-        for ext in self.globals:
-            if isinstance(ext, type):
-                self.extensions.append(ext())
-            else:
-                self.extensions.append(ext)
-        for ext in extensions or []:
-            if isinstance(ext, type):
-                self.extensions.append(ext())
-            else:
-                self.extensions.append(ext)
+        self.extensions: list[Extension] = [
+            ext() if isinstance(ext, type) else ext for ext in (*self.globals, *(extensions or []))
+        ]
         for exl in excludes or []:
             if isinstance(exl, str) and exl.startswith("!"):
                 raise ValueError(lang.require("nbp-alc", "error.extension.forbid_exclude"))
@@ -322,52 +341,70 @@ class ExtensionExecutor(SelectedExtensions):
             and (not (ns := ext.namespace) or ns == rule._namespace)
         ]
         self.context = self.extensions
+        self._selected: dict[tuple, SelectedExtensions] = {}
+        self._compile()
         self._rule = rule
+        for ext in self.extensions:
+            ext.executor = self
 
         _callbacks.add(self._callback)
 
         finalize(self, _callbacks.discard, self._callback)
 
+    def _compile(self) -> None:
+        """重新生成调用链，并清空按事件筛选的缓存"""
+        self.chains = compile_chains(self.extensions)
+        self._dynamic: list[Extension] = [ext for ext in self.extensions if ext._overrides["validate"]]
+        self._selected.clear()
+
     def destroy(self) -> None:
         """销毁当前的扩展执行器，清理相关资源。"""
         _callbacks.discard(self._callback)
         self.extensions.clear()
         self.context.clear()
+        self._compile()
         del self._rule
 
     def _callback(self, *append_global_ext: type[Extension] | Extension):
-        for _ext in append_global_ext:
-            if isinstance(_ext, type):
-                _ext = _ext()
+        for ext in append_global_ext:
+            _ext = ext() if isinstance(ext, type) else ext
             if _ext.id in self._excludes or _ext.__class__ in self._excludes:
                 continue
             if (ns := _ext.namespace) and ns != self._rule._namespace:
                 continue
             self.extensions.append(_ext)
+            _ext.executor = self
             _ext.post_init(self._rule.command())  # type: ignore
+        self._compile()
 
     def select(self, bot: Bot, event: Event) -> SelectedExtensions:
-        context = [ext for ext in self.extensions if ext.validate(bot, event)]
-        context.sort(key=lambda ext: ext.priority)
-        for ext in context:
-            ext.executor = self
-        return SelectedExtensions(context)
+        """选出适用于当前事件的扩展
+
+        未重写 `validate` 的扩展只取决于事件类型，筛选与排序的结果按 (适配器, 事件类型) 缓存；
+        重写了 `validate` 的扩展仍逐事件判断，其结果作为缓存键的一部分。
+        """
+        flags = tuple(ext.validate(bot, event) for ext in self._dynamic)
+        key = (bot.adapter.get_name(), event.get_type(), flags)
+        if (cached := self._selected.get(key)) is None:
+            results = dict(zip(map(id, self._dynamic), flags, strict=True))
+            context = [
+                ext
+                for ext in self.extensions
+                if (results[id(ext)] if ext._overrides["validate"] else ext.validate(bot, event))
+            ]
+            context.sort(key=lambda ext: ext.priority)
+            cached = self._selected[key] = SelectedExtensions(context)
+        return cached
 
     def before_catch(self, name: str, annotation: Any, default: Any) -> bool:
-        for ext in self.extensions:
-            if ext._overrides["catch"]:
-                if ext.before_catch(name, annotation, default):
-                    return True
-                continue
-        return False
+        return any(ext.before_catch(name, annotation, default) for ext in self.chains["catch"])
 
     async def catch(self, event: Event, state: T_State, name: str, annotation: Any, default: Any):
-        for ext in self.extensions:
-            if ext._overrides["catch"]:
-                res = await ext.catch(Interface(event, state, name, annotation, default))
-                if res is None:
-                    continue
-                return res
+        for ext in self.chains["catch"]:
+            res = await ext.catch(Interface(event, state, name, annotation, default))
+            if res is None:
+                continue
+            return res
         return PydanticUndefined
 
     def post_init(self, command: Alconna) -> None:
@@ -35,7 +35,7 @@ from tarina.tools import annotation
 
 from .config import Config
 from .consts import ALCONNA_ARG_KEY, ALCONNA_ARG_KEYS, ALCONNA_RESULT, log
-from .extension import Extension, ExtensionExecutor
+from .extension import Extension, ExtensionExecutor, current_executor
 from .i18n import Lang
 from .model import CompConfig
 from .params import (
@@ -943,6 +943,7 @@ class AlconnaMatcher(Matcher, metaclass=AlconnaMatcherMeta):
         e_t = current_event.set(event)
         m_t = current_matcher.set(self)
         s_t = current_send_wrapper.set(self.executor.send_wrapper)
+        x_t = current_executor.set(self.executor)
         try:
             yield
         finally:
@@ -950,6 +951,7 @@ class AlconnaMatcher(Matcher, metaclass=AlconnaMatcherMeta):
             current_event.reset(e_t)
             current_matcher.reset(m_t)
             current_send_wrapper.reset(s_t)
+            current_executor.reset(x_t)
 
 
 def on_alconna(
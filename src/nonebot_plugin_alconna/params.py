@@ -17,7 +17,14 @@ from tarina import run_always_await
 from tarina.generic import get_origin, is_optional
 
 from .consts import ALCONNA_ARG_KEY, ALCONNA_ARG_KEYS, ALCONNA_EXEC_RESULT, ALCONNA_EXTENSION, ALCONNA_RESULT
-from .extension import Extension, ExtensionExecutor, SelectedExtensions
+from .extension import (
+    Extension,
+    ExtensionExecutor,
+    SelectedExtensions,
+    _DependentExecutor,
+    current_dependent,
+    current_executor,
+)
 from .model import CommandResult, Match, Query, T
 from .typings import CHECK, MIDDLEWARE
 
@@ -235,7 +242,14 @@ class ExtensionParam(Param):
         return None
 
     async def _solve(self, event: Event, state: T_State, **kwargs: Any) -> Any:
-        res = await self.executor.catch(event, state, self.extra["name"], self.extra["type"], self.default)
+        dependent = _DependentExecutor(kwargs["bot"], event, state, kwargs.get("stack"), kwargs.get("dependency_cache"))
+        token = current_dependent.set(dependent)
+        x_token = current_executor.set(self.executor)
+        try:
+            res = await self.executor.catch(event, state, self.extra["name"], self.extra["type"], self.default)
+        finally:
+            current_executor.reset(x_token)
+            current_dependent.reset(token)
         if res is not PydanticUndefined:
             return res
         return self.default
@@ -1,6 +1,7 @@
 import asyncio
 import weakref
 from contextlib import AsyncExitStack
+from contextvars import ContextVar
 from typing import Any, ClassVar, Literal
 
 import nonebot
@@ -10,7 +11,7 @@ from nonebot import get_driver, get_plugin_config, require
 from nonebot.adapters import Bot, Event
 from nonebot.internal.params import DependencyCache
 from nonebot.internal.rule import Rule as Rule
-from nonebot.matcher import Matcher
+from nonebot.matcher import Matcher, current_bot, current_event, current_matcher
 from nonebot.typing import T_RuleChecker, T_State, _DependentCallable
 from nonebot.utils import escape_tag
 from pydantic import ValidationError
@@ -18,7 +19,8 @@ from tarina import lang
 
 from .config import Config
 from .consts import ALCONNA_EXEC_RESULT, ALCONNA_EXTENSION, ALCONNA_RESULT, log
-from .extension import ExtensionExecutor, SelectedExtensions, _DependentExecutor
+from .dispatch import dispatch_index
+from .extension import ExtensionExecutor, SelectedExtensions, _DependentExecutor, current_dependent, current_executor
 from .i18n import Lang
 from .model import CommandResult, CompConfig
 from .uniseg import UniMessage, UniMsg
@@ -34,6 +36,35 @@ except (RuntimeError, ValueError):
     waiter = None
 
 
+_current_output: ContextVar[dict[str, Any]] = ContextVar("_current_output")
+
+
+def _capture_output(text: str) -> None:
+    """将命令输出记录到当前规则检查的上下文中，而非按命令名共享的捕获缓存"""
+    if (output := _current_output.get(None)) is not None:
+        output["output"] = text
+
+
+def _supplier(name: str):
+    def supply():
+        if (dependent := current_dependent.get(None)) is not None:
+            return getattr(dependent, name, None)
+        # 在事件处理函数中调用 `Arparma.call` 时不处于规则检查的上下文中
+        try:
+            if name == "bot":
+                return current_bot.get()
+            if name == "event":
+                return current_event.get()
+            return current_matcher.get().state
+        except LookupError:
+            return None
+
+    return supply
+
+
+Arparma.addition(bot=_supplier("bot"), event=_supplier("event"), state=_supplier("state"))
+
+
 def check_self_send(bot: Bot, event: Event) -> bool:
     try:
         user_id = event.get_user_id()
@@ -61,6 +92,7 @@ class AlconnaRule:
     executor: ExtensionExecutor
 
     __slots__ = (
+        "__weakref__",
         "_comp_help",
         "_hide_tabs",
         "_namespace",
@@ -203,10 +235,12 @@ class AlconnaRule:
                 return content
 
             self._waiter = _waiter_handle
+        dispatch_index.register(self)
 
     def destroy(self) -> None:
         """销毁 Alconna 规则，释放资源。"""
         self._tasks.clear()
+        dispatch_index.unregister(self)
         if cmd := self.command():
             command_manager.delete(cmd)
         self._waiter = None
@@ -301,8 +335,26 @@ class AlconnaRule:
             return False
         if event.get_type() == "meta_event":
             return False
+        if dispatch_index.enabled and not await dispatch_index.check(self, bot, event):
+            return False
+        # 依赖注入、Arparma 附加参数与命令输出均绑定在本次检查的上下文中，使同一规则可以并发处理多个事件
+        token = current_dependent.set(_DependentExecutor(bot, event, state, stack, dependency_cache))
+        x_token = current_executor.set(self.executor)
+        try:
+            return await self._check(bot, event, state, stack, dependency_cache)
+        finally:
+            current_executor.reset(x_token)
+            current_dependent.reset(token)
+
+    async def _check(
+        self,
+        bot: Bot,
+        event: Event,
+        state: T_State,
+        stack: AsyncExitStack | None = None,
+        dependency_cache: dict[_DependentCallable[Any], DependencyCache] | None = None,
+    ) -> bool:
         selected = self.executor.select(bot, event)
-        self.executor._dependent_executor = _DependentExecutor(bot, event, state, stack, dependency_cache)
         if not (msg := await selected.message_provider(event, state, bot, self.use_origin)):
             return False
         if not self.response_self and check_self_send(bot, event):
@@ -319,22 +371,25 @@ class AlconnaRule:
         if command_manager.is_disable(cmd):
             return False
         msg = await selected.receive_wrapper(bot, event, cmd, msg)
-        Arparma._additional.update(bot=lambda: bot, event=lambda: event, state=lambda: state)
         state[UNISEG_MESSAGE] = msg
 
-        with output_manager.capture(cmd.name) as cap:
-            output_manager.set_action(lambda x: x, cmd.name)
+        output: dict[str, Any] = {}
+        output_manager.set_action(_capture_output, cmd.name)
+        output_token = _current_output.set(output)
+        try:
             task = asyncio.create_task(self.handle(selected, cmd, bot, event, state, msg))
-            if session_id:
-                self._tasks[session_id] = task
-                task.add_done_callback(lambda _: self._tasks.pop(session_id, None))
-            try:
-                arp = await task
-                if arp is False:
-                    return False
-            except Exception as e:
-                arp = Arparma(cmd._hash, msg, False, error_info=e)
-            may_help_text: str | None = cap.get("output", None)
+        finally:
+            _current_output.reset(output_token)
+        if session_id:
+            self._tasks[session_id] = task
+            task.add_done_callback(lambda _: self._tasks.pop(session_id, None))
+        try:
+            arp = await task
+            if arp is False:
+                return False
+        except Exception as e:
+            arp = Arparma(cmd._hash, msg, False, error_info=e)
+        may_help_text: str | None = output.get("output")
         if not arp.head_matched:
             return False
         if not arp.matched and not may_help_text and self.skip:
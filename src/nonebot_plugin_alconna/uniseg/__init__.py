@@ -1,11 +1,13 @@
-import asyncio
+import contextlib
+from pathlib import Path
 from typing import Callable
 from typing_extensions import TypeAlias
 
-from nonebot.adapters import Bot
-from nonebot.plugin import PluginMetadata
+from nonebot.adapters import Bot, Event
+from nonebot.plugin import PluginMetadata, require
 
 from .adapters import alter_get_builder, alter_get_exporter, alter_get_fetcher
+from .adapters import import_cost_report as import_cost_report
 from .constraint import SerializeFailed as SerializeFailed
 from .constraint import SupportAdapter as SupportAdapter
 from .constraint import SupportAdapterModule as SupportAdapterModule
@@ -19,11 +21,15 @@ from .fallback import TO_TEXT as TO_TEXT
 from .fallback import FallbackMessage as FallbackMessage
 from .fallback import FallbackSegment as FallbackSegment
 from .fallback import FallbackStrategy as FallbackStrategy
+from .functions import get_event_message as get_event_message
 from .functions import get_message_id as get_message_id
 from .functions import get_target as get_target
+from .functions import message_cache_clear as message_cache_clear
+from .functions import message_cache_info as message_cache_info
 from .functions import message_edit as message_edit
 from .functions import message_reaction as message_reaction
 from .functions import message_recall as message_recall
+from .mediaio import MediaPayload as MediaPayload
 from .message import UniMessage as UniMessage
 from .params import MessageId as MessageId
 from .params import MessageTarget as MessageTarget
@@ -33,9 +39,11 @@ from .params import OriginalUniMsg as OriginalUniMsg
 from .params import UniMsg as UniMsg
 from .params import UniversalMessage as UniversalMessage
 from .params import UniversalSegment as UniversalSegment
+from .receipt import BroadcastResult as BroadcastResult
 from .receipt import Receipt as Receipt
 from .rule import at_in as at_in
 from .rule import at_me as at_me
+from .scheduler import receipt_scheduler as receipt_scheduler
 from .segment import At as At
 from .segment import AtAll as AtAll
 from .segment import Audio as Audio
@@ -58,7 +66,7 @@ from .segment import apply_media_to_url as apply_media_to_url
 from .segment import custom_handler as custom_handler
 from .segment import custom_register as custom_register
 from .target import SCOPES as SCOPES
-from .target import TARGET_RECORD
+from .target import TARGET_RECORD, TargetFetcher
 from .target import Target as Target
 from .tools import get_bot as get_bot
 from .tools import image_fetch as image_fetch
@@ -103,34 +111,154 @@ def apply_filehost() -> _Dispose:
     return apply()
 
 
+def apply_upload_cache(size: int = 1024, ttl: float = 86400, persist: bool = False) -> _Dispose:
+    """启用媒体上传缓存，有效期内重复发送相同的媒体时复用上传得到的 URL 或文件 id
+
+    Args:
+        size: 缓存容量
+        ttl: 缓存有效期 (秒)
+        persist: 是否将缓存保存至本地
+    """
+    from .segment import Media
+    from .upload import upload_cache
+
+    upload_cache._cache.set_size(size)
+    upload_cache.ttl = ttl
+    upload_cache.store = _data_dir("upload") / "cache.json" if persist else None
+    upload_cache.load()
+    upload_cache.enabled = True
+    old = Media.to_url
+    if old:
+        Media.to_url = upload_cache.wrap(old)
+    if persist and not _enable_upload_cache_flush:
+        _register_upload_cache_flush()
+
+    def dispose():
+        upload_cache.enabled = False
+        # 只移除缓存包装，保留启用期间通过 `apply_media_to_url` 设置的上传函数
+        if getattr(Media.to_url, "__upload_cached__", False):
+            Media.to_url = Media.to_url.__wrapped__  # type: ignore
+
+    return dispose
+
+
+def _register_upload_cache_flush():
+    global _enable_upload_cache_flush  # noqa: PLW0603
+    from nonebot import get_driver
+
+    from .upload import upload_cache
+
+    @get_driver().on_shutdown
+    async def _():
+        await upload_cache.flush()
+
+    _enable_upload_cache_flush = True
+
+
+def apply_receipt_scheduler(
+    persist: bool | None = None,
+    resolution: float | None = None,
+    concurrency: int | None = None,
+):
+    """配置回执延时操作的调度器
+
+    Args:
+        persist: 是否将尚未执行的操作保存至本地；启用后重启时恢复，并在对应 Bot 连接后执行
+        resolution: 截止时间的精度 (秒)，同一精度内到期的操作按 Bot 合并为一批执行
+        concurrency: 每个 Bot 每批操作的最大并发数
+    """
+    global _enable_receipt_scheduler  # noqa: PLW0603
+    from .scheduler import receipt_scheduler
+
+    if resolution is not None:
+        receipt_scheduler.resolution = resolution
+    if concurrency is not None:
+        receipt_scheduler.concurrency = concurrency
+    if persist is not None:
+        receipt_scheduler.store = _data_dir("scheduler") / "receipts.json" if persist else None
+    if _enable_receipt_scheduler:
+        return
+
+    from nonebot import get_driver
+
+    driver = get_driver()
+
+    @driver.on_startup
+    async def _():
+        receipt_scheduler.load()
+
+    @driver.on_bot_connect
+    async def _(bot: Bot):
+        receipt_scheduler.resume(bot)
+
+    @driver.on_shutdown
+    async def _():
+        await receipt_scheduler.stop()
+
+    _enable_receipt_scheduler = True
+
+
 reply_handle = reply_fetch  # backward compatibility
 
+_enable_receipt_scheduler = False
+
+_enable_upload_cache_flush = False
+
 _enable_fetch_targets = False
-FETCH_LOCK = asyncio.Lock()
 
 
 def _register_hook():
     from nonebot import get_driver
+    from nonebot.message import event_preprocessor
 
     driver = get_driver()
 
     @driver.on_bot_connect
     async def _(bot: Bot):
         log("DEBUG", f"cache or refresh targets for bot:{bot.self_id}")
-        async with FETCH_LOCK:
-            await _refresh_bot(bot)
+        await _refresh_bot(bot)
 
     @driver.on_bot_disconnect
     async def _(bot: Bot):
-        async with FETCH_LOCK:
-            TARGET_RECORD.pop(bot.self_id, None)
-            if fn := alter_get_fetcher(bot.adapter.get_name()):
-                fn.cache.pop(bot.self_id, None)
+        TARGET_RECORD.pop(bot.self_id, None)
+        if fn := alter_get_fetcher(bot.adapter.get_name()):
+            fn.discard(bot.self_id)
+
+    @event_preprocessor
+    async def _(bot: Bot, event: Event):
+        if event.get_type() != "notice" or not (fn := alter_get_fetcher(bot.adapter.get_name())):
+            return
+        if fn.update(bot, event):
+            log("DEBUG", f"targets of bot:{bot.self_id} updated by {event.get_event_name()}")
+
+
+def _data_dir(name: str) -> Path:
+    try:
+        require("nonebot_plugin_localstore")
+        from nonebot_plugin_localstore import get_data_dir
 
+        return get_data_dir("nonebot_plugin_alconna") / name
+    except ImportError:
+        return Path.cwd() / ".data" / name
 
-def apply_fetch_targets():
+
+def apply_fetch_targets(ttl: float | None = None, concurrency: int | None = None, persist: bool | None = None):
+    """启用发送对象列表的拉取与缓存
+
+    Args:
+        ttl: 缓存有效期 (秒)，过期后会在后台刷新
+        concurrency: 同时拉取发送对象列表的 Bot 数量上限
+        persist: 是否将发送对象列表缓存至本地；启用后 Bot 连接时先使用本地缓存，再在后台重新拉取
+    """
     global _enable_fetch_targets  # noqa: PLW0603
 
+    if ttl is not None:
+        TargetFetcher.ttl = ttl
+    if concurrency is not None:
+        TargetFetcher.concurrency = concurrency
+        TargetFetcher._semaphore = None
+    if persist is not None:
+        TargetFetcher.store = _data_dir("targets") if persist else None
     if _enable_fetch_targets:
         return
 
@@ -143,6 +271,11 @@ async def _refresh_bot(bot: Bot):
     if not (fn := alter_get_fetcher(bot.adapter.get_name())):
         log("WARNING", lang.require("nbp-uniseg", "unsupported").format(adapter=bot.adapter.get_name()))
         return
+    if fn.restore(bot.self_id):
+        # 本地缓存可立即用于选择 Bot，随后在后台重新拉取
+        TARGET_RECORD[bot.self_id] = fn.get_selector(bot)
+        fn.refresh_background(bot)
+        return
     try:
         await fn.refresh(bot)
     except Exception as e:
@@ -150,6 +283,23 @@ async def _refresh_bot(bot: Bot):
     TARGET_RECORD[bot.self_id] = fn.get_selector(bot)
 
 
+def _report_import_cost():
+    from nonebot import get_driver
+
+    @get_driver().on_startup
+    async def _():
+        if report := import_cost_report():
+            log(
+                "DEBUG",
+                "uniseg adapters import cost: "
+                + ", ".join(f"{adapter}={cost * 1000:.2f}ms" for adapter, cost in report.items()),
+            )
+
+
+with contextlib.suppress(ValueError):
+    _report_import_cost()
+
+
 def get_fetcher(bot: Bot):
     if not (fn := alter_get_fetcher(bot.adapter.get_name())):
         log("WARNING", lang.require("nbp-uniseg", "unsupported").format(adapter=bot.adapter.get_name()))
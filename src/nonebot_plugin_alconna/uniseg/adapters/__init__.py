@@ -1,14 +1,15 @@
 import importlib
 import os
+from collections.abc import Iterator, Mapping
 from contextlib import suppress
-from pathlib import Path
-from typing import TYPE_CHECKING, cast
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, TypeVar, cast
 from warnings import warn
 
 from importlib_metadata import entry_points
 from nonebot import get_adapters
 
-from ..constraint import SupportAdapter
+from ..constraint import SupportAdapter, log
 
 if TYPE_CHECKING:
     from ..builder import MessageBuilder
@@ -16,38 +17,114 @@ if TYPE_CHECKING:
     from ..loader import BaseLoader
     from ..target import TargetFetcher
 
-root = Path(__file__).parent
-loaders: dict[str, "BaseLoader"] = {}
-_adapters = [path.stem for path in root.iterdir() if path.is_dir() and not path.stem.startswith("_")]
-for name in _adapters:
-    try:
-        module = importlib.import_module(f".{name}", __package__)
-        loader = cast("BaseLoader", module.Loader())
-        loaders[loader.get_adapter().value] = loader
-    except Exception as e:  # noqa: PERF203
-        warn(f"Failed to import uniseg adapter {name}: {e}", RuntimeWarning, 15)
-
-# Load adapters from entry points
-points = entry_points().select(group="n-p-alc.uniseg.adapters")
-for entry_point in points.names:
-    try:
-        module = points[entry_point].load()
-        if isinstance(module, type):
-            loader = cast("BaseLoader", module())
-            loaders[loader.get_adapter().value] = loader
-        else:
+T = TypeVar("T")
+
+_BUILTIN_LOADERS: dict[str, str] = {
+    SupportAdapter.bililive.value: ".bililive",
+    SupportAdapter.console.value: ".console",
+    SupportAdapter.ding.value: ".ding",
+    SupportAdapter.discord.value: ".discord",
+    SupportAdapter.dodo.value: ".dodo",
+    SupportAdapter.efchat.value: ".efchat",
+    SupportAdapter.feishu.value: ".feishu",
+    SupportAdapter.github.value: ".github",
+    SupportAdapter.heybox.value: ".heybox",
+    SupportAdapter.kook.value: ".kook",
+    SupportAdapter.kritor.value: ".kritor",
+    SupportAdapter.mail.value: ".mail",
+    SupportAdapter.milky.value: ".milky",
+    SupportAdapter.minecraft.value: ".minecraft",
+    SupportAdapter.mirai.value: ".mirai",
+    SupportAdapter.nonebug.value: ".nonebug",
+    SupportAdapter.ntchat.value: ".ntchat",
+    SupportAdapter.onebot11.value: ".onebot11",
+    SupportAdapter.onebot12.value: ".onebot12",
+    SupportAdapter.qq.value: ".qq",
+    SupportAdapter.red.value: ".red",
+    SupportAdapter.satori.value: ".satori",
+    SupportAdapter.tail_chat.value: ".tailchat",
+    SupportAdapter.telegram.value: ".telegram",
+    SupportAdapter.vocechat.value: ".vocechat",
+    SupportAdapter.wxmp.value: ".wxmp",
+    SupportAdapter.yunhu.value: ".yunhu",
+}
+"""适配器名称 -> 内置 Loader 所在模块"""
+
+
+class LoaderRegistry(Mapping[str, "BaseLoader"]):
+    """按需导入的 Loader 注册表
+
+    内置适配器只记录模块路径，在首次获取时才导入；`n-p-alc.uniseg.adapters` 入口点在首次查询时统一加载，并覆盖同名的内置适配器。
+    """
+
+    def __init__(self, modules: dict[str, str]):
+        self.modules = dict(modules)
+        self.costs: dict[str, float] = {}
+        self._loaded: dict[str, BaseLoader] = {}
+        self._entry_points_loaded = False
+
+    def _load_entry_points(self):
+        if self._entry_points_loaded:
+            return
+        self._entry_points_loaded = True
+        points = entry_points().select(group="n-p-alc.uniseg.adapters")
+        for entry_point in points.names:
+            start = perf_counter()
+            try:
+                module = points[entry_point].load()
+                loader = cast("BaseLoader", module() if isinstance(module, type) else module.Loader())
+            except Exception as e:
+                warn(f"Failed to import uniseg adapter {entry_point}: {e}", RuntimeWarning, 15)
+                continue
+            adapter = loader.get_adapter().value
+            self._loaded[adapter] = loader
+            self.costs[adapter] = perf_counter() - start
+            self.modules.pop(adapter, None)
+
+    def __getitem__(self, adapter: str) -> "BaseLoader":
+        self._load_entry_points()
+        if adapter in self._loaded:
+            return self._loaded[adapter]
+        path = self.modules[adapter]
+        start = perf_counter()
+        try:
+            module = importlib.import_module(path, __package__)
             loader = cast("BaseLoader", module.Loader())
-            loaders[loader.get_adapter().value] = loader
-    except Exception as e:  # noqa: PERF203
-        warn(f"Failed to import uniseg adapter {entry_point}: {e}", RuntimeWarning, 15)
+        except Exception as e:
+            del self.modules[adapter]
+            warn(f"Failed to import uniseg adapter {path[1:]}: {e}", RuntimeWarning, 15)
+            raise KeyError(adapter) from e
+        self._loaded[adapter] = loader
+        self.costs[adapter] = perf_counter() - start
+        return loader
 
+    def __contains__(self, adapter: object) -> bool:
+        self._load_entry_points()
+        return adapter in self._loaded or adapter in self.modules
 
-EXPORTER_MAPPING: dict[str, "MessageExporter"] = {
-    SupportAdapter.nonebug.value: loaders[SupportAdapter.nonebug.value].get_exporter()
-}
-BUILDER_MAPPING: dict[str, "MessageBuilder"] = {
-    SupportAdapter.nonebug.value: loaders[SupportAdapter.nonebug.value].get_builder()
-}
+    def __iter__(self) -> Iterator[str]:
+        self._load_entry_points()
+        yield from self._loaded
+        yield from (adapter for adapter in self.modules if adapter not in self._loaded)
+
+    def __len__(self) -> int:
+        self._load_entry_points()
+        return len(self._loaded.keys() | self.modules.keys())
+
+    def measure(self, adapter: str, getter: Callable[["BaseLoader"], T]) -> T:
+        """调用 Loader 的 get_xxx 并将导入耗时计入该适配器"""
+        loader = self[adapter]
+        start = perf_counter()
+        try:
+            return getter(loader)
+        finally:
+            self.costs[adapter] = self.costs.get(adapter, 0) + perf_counter() - start
+
+
+loaders = LoaderRegistry(_BUILTIN_LOADERS)
+
+EXPORTER_MAPPING: dict[str, "MessageExporter"] = {}
+BUILDER_MAPPING: dict[str, "MessageBuilder"] = {}
 FETCHER_MAPPING: dict[str, "TargetFetcher"] = {}
 adapters = {}
 try:
@@ -56,12 +133,12 @@ except Exception as e:
     warn(f"Failed to get nonebot adapters: {e}", RuntimeWarning, 15)
 
 if os.environ.get("PLUGIN_ALCONNA_TESTENV"):
-    for adapter, loader in loaders.items():
+    for adapter in list(loaders):
         try:
-            EXPORTER_MAPPING[adapter] = loader.get_exporter()
-            BUILDER_MAPPING[adapter] = loader.get_builder()
+            EXPORTER_MAPPING[adapter] = loaders.measure(adapter, lambda x: x.get_exporter())
+            BUILDER_MAPPING[adapter] = loaders.measure(adapter, lambda x: x.get_builder())
             with suppress(NotImplementedError):
-                FETCHER_MAPPING[adapter] = loader.get_fetcher()
+                FETCHER_MAPPING[adapter] = loaders.measure(adapter, lambda x: x.get_fetcher())
         except Exception as e:  # noqa: PERF203
             warn(f"Failed to load uniseg adapter {adapter}: {e}", RuntimeWarning, 15)
 elif not adapters:
@@ -72,15 +149,7 @@ elif not adapters:
     )
 else:
     for adapter in adapters:
-        if adapter in loaders:
-            try:
-                EXPORTER_MAPPING[adapter] = loaders[adapter].get_exporter()
-                BUILDER_MAPPING[adapter] = loaders[adapter].get_builder()
-                with suppress(NotImplementedError):
-                    FETCHER_MAPPING[adapter] = loaders[adapter].get_fetcher()
-            except Exception as e:
-                warn(f"Failed to load uniseg adapter {adapter}: {e}", RuntimeWarning, 15)
-        else:
+        if adapter not in loaders.modules and adapter not in loaders:
             warn(
                 f"Adapter {adapter} is not found in the uniseg.adapters,"
                 f"please go to the github repo and create an issue for it.",
@@ -89,12 +158,18 @@ else:
             )
 
 
+def import_cost_report() -> dict[str, float]:
+    """获取各适配器的 Loader 及其 builder/exporter/fetcher 的导入耗时（秒），仅包含已加载的适配器"""
+    return dict(sorted(loaders.costs.items(), key=lambda x: x[1], reverse=True))
+
+
 def alter_get_exporter(adapter_name: str):
     if adapter_name in EXPORTER_MAPPING:
         return EXPORTER_MAPPING[adapter_name]
     if adapter_name in loaders:
         try:
-            EXPORTER_MAPPING[adapter_name] = loaders[adapter_name].get_exporter()
+            EXPORTER_MAPPING[adapter_name] = loaders.measure(adapter_name, lambda x: x.get_exporter())
+            log("DEBUG", f"uniseg adapter {adapter_name} loaded in {loaders.costs[adapter_name] * 1000:.2f}ms")
             return EXPORTER_MAPPING[adapter_name]
         except Exception as e:
             warn(f"Failed to load uniseg adapter {adapter_name}: {e}", RuntimeWarning, 6)
@@ -113,7 +188,8 @@ def alter_get_builder(adapter_name: str):
         return BUILDER_MAPPING[adapter_name]
     if adapter_name in loaders:
         try:
-            BUILDER_MAPPING[adapter_name] = loaders[adapter_name].get_builder()
+            BUILDER_MAPPING[adapter_name] = loaders.measure(adapter_name, lambda x: x.get_builder())
+            log("DEBUG", f"uniseg adapter {adapter_name} loaded in {loaders.costs[adapter_name] * 1000:.2f}ms")
             return BUILDER_MAPPING[adapter_name]
         except Exception as e:
             warn(f"Failed to load uniseg adapter {adapter_name}: {e}", RuntimeWarning, 6)
@@ -132,7 +208,8 @@ def alter_get_fetcher(adapter_name: str):
         return FETCHER_MAPPING[adapter_name]
     if adapter_name in loaders:
         try:
-            FETCHER_MAPPING[adapter_name] = loaders[adapter_name].get_fetcher()
+            FETCHER_MAPPING[adapter_name] = loaders.measure(adapter_name, lambda x: x.get_fetcher())
+            log("DEBUG", f"uniseg adapter {adapter_name} loaded in {loaders.costs[adapter_name] * 1000:.2f}ms")
             return FETCHER_MAPPING[adapter_name]
         except NotImplementedError:
             return None
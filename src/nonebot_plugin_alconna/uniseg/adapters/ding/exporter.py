@@ -60,7 +60,7 @@ class DingMessageExporter(MessageExporter[Message]):
             )
         if seg.__class__.to_url and seg.raw:
             return MessageSegment.image(
-                await seg.__class__.to_url(seg.raw, bot, None if seg.name == seg.__default_name__ else seg.name)
+                await seg.__class__.to_url(seg.raw_source, bot, None if seg.name == seg.__default_name__ else seg.name)
             )
         raise ValueError("github image segment must have url")
 
@@ -14,6 +14,7 @@ from tarina import lang
 
 from nonebot_plugin_alconna.uniseg.constraint import SupportScope
 from nonebot_plugin_alconna.uniseg.exporter import MessageExporter, SerializeFailed, SupportAdapter, Target, export
+from nonebot_plugin_alconna.uniseg.mediaio import media_io
 from nonebot_plugin_alconna.uniseg.segment import (
     At,
     AtAll,
@@ -101,18 +102,18 @@ class DiscordMessageExporter(MessageExporter[Message]):
     async def emoji(self, seg: Emoji, bot: Bot | None) -> "MessageSegment":
         return MessageSegment.custom_emoji(seg.name or "", seg.id, bool(seg.name and seg.name.endswith("gif")))
 
-    @export
+    @export(concurrent=True)
     async def media(self, seg: Image | Voice | Video | Audio | File, bot: Bot | None) -> "MessageSegment":
         name = seg.__class__.__name__.lower()
         if isinstance(seg, Image) and seg.sticker and seg.id:
             return MessageSegment.sticker(int(seg.id))
         if seg.raw and (seg.id or seg.name):
-            content = seg.raw_bytes
+            content = await seg.raw_bytes_async()
             return MessageSegment.attachment(seg.id or seg.name, content=content)
         if seg.path:
             path = Path(seg.path)
             filename = path.name if seg.name == seg.__default_name__ else seg.name
-            return MessageSegment.attachment(filename, content=path.read_bytes())
+            return MessageSegment.attachment(filename, content=await media_io.read(path))
         if bot and seg.url and (seg.id or seg.name):
             resp = await bot.adapter.request(Request("GET", seg.url))
             return MessageSegment.attachment(
@@ -62,13 +62,13 @@ class DoDoMessageExporter(MessageExporter[Message]):
             return MessageSegment.channel_link(seg.target)
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type="at", seg=seg))
 
-    @export
+    @export(concurrent=True)
     async def image(self, seg: Image, bot: Bot | None) -> "MessageSegment":
         if TYPE_CHECKING:
             assert isinstance(bot, DoDoBot)
         filename = None
         if seg.raw:
-            data = seg.raw_bytes
+            data = await seg.raw_bytes_async()
         elif seg.path:
             data = Path(seg.path)
             filename = data.name if seg.name == seg.__default_name__ else seg.name
@@ -59,7 +59,7 @@ class EFChatMessageExporter(MessageExporter["Message"]):
         if seg.path:
             return MessageSegment.image(path=seg.path)
         if seg.raw:
-            return MessageSegment.image(raw=seg.raw_bytes)
+            return MessageSegment.image(raw=await seg.raw_bytes_async())
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type="image", seg=seg))
 
     @export
@@ -69,7 +69,7 @@ class EFChatMessageExporter(MessageExporter["Message"]):
         if seg.path:
             return MessageSegment.voice(path=Path(seg.path))
         if seg.raw:
-            return MessageSegment.voice(raw=seg.raw_bytes)
+            return MessageSegment.voice(raw=await seg.raw_bytes_async())
         if seg.id:
             return MessageSegment.voice(src_name=seg.id)
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type="voice", seg=seg))
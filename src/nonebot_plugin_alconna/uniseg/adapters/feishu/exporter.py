@@ -10,6 +10,7 @@ from tarina import lang
 
 from nonebot_plugin_alconna.uniseg.constraint import SupportScope
 from nonebot_plugin_alconna.uniseg.exporter import MessageExporter, SerializeFailed, SupportAdapter, Target, export
+from nonebot_plugin_alconna.uniseg.mediaio import media_io
 from nonebot_plugin_alconna.uniseg.segment import (
     At,
     AtAll,
@@ -17,12 +18,14 @@ from nonebot_plugin_alconna.uniseg.segment import (
     Emoji,
     File,
     Image,
+    Media,
     Reply,
     Segment,
     Text,
     Video,
     Voice,
 )
+from nonebot_plugin_alconna.uniseg.upload import media_digest, upload_cache
 
 
 class FeishuMessageExporter(MessageExporter[Message]):
@@ -67,7 +70,36 @@ class FeishuMessageExporter(MessageExporter[Message]):
     async def at_all(self, seg: AtAll, bot: Bot | None) -> "MessageSegment":
         return MessageSegment.at("all")
 
-    @export
+    async def _upload(self, seg: Media, bot: Bot, kind: str) -> str:
+        """上传媒体并返回 image_key 或 file_key，结果会经过上传缓存"""
+        if seg.path and seg.name == seg.__default_name__:
+            filename = Path(seg.path).name
+        else:
+            filename = seg.name
+
+        async def _upload():
+            if seg.url:
+                resp = await bot.adapter.request(Request("GET", seg.url))
+                raw = resp.content
+            elif seg.path:
+                raw = await media_io.read(seg.path)
+            elif seg.raw:
+                raw = await seg.raw_bytes_async()
+            else:
+                raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type=kind, seg=seg))
+            if kind == "image":
+                params = {"method": "POST", "data": {"image_type": "message"}, "files": {"image": ("file", raw)}}
+                result = await bot.call_api("im/v1/images", **params)
+                return result["data"]["image_key"]
+            data = {"file_type": "stream", "file_name": filename}
+            params = {"method": "POST", "data": data, "files": {"file": ("file", raw)}}
+            result = await bot.call_api("im/v1/files", **params)
+            return result["data"]["file_key"]
+
+        cache_kind = kind if kind == "image" else f"file:{filename}"
+        return await upload_cache.fetch(bot.adapter.get_name(), bot, cache_kind, media_digest(seg), _upload)
+
+    @export(concurrent=True)
     async def image(self, seg: Image, bot: Bot | None) -> "MessageSegment":
         if seg.id:
             if seg.sticker:
@@ -75,94 +107,32 @@ class FeishuMessageExporter(MessageExporter[Message]):
             return MessageSegment.image(seg.id)
         if not bot:
             raise NotImplementedError
-        if seg.url:
-            resp = await bot.adapter.request(Request("GET", seg.url))
-            image = resp.content
-        elif seg.path:
-            image = Path(seg.path).read_bytes()
-        elif seg.raw:
-            image = seg.raw_bytes
-        else:
-            raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type="image", seg=seg))
-        data = {"image_type": "message"}
-        files = {"image": ("file", image)}
-        params = {"method": "POST", "data": data, "files": files}
-        result = await bot.call_api("im/v1/images", **params)
-        file_key = result["data"]["image_key"]
-        return MessageSegment.image(file_key)
+        return MessageSegment.image(await self._upload(seg, bot, "image"))
 
-    @export
+    @export(concurrent=True)
     async def audio(self, seg: Voice | Audio, bot: Bot | None) -> "MessageSegment":
-        name = seg.__class__.__name__.lower()
         if seg.id:
             return MessageSegment.audio(seg.id, int(seg.duration) if seg.duration else None)
         if not bot:
             raise NotImplementedError
-        filename = seg.name
-        if seg.url:
-            resp = await bot.adapter.request(Request("GET", seg.url))
-            raw = resp.content
-        elif seg.path:
-            raw = Path(seg.path).read_bytes()
-            filename = Path(seg.path).name if seg.name == seg.__default_name__ else seg.name
-        elif seg.raw:
-            raw = seg.raw_bytes
-        else:
-            raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type=name, seg=seg))
-        data = {"file_type": "stream", "file_name": filename}
-        files = {"file": ("file", raw)}
-        params = {"method": "POST", "data": data, "files": files}
-        result = await bot.call_api("im/v1/files", **params)
-        file_key = result["data"]["file_key"]
+        file_key = await self._upload(seg, bot, seg.__class__.__name__.lower())
         return MessageSegment.audio(file_key, int(seg.duration) if seg.duration else None)
 
-    @export
+    @export(concurrent=True)
     async def file(self, seg: File, bot: Bot | None) -> "MessageSegment":
         if seg.id:
             return MessageSegment.file(seg.id, seg.name)
         if not bot:
             raise NotImplementedError
-        filename = seg.name
-        if seg.url:
-            resp = await bot.adapter.request(Request("GET", seg.url))
-            raw = resp.content
-        elif seg.path:
-            raw = Path(seg.path).read_bytes()
-            filename = Path(seg.path).name if seg.name == seg.__default_name__ else seg.name
-        elif seg.raw:
-            raw = seg.raw_bytes
-        else:
-            raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type="file", seg=seg))
-        data = {"file_type": "stream", "file_name": filename}
-        files = {"file": ("file", raw)}
-        params = {"method": "POST", "data": data, "files": files}
-        result = await bot.call_api("im/v1/files", **params)
-        file_key = result["data"]["file_key"]
-        return MessageSegment.file(file_key, seg.name)
+        return MessageSegment.file(await self._upload(seg, bot, "file"), seg.name)
 
-    @export
+    @export(concurrent=True)
     async def video(self, seg: Video, bot: Bot | None) -> "MessageSegment":
         if seg.id:
             return MessageSegment.sticker(seg.id)
         if not bot:
             raise NotImplementedError
-        filename = seg.name
-        if seg.url:
-            resp = await bot.adapter.request(Request("GET", seg.url))
-            raw = resp.content
-        elif seg.path:
-            raw = Path(seg.path).read_bytes()
-            filename = Path(seg.path).name if seg.name == seg.__default_name__ else seg.name
-        elif seg.raw:
-            raw = seg.raw_bytes
-        else:
-            raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type="video", seg=seg))
-        data = {"file_type": "stream", "file_name": filename}
-        files = {"file": ("file", raw)}
-        params = {"method": "POST", "data": data, "files": files}
-        result = await bot.call_api("im/v1/files", **params)
-        file_key = result["data"]["file_key"]
-        return MessageSegment.sticker(file_key)
+        return MessageSegment.sticker(await self._upload(seg, bot, "video"))
 
     @export
     async def reply(self, seg: Reply, bot: Bot | None) -> "MessageSegment":
@@ -47,7 +47,9 @@ class GithubMessageExporter(MessageExporter["Message"]):
             url = await seg.__class__.to_url(seg.path, bot, None if seg.name == seg.__default_name__ else seg.name)
             return MessageSegment.markdown(f"![]({url})")
         if seg.__class__.to_url and seg.raw:
-            url = await seg.__class__.to_url(seg.raw, bot, None if seg.name == seg.__default_name__ else seg.name)
+            url = await seg.__class__.to_url(
+                seg.raw_source, bot, None if seg.name == seg.__default_name__ else seg.name
+            )
             return MessageSegment.markdown(f"![]({url})")
         raise ValueError("github image segment must have url")
 
@@ -9,6 +9,7 @@ from tarina import lang
 
 from nonebot_plugin_alconna.uniseg.constraint import SupportScope
 from nonebot_plugin_alconna.uniseg.exporter import MessageExporter, SerializeFailed, SupportAdapter, Target, export
+from nonebot_plugin_alconna.uniseg.mediaio import media_io
 from nonebot_plugin_alconna.uniseg.segment import At, Image, Reply, Text
 
 
@@ -56,14 +57,14 @@ class HeyboxMessageExporter(MessageExporter[Message]):
         if seg.path:
             path = Path(seg.path)
             return MessageSegment.local_image(
-                path.read_bytes(),
+                await media_io.read(path),
                 width=seg.width or 0,
                 height=seg.height or 0,
                 filename=path.name if seg.name == seg.__default_name__ else seg.name,
             )
         if seg.raw:
             return MessageSegment.local_image(
-                seg.raw_bytes, width=seg.width or 0, height=seg.height or 0, filename=seg.name
+                await seg.raw_bytes_async(), width=seg.width or 0, height=seg.height or 0, filename=seg.name
             )
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type="image", seg=seg))
 
@@ -9,6 +9,7 @@ from tarina import lang
 
 from nonebot_plugin_alconna.uniseg.constraint import SupportScope
 from nonebot_plugin_alconna.uniseg.exporter import MessageExporter, SerializeFailed, SupportAdapter, Target, export
+from nonebot_plugin_alconna.uniseg.mediaio import media_io
 from nonebot_plugin_alconna.uniseg.segment import (
     At,
     AtAll,
@@ -17,12 +18,14 @@ from nonebot_plugin_alconna.uniseg.segment import (
     File,
     Hyper,
     Image,
+    Media,
     Reply,
     Segment,
     Text,
     Video,
     Voice,
 )
+from nonebot_plugin_alconna.uniseg.upload import media_digest, upload_cache
 
 
 class KookMessageExporter(MessageExporter["Message"]):
@@ -78,7 +81,19 @@ class KookMessageExporter(MessageExporter["Message"]):
             return MessageSegment.KMarkdown(f"(emj){seg.name}(emj)[{seg.id}]")
         return MessageSegment.KMarkdown(f":{seg.id}:")
 
-    @export
+    async def _upload(self, seg: Media, bot: Bot) -> str:
+        """上传本地媒体并返回 URL，结果会经过上传缓存"""
+        if TYPE_CHECKING:
+            assert isinstance(bot, KBot)
+        name = None if seg.name == seg.__default_name__ else seg.name
+
+        async def _upload():
+            data = await seg.raw_bytes_async() if seg.raw else await media_io.read(seg.path)  # type: ignore
+            return await bot.upload_file(data, name)  # type: ignore
+
+        return await upload_cache.fetch(bot.adapter.get_name(), bot, f"asset:{name or ''}", media_digest(seg), _upload)
+
+    @export(concurrent=True)
     async def image(self, seg: Image, bot: Bot | None) -> "MessageSegment":
         if TYPE_CHECKING:
             assert isinstance(bot, KBot)
@@ -89,19 +104,21 @@ class KookMessageExporter(MessageExporter["Message"]):
             return MessageSegment.image(seg.url)
         if seg.__class__.to_url and seg.raw:
             return MessageSegment.image(
-                await seg.__class__.to_url(seg.raw, bot, None if seg.name == seg.__default_name__ else seg.name)
+                await seg.__class__.to_url(seg.raw_source, bot, None if seg.name == seg.__default_name__ else seg.name)
             )
         if seg.__class__.to_url and seg.path:
             return MessageSegment.image(
                 await seg.__class__.to_url(seg.path, bot, None if seg.name == seg.__default_name__ else seg.name)
             )
+        if upload_cache.enabled and bot and (seg.raw or seg.path):
+            return MessageSegment.image(await self._upload(seg, bot))
         if seg.raw:
-            return MessageSegment.local_image(seg.raw_bytes)
+            return MessageSegment.local_image(await seg.raw_bytes_async())
         if seg.path:
             return MessageSegment.local_image(seg.path)
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type=name, seg=seg))
 
-    @export
+    @export(concurrent=True)
     async def media(self, seg: Voice | Video | Audio | File, bot: Bot | None) -> "MessageSegment":
         if TYPE_CHECKING:
             assert isinstance(bot, KBot)
@@ -117,7 +134,8 @@ class KookMessageExporter(MessageExporter["Message"]):
             return method(seg.id or seg.url, title)
         if seg.__class__.to_url and seg.raw:
             return method(
-                await seg.__class__.to_url(seg.raw, bot, None if seg.name == seg.__default_name__ else seg.name), title
+                await seg.__class__.to_url(seg.raw_source, bot, None if seg.name == seg.__default_name__ else seg.name),
+                title,
             )
         if seg.__class__.to_url and seg.path:
             return method(
@@ -129,8 +147,10 @@ class KookMessageExporter(MessageExporter["Message"]):
             "video": MessageSegment.local_video,
             "file": MessageSegment.local_file,
         }[name]
+        if upload_cache.enabled and bot and (seg.raw or seg.path):
+            return method(await self._upload(seg, bot), title)
         if seg.raw:
-            return local_method(seg.raw_bytes, title)
+            return local_method(await seg.raw_bytes_async(), title)
         if seg.path:
             return local_method(seg.path, title)
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type=name, seg=seg))
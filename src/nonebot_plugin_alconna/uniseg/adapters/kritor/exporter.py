@@ -160,7 +160,7 @@ class KritorMessageExporter(MessageExporter["Message"]):
             "audio": MessageSegment.voice,
         }[name]
         if seg.raw:
-            return method(raw=seg.raw_bytes)
+            return method(raw=await seg.raw_bytes_async())
         if seg.path:
             return method(path=Path(seg.path))
         if seg.url:
@@ -9,6 +9,7 @@ from tarina import lang
 
 from nonebot_plugin_alconna.uniseg.constraint import SerializeFailed, SupportScope
 from nonebot_plugin_alconna.uniseg.exporter import MessageExporter, SupportAdapter, Target, export
+from nonebot_plugin_alconna.uniseg.mediaio import MediaPayload
 from nonebot_plugin_alconna.uniseg.segment import At, Audio, File, Image, Reply, Text, Video, Voice
 
 
@@ -58,7 +59,8 @@ class MailMessageExporter(MessageExporter[Message]):
         name = seg.__class__.__name__.lower()
 
         if seg.raw and (seg.id or seg.name):
-            return MessageSegment.attachment(seg.raw, seg.id or seg.name, seg.mimetype)
+            data = await seg.raw_bytes_async() if isinstance(seg.raw, MediaPayload) else seg.raw
+            return MessageSegment.attachment(data, seg.id or seg.name, seg.mimetype)
         if seg.path:
             path = Path(seg.path)
             filename = path.name if seg.name == seg.__default_name__ else seg.name
@@ -99,7 +99,8 @@ class MilkyMessageExporter(MessageExporter["Message"]):
             "audio": MessageSegment.record,
         }[name]
         if seg.raw:
-            ans = method(raw=seg.raw)
+            data = seg.raw_source
+            ans = method(path=data) if isinstance(data, Path) else method(raw=data)
         elif seg.path:
             ans = method(path=Path(seg.path))
         elif seg.url:
@@ -124,7 +125,7 @@ class MilkyMessageExporter(MessageExporter["Message"]):
                 thumb_url = await bot.get_resource_temp_url(resource_id=seg.thumbnail.id)
             elif seg.__class__.to_url and seg.thumbnail.raw:
                 thumb_url = await seg.__class__.to_url(
-                    seg.thumbnail.raw,
+                    seg.thumbnail.raw_source,
                     bot,
                     None if seg.thumbnail.name == seg.thumbnail.__default_name__ else seg.thumbnail.name,
                 )
@@ -135,7 +136,10 @@ class MilkyMessageExporter(MessageExporter["Message"]):
                     None if seg.thumbnail.name == seg.thumbnail.__default_name__ else seg.thumbnail.name,
                 )
         if seg.raw:
-            return MessageSegment.video(raw=seg.raw, thumb_url=thumb_url)
+            data = seg.raw_source
+            if isinstance(data, Path):
+                return MessageSegment.video(path=data, thumb_url=thumb_url)
+            return MessageSegment.video(raw=data, thumb_url=thumb_url)
         if seg.path:
             return MessageSegment.video(path=Path(seg.path), thumb_url=thumb_url)
         if seg.url:
@@ -162,12 +166,12 @@ class MilkyMessageExporter(MessageExporter["Message"]):
                     "$milky:file",
                     {
                         "uri": await seg.__class__.to_url(
-                            seg.raw, bot, None if seg.name == seg.__default_name__ else seg.name
+                            seg.raw_source, bot, None if seg.name == seg.__default_name__ else seg.name
                         ),
                         "name": filename,
                     },
                 )
-            return MessageSegment("$milky:file", {"uri": to_uri(raw=seg.raw_bytes), "name": filename})
+            return MessageSegment("$milky:file", {"uri": to_uri(raw=await seg.raw_bytes_async()), "name": filename})
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type="file", seg=seg))
 
     @export
@@ -23,6 +23,7 @@ from tarina import lang
 
 from nonebot_plugin_alconna.uniseg.constraint import SupportScope
 from nonebot_plugin_alconna.uniseg.exporter import MessageExporter, SerializeFailed, SupportAdapter, Target, export
+from nonebot_plugin_alconna.uniseg.mediaio import media_io
 from nonebot_plugin_alconna.uniseg.segment import (
     At,
     AtAll,
@@ -139,7 +140,9 @@ class MiraiMessageExporter(MessageExporter[Message]):
             return method(path=str(seg.path))
         if seg.__class__.to_url and seg.raw:
             return method(
-                url=await seg.__class__.to_url(seg.raw, bot, None if seg.name == seg.__default_name__ else seg.name)
+                url=await seg.__class__.to_url(
+                    seg.raw_source, bot, None if seg.name == seg.__default_name__ else seg.name
+                )
             )
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type=name, seg=seg))
 
@@ -150,8 +153,8 @@ class MiraiMessageExporter(MessageExporter[Message]):
         if seg.id:
             return VideoSegment.parse({"videoId": seg.id})
         if seg.thumbnail:
-            if seg.raw_bytes:
-                video_data: bytes | Path = seg.raw_bytes
+            if seg.raw:
+                video_data: bytes | Path = await seg.raw_bytes_async()
             elif seg.path:
                 video_data: bytes | Path = Path(seg.path)
             elif seg.url:
@@ -159,8 +162,8 @@ class MiraiMessageExporter(MessageExporter[Message]):
                 video_data: bytes | Path = resp.content  # type: ignore
             else:
                 raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type="video", seg=seg))
-            if seg.thumbnail.raw_bytes:
-                thumbnail_data: bytes | Path = seg.thumbnail.raw_bytes
+            if seg.thumbnail.raw:
+                thumbnail_data: bytes | Path = await seg.thumbnail.raw_bytes_async()
             elif seg.thumbnail.path:
                 thumbnail_data: bytes | Path = Path(seg.thumbnail.path)
             elif seg.thumbnail.url:
@@ -183,7 +186,7 @@ class MiraiMessageExporter(MessageExporter[Message]):
             return MessageSegment(
                 "$mirai:file",
                 {
-                    "data": Path(seg.path).read_bytes(),
+                    "data": await media_io.read(seg.path),
                     "name": Path(seg.path).name if seg.name == seg.__default_name__ else seg.name,
                 },
             )
@@ -59,7 +59,7 @@ class NTChatMessageExporter(MessageExporter["Message"]):
         if seg.path:
             return method(seg.path)
         if seg.raw:
-            return method(seg.raw_bytes)
+            return method(await seg.raw_bytes_async())
         if seg.url or seg.id:
             return method(seg.url or seg.id)  # type: ignore
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type=name, seg=seg))
@@ -84,7 +84,8 @@ class Onebot11MessageExporter(MessageExporter["Message"]):
             "audio": MessageSegment.record,
         }[name]
         if seg.raw:
-            ans = method(seg.raw_bytes)
+            # 由文件提供的数据直接传递路径，避免读入内存
+            ans = method(data if isinstance(data := seg.raw_source, Path) else seg.raw_bytes)
         elif seg.path:
             ans = method(Path(seg.path))
         elif seg.url:
@@ -1,7 +1,8 @@
 from typing import TYPE_CHECKING
 
-from nonebot.adapters import Bot
+from nonebot.adapters import Bot, Event
 from nonebot.adapters.onebot.v11.bot import Bot as Onebot11Bot
+from nonebot.adapters.onebot.v11.event import FriendAddNoticeEvent, GroupDecreaseNoticeEvent, GroupIncreaseNoticeEvent
 
 from nonebot_plugin_alconna.uniseg.constraint import SupportAdapter
 from nonebot_plugin_alconna.uniseg.target import Target, TargetFetcher
@@ -34,3 +35,14 @@ class Onebot11TargetFetcher(TargetFetcher):
                     adapter=self.get_adapter(),
                     self_id=bot.self_id,
                 )
+
+    def changes(self, bot: Bot, event: Event):
+        if isinstance(event, FriendAddNoticeEvent):
+            return [Target(str(event.user_id), private=True, adapter=self.get_adapter(), self_id=bot.self_id)], []
+        if (
+            isinstance(event, (GroupIncreaseNoticeEvent, GroupDecreaseNoticeEvent))
+            and str(event.user_id) == bot.self_id
+        ):
+            target = Target(str(event.group_id), adapter=self.get_adapter(), self_id=bot.self_id)
+            return ([target], []) if isinstance(event, GroupIncreaseNoticeEvent) else ([], [target])
+        return None
@@ -115,11 +115,11 @@ class Onebot12MessageExporter(MessageExporter["Message"]):
                     type="url",
                     name=seg.name,
                     url=await seg.__class__.to_url(
-                        seg.raw, bot, None if seg.name == seg.__default_name__ else seg.name
+                        seg.raw_source, bot, None if seg.name == seg.__default_name__ else seg.name
                     ),
                 )
             else:
-                resp = await bot.upload_file(type="data", data=seg.raw_bytes, name=seg.name)
+                resp = await bot.upload_file(type="data", data=await seg.raw_bytes_async(), name=seg.name)
             return method(resp["file_id"])
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type=name, seg=seg))
 
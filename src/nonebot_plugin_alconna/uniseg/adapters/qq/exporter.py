@@ -268,7 +268,7 @@ class QQMessageExporter(MessageExporter[Message]):
     async def emoji(self, seg: Emoji, bot: Bot | None) -> "MessageSegment":
         return MessageSegment.emoji(seg.id)
 
-    @export
+    @export(concurrent=True)
     async def media(self, seg: Image | Voice | Video | Audio | File, bot: Bot | None) -> "MessageSegment":
         name = seg.__class__.__name__.lower()
         method = {
@@ -283,7 +283,7 @@ class QQMessageExporter(MessageExporter[Message]):
             return method(seg.url)
         if seg.__class__.to_url and seg.raw:
             return method(
-                await seg.__class__.to_url(seg.raw, bot, None if seg.name == seg.__default_name__ else seg.name)
+                await seg.__class__.to_url(seg.raw_source, bot, None if seg.name == seg.__default_name__ else seg.name)
             )
         if seg.__class__.to_url and seg.path:
             return method(
@@ -298,7 +298,7 @@ class QQMessageExporter(MessageExporter[Message]):
             "file": MessageSegment.file_file,
         }[name]
         if seg.raw:
-            return file_method(seg.raw_bytes)
+            return file_method(await seg.raw_bytes_async())
         if seg.path:
             return file_method(Path(seg.path))
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type="image", seg=seg))
@@ -77,7 +77,7 @@ class RedMessageExporter(MessageExporter[Message]):
         if seg.path:
             return method(Path(seg.path))
         if seg.raw:
-            return method(seg.raw_bytes)
+            return method(await seg.raw_bytes_async())
         if seg.url and bot:
             resp = await bot.adapter.request(Request("GET", seg.url))
             return method(resp.content)  # type: ignore
@@ -89,7 +89,7 @@ class RedMessageExporter(MessageExporter[Message]):
         if seg.path:
             return MessageSegment.voice(Path(seg.path), duration=int(seg.duration or 1))
         if seg.raw:
-            return MessageSegment.voice(seg.raw_bytes, duration=int(seg.duration or 1))
+            return MessageSegment.voice(await seg.raw_bytes_async(), duration=int(seg.duration or 1))
         if seg.url and bot:
             resp = await bot.adapter.request(Request("GET", seg.url))
             return MessageSegment.voice(resp.content, duration=seg.duration or 1)  # type: ignore
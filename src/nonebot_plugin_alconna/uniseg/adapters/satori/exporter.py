@@ -155,7 +155,7 @@ class SatoriMessageExporter(MessageExporter[Message]):
             )  # type: ignore
         elif seg.__class__.to_url and seg.raw:
             ans = method(
-                await seg.__class__.to_url(seg.raw, bot, None if seg.name == seg.__default_name__ else seg.name),
+                await seg.__class__.to_url(seg.raw_source, bot, None if seg.name == seg.__default_name__ else seg.name),
                 name=filename,
             )(
                 await self.export(seg.children, bot, True)  # type: ignore
@@ -164,7 +164,7 @@ class SatoriMessageExporter(MessageExporter[Message]):
             filename = filename or Path(seg.path).name
             ans = method(path=seg.path, name=filename)(await self.export(seg.children, bot, True))  # type: ignore
         elif seg.raw and seg.mimetype:
-            data = seg.raw_bytes
+            data = await seg.raw_bytes_async()
             ans = method(raw=data, mime=seg.mimetype, name=filename)(await self.export(seg.children, bot, True))  # type: ignore
         else:
             raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type=name, seg=seg))
@@ -80,7 +80,9 @@ class TailChatMessageExporter(MessageExporter["Message"]):
             url = await seg.__class__.to_url(seg.path, bot, None if seg.name == seg.__default_name__ else seg.name)
             return MessageSegment.img(url, width=seg.width, height=seg.height)
         if seg.__class__.to_url and seg.raw:
-            url = await seg.__class__.to_url(seg.raw, bot, None if seg.name == seg.__default_name__ else seg.name)
+            url = await seg.__class__.to_url(
+                seg.raw_source, bot, None if seg.name == seg.__default_name__ else seg.name
+            )
             return MessageSegment.img(url, width=seg.width, height=seg.height)
         raise SerializeFailed("tailchat image segment must have url")
 
@@ -92,7 +94,9 @@ class TailChatMessageExporter(MessageExporter["Message"]):
             url = await seg.__class__.to_url(seg.path, bot, None if seg.name == seg.__default_name__ else seg.name)
             return MessageSegment.file(name=seg.name, url=url)
         if seg.__class__.to_url and seg.raw:
-            url = await seg.__class__.to_url(seg.raw, bot, None if seg.name == seg.__default_name__ else seg.name)
+            url = await seg.__class__.to_url(
+                seg.raw_source, bot, None if seg.name == seg.__default_name__ else seg.name
+            )
             return MessageSegment.file(name=seg.name, url=url)
         raise SerializeFailed("tailchat file segment must have url")
 
@@ -1,4 +1,3 @@
-from pathlib import Path
 from typing import Any, Sequence, cast
 
 from nonebot.adapters import Bot, Event
@@ -15,6 +14,7 @@ from tarina import lang
 
 from nonebot_plugin_alconna.uniseg.constraint import SupportScope
 from nonebot_plugin_alconna.uniseg.exporter import MessageExporter, SerializeFailed, SupportAdapter, Target, export
+from nonebot_plugin_alconna.uniseg.mediaio import media_io
 from nonebot_plugin_alconna.uniseg.segment import (
     At,
     Audio,
@@ -130,9 +130,9 @@ class TelegramMessageExporter(MessageExporter[Message]):
         if s := (seg.id or seg.url):
             return method(s)
         if seg.path:
-            raw = Path(seg.path).read_bytes()
+            raw = await media_io.read(seg.path)
         elif seg.raw:
-            raw = seg.raw_bytes
+            raw = await seg.raw_bytes_async()
         else:
             raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type=name, seg=seg))
         return method((seg.name, raw) if seg.name else raw)
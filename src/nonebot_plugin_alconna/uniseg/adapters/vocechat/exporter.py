@@ -81,7 +81,7 @@ class VocechatMessageExporter(MessageExporter[Message]):
         if seg.path:
             return method(file=Path(seg.path), filename=filename, properties=properties)
         if seg.raw:
-            return method(file=seg.raw_bytes, filename=filename, properties=properties)
+            return method(file=await seg.raw_bytes_async(), filename=filename, properties=properties)
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type=name, seg=seg))
 
     def _pop_reply(self, message: Message) -> tuple[int | None, Message]:
@@ -59,8 +59,8 @@ class WXMPMessageExporter(MessageExporter[Message]):
             return methods[name](media_id=seg.id)
         if seg.raw:
             if name in ("voice", "audio"):
-                return MessageSegment.voice(file=seg.raw_bytes, format=seg.mimetype)
-            return methods[name](file=seg.raw_bytes)
+                return MessageSegment.voice(file=await seg.raw_bytes_async(), format=seg.mimetype)
+            return methods[name](file=await seg.raw_bytes_async())
         if seg.path:
             return methods[name](file_path=Path(seg.path))
         if seg.url and name == "image":
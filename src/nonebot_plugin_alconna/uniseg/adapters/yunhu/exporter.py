@@ -1,4 +1,3 @@
-from pathlib import Path
 from typing import TYPE_CHECKING, Any, Sequence, cast
 
 from nonebot.adapters import Bot, Event
@@ -11,6 +10,7 @@ from tarina import lang
 
 from nonebot_plugin_alconna.uniseg.constraint import SupportScope
 from nonebot_plugin_alconna.uniseg.exporter import MessageExporter, SerializeFailed, SupportAdapter, Target, export
+from nonebot_plugin_alconna.uniseg.mediaio import media_io
 from nonebot_plugin_alconna.uniseg.segment import At, Button, Emoji, File, Image, Keyboard, Reply, Segment, Text, Video
 
 
@@ -88,9 +88,9 @@ class YunHuMessageExporter(MessageExporter[Message]):
         if seg.url:
             return method(url=seg.url)
         if seg.raw:
-            return method(raw=seg.raw_bytes)
+            return method(raw=await seg.raw_bytes_async())
         if seg.path:
-            return method(raw=Path(seg.path).read_bytes())
+            return method(raw=await media_io.read(seg.path))
         raise SerializeFailed(lang.require("nbp-uniseg", "invalid_segment").format(type="image", seg=seg))
 
     @export
@@ -24,6 +24,9 @@ class MessageBuilder(Generic[TS], metaclass=ABCMeta):
         str,
         Callable[[MessageSegment], Segment | None] | Callable[[MessageSegment], list[Segment]],
     ]
+    _custom_table: dict[str, tuple]
+    """按消息段类型缓存的自定义构建器分派表，见 `custom.solve`"""
+    _custom_version: tuple[int, int] | None
 
     @classmethod
     @abstractmethod
@@ -34,6 +37,8 @@ class MessageBuilder(Generic[TS], metaclass=ABCMeta):
 
     def __init__(self):
         self._mapping = {}
+        self._custom_table = {}
+        self._custom_version = None
         for attr in self.__class__.__dict__.values():
             if callable(attr) and hasattr(attr, "__build_target__"):
                 method = getattr(self, attr.__name__)
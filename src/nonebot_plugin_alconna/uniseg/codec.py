@@ -0,0 +1,239 @@
+"""UniMessage 的二进制编码
+
+格式 (版本 1)::
+
+    消息   := MAGIC VERSION 值
+    归档   := MAGIC VERSION (长度 值)*
+    值     := 标签 内容
+
+所有长度与整数均为 LEB128 变长编码 (整数先经 zigzag 变换)。
+消息以 `Segment.dump(media_save_dir=False)` 的结构编码，媒体数据以原始字节段存储而非 base64；
+指定 `media_save_dir` 时媒体会保存为文件，仅存储其路径。
+"""
+
+from __future__ import annotations
+
+import struct
+from collections.abc import Iterator
+from io import BytesIO
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+from .mediaio import MediaPayload
+
+if TYPE_CHECKING:
+    from .message import UniMessage
+
+MAGIC = b"UNIM"
+VERSION = 1
+
+_NONE = 0x00
+_TRUE = 0x01
+_FALSE = 0x02
+_INT = 0x03
+_FLOAT = 0x04
+_STR = 0x05
+_BYTES = 0x06
+_LIST = 0x07
+_MAP = 0x08
+
+_DOUBLE = struct.Struct("<d")
+
+
+def _write_varint(buffer: bytearray, value: int):
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: memoryview, offset: int) -> tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("Unexpected end of data")
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+
+def _encode(buffer: bytearray, value: Any):
+    if value is None:
+        buffer.append(_NONE)
+    elif value is True:
+        buffer.append(_TRUE)
+    elif value is False:
+        buffer.append(_FALSE)
+    elif isinstance(value, int):
+        buffer.append(_INT)
+        _write_varint(buffer, (value << 1) if value >= 0 else ((-value << 1) - 1))
+    elif isinstance(value, float):
+        buffer.append(_FLOAT)
+        buffer += _DOUBLE.pack(value)
+    elif isinstance(value, (str, Path)):
+        raw = str(value).encode("utf-8")
+        buffer.append(_STR)
+        _write_varint(buffer, len(raw))
+        buffer += raw
+    elif isinstance(value, (bytes, bytearray, memoryview, BytesIO, MediaPayload)):
+        if isinstance(value, BytesIO):
+            raw = value.getbuffer()
+        elif isinstance(value, MediaPayload):
+            raw = value.view()
+        else:
+            raw = value
+        buffer.append(_BYTES)
+        _write_varint(buffer, len(raw))
+        buffer += raw
+    elif isinstance(value, (list, tuple)):
+        buffer.append(_LIST)
+        _write_varint(buffer, len(value))
+        for item in value:
+            _encode(buffer, item)
+    elif isinstance(value, dict):
+        buffer.append(_MAP)
+        _write_varint(buffer, len(value))
+        for key, item in value.items():
+            _encode(buffer, key)
+            _encode(buffer, item)
+    else:
+        raise TypeError(f"Type {type(value)} can not be encoded")
+
+
+def _decode(data: memoryview, offset: int) -> tuple[Any, int]:
+    if offset >= len(data):
+        raise ValueError("Unexpected end of data")
+    tag = data[offset]
+    offset += 1
+    if tag == _NONE:
+        return None, offset
+    if tag == _TRUE:
+        return True, offset
+    if tag == _FALSE:
+        return False, offset
+    if tag == _INT:
+        value, offset = _read_varint(data, offset)
+        return (value >> 1) if not value & 1 else -((value + 1) >> 1), offset
+    if tag == _FLOAT:
+        if offset + _DOUBLE.size > len(data):
+            raise ValueError("Unexpected end of data")
+        return _DOUBLE.unpack_from(data, offset)[0], offset + _DOUBLE.size
+    if tag in (_STR, _BYTES):
+        size, offset = _read_varint(data, offset)
+        raw = data[offset : offset + size]
+        if len(raw) != size:
+            raise ValueError("Unexpected end of data")
+        return (str(raw, "utf-8") if tag == _STR else raw.tobytes()), offset + size
+    if tag == _LIST:
+        size, offset = _read_varint(data, offset)
+        result = []
+        for _ in range(size):
+            item, offset = _decode(data, offset)
+            result.append(item)
+        return result, offset
+    if tag == _MAP:
+        size, offset = _read_varint(data, offset)
+        mapping = {}
+        for _ in range(size):
+            key, offset = _decode(data, offset)
+            mapping[key], offset = _decode(data, offset)
+        return mapping, offset
+    raise ValueError(f"Unknown tag {tag:#x} at offset {offset - 1}")
+
+
+def _check_header(header: bytes):
+    if len(header) < len(MAGIC) + 1 or header[: len(MAGIC)] != MAGIC:
+        raise ValueError("Not a UniMessage binary data")
+    if header[len(MAGIC)] != VERSION:
+        raise ValueError(f"Unsupported UniMessage binary version {header[len(MAGIC)]}")
+
+
+def _dump(message: UniMessage, media_save_dir: str | Path | bool | None) -> list[dict]:
+    return message.dump(False if media_save_dir is True else media_save_dir)  # type: ignore
+
+
+def encode(message: UniMessage, media_save_dir: str | Path | bool | None = False) -> bytes:
+    """将消息编码为二进制数据
+
+    Args:
+        message: 消息
+        media_save_dir: 为 False 或 True 时媒体数据以原始字节存储，否则同 `UniMessage.dump`，保存为文件并存储其路径
+    """
+    buffer = bytearray(MAGIC)
+    buffer.append(VERSION)
+    _encode(buffer, _dump(message, media_save_dir))
+    return bytes(buffer)
+
+
+def decode(data: bytes | bytearray | memoryview) -> list[dict[str, Any]]:
+    """将二进制数据解码为 `UniMessage.load` 可接受的结构"""
+    view = memoryview(data)
+    _check_header(view[: len(MAGIC) + 1].tobytes())
+    value, offset = _decode(view, len(MAGIC) + 1)
+    if offset != len(view):
+        raise ValueError("Trailing data after message")
+    return value
+
+
+class ArchiveWriter:
+    """向归档文件追加消息
+
+    Args:
+        fp: 以二进制追加或写入模式打开的文件
+        media_save_dir: 同 `encode`
+    """
+
+    def __init__(self, fp: IO[bytes], media_save_dir: str | Path | bool | None = False):
+        self.fp = fp
+        self.media_save_dir = media_save_dir
+        if fp.tell() == 0:
+            fp.write(MAGIC + bytes([VERSION]))
+
+    def write(self, message: UniMessage) -> int:
+        """写入一条消息，返回写入的字节数"""
+        payload = bytearray()
+        _encode(payload, _dump(message, self.media_save_dir))
+        record = bytearray()
+        _write_varint(record, len(payload))
+        record += payload
+        return self.fp.write(record)
+
+
+class ArchiveReader:
+    """逐条读取归档文件中的消息
+
+    Args:
+        fp: 以二进制读取模式打开的文件
+    """
+
+    def __init__(self, fp: IO[bytes]):
+        self.fp = fp
+        _check_header(fp.read(len(MAGIC) + 1))
+
+    def _read_size(self) -> int | None:
+        result = 0
+        shift = 0
+        while True:
+            byte = self.fp.read(1)
+            if not byte:
+                if shift:
+                    raise ValueError("Unexpected end of archive")
+                return None
+            result |= (byte[0] & 0x7F) << shift
+            if byte[0] < 0x80:
+                return result
+            shift += 7
+
+    def __iter__(self) -> Iterator[UniMessage]:
+        from .message import UniMessage
+
+        while (size := self._read_size()) is not None:
+            payload = self.fp.read(size)
+            if len(payload) != size:
+                raise ValueError("Unexpected end of archive")
+            value, _ = _decode(memoryview(payload), 0)
+            yield UniMessage.load(value)
@@ -1,8 +1,9 @@
+import asyncio
 import inspect
 from abc import ABCMeta, abstractmethod
 from collections.abc import Awaitable, Sequence
 from types import UnionType
-from typing import Any, Callable, Generic, TypeVar, Union, get_args, get_origin, overload
+from typing import Any, Callable, ClassVar, Generic, TypeVar, Union, get_args, get_origin, overload
 
 from nonebot.adapters import Bot, Event, Message, MessageSegment
 from tarina import lang
@@ -30,6 +31,7 @@ from .target import Target as Target
 TS = TypeVar("TS", bound=Segment)
 TM = TypeVar("TM", bound=Message)
 TMS = TypeVar("TMS", bound=MessageSegment, covariant=True)
+_F = TypeVar("_F", bound=Callable[..., Awaitable[Any]])
 
 
 def merge_text(msg: TM) -> TM:
@@ -59,7 +61,9 @@ async def _auto_fallback(seg: Segment, bot: Bot | None):
         if seg.url:
             return [Text(f"[{seg.type}]{seg.url} ")]
         if seg.__class__.to_url and seg.raw:
-            url = await seg.__class__.to_url(seg.raw, bot, None if seg.name == seg.__default_name__ else seg.name)
+            url = await seg.__class__.to_url(
+                seg.raw_source, bot, None if seg.name == seg.__default_name__ else seg.name
+            )
             return [Text(f"[{seg.type}]{url} ")]
         if seg.__class__.to_url and seg.path:
             url = await seg.__class__.to_url(seg.path, bot, None if seg.name == seg.__default_name__ else seg.name)
@@ -131,19 +135,42 @@ def export(
 ) -> Callable[[Any, TS, Bot | None], Awaitable[TMS | list[TMS]]]: ...
 
 
+@overload
+def export(*, concurrent: bool = False) -> Callable[[_F], _F]: ...
+
+
 def export(  # type: ignore
     func: (
         Callable[[Any, Segment, Bot | None], Awaitable[TMS]]
         | Callable[[Any, Segment, Bot | None], Awaitable[list[TMS]]]
         | Callable[[Any, Segment, Bot | None], Awaitable[TMS | list[TMS]]]
-    ),
+        | None
+    ) = None,
+    *,
+    concurrent: bool = False,
 ):
-    sig = inspect.signature(func)
-    func.__export_target__ = sig.parameters["seg"].annotation
-    return func
+    """标记消息段的导出方法
+
+    参数:
+        concurrent: 该方法是否可与同一消息内其他消息段的导出并发执行 (例如导出时需要上传媒体文件)
+    """
+
+    def wrapper(func):
+        sig = inspect.signature(func)
+        func.__export_target__ = sig.parameters["seg"].annotation
+        func.__export_concurrent__ = concurrent
+        return func
+
+    if func is None:
+        return wrapper
+    return wrapper(func)
 
 
 class MessageExporter(Generic[TM], metaclass=ABCMeta):
+    concurrency: ClassVar[int] = 4
+    """并发导出消息段时的最大并发数，小于 2 时关闭并发导出"""
+
+    _concurrent: set[type[Segment]]
     _mapping: dict[
         type[Segment],
         Callable[[Segment, Bot | None], Awaitable[MessageSegment]]
@@ -166,70 +193,102 @@ class MessageExporter(Generic[TM], metaclass=ABCMeta):
 
     def __init__(self):
         self._mapping = {}
+        self._concurrent = set()
         for attr in self.__class__.__dict__.values():
             if callable(attr) and hasattr(attr, "__export_target__"):
                 method = getattr(self, attr.__name__)
                 target = attr.__export_target__
-                if get_origin(target) in (Union, UnionType):
-                    for t in get_args(target):
-                        self._mapping[t] = method
-                else:
-                    self._mapping[target] = method
+                targets = get_args(target) if get_origin(target) in (Union, UnionType) else (target,)
+                for t in targets:
+                    self._mapping[t] = method
+                    if getattr(attr, "__export_concurrent__", False):
+                        self._concurrent.add(t)
 
     async def export(self, source: Sequence[Segment], bot: Bot | None, fallback: bool | FallbackStrategy):
         msg_type = self.get_message_type()
         message = msg_type([])
+        if self.concurrency > 1 and sum(seg.__class__ in self._concurrent for seg in source) > 1:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def _export_limited(seg: Segment):
+                async with semaphore:
+                    return await self._export_segment(seg, bot, fallback, msg_type)
+
+            # 可并发的消息段先行开始导出，其余消息段依次导出，最后按原顺序拼接
+            tasks = {
+                index: asyncio.ensure_future(_export_limited(seg))
+                for index, seg in enumerate(source)
+                if seg.__class__ in self._concurrent
+            }
+            try:
+                parts = [
+                    tasks[index] if index in tasks else await self._export_segment(seg, bot, fallback, msg_type)
+                    for index, seg in enumerate(source)
+                ]
+                for part in parts:
+                    message.extend(await part if isinstance(part, asyncio.Future) else part)
+            finally:
+                for task in tasks.values():
+                    task.cancel()
+            return merge_text(message)
         for seg in source:
-            seg_type = seg.__class__
-            if seg_type in self._mapping:
-                try:
-                    res = await self._mapping[seg_type](seg, bot)
-                    if isinstance(res, list):
-                        message.extend(res)
-                    else:
-                        message.append(res)
-                    continue
-                except (SerializeFailed, NotImplementedError):
-                    pass
-            if res := await custom.export(self, seg, bot, fallback):  # type: ignore
+            message.extend(await self._export_segment(seg, bot, fallback, msg_type))
+        return merge_text(message)
+
+    async def _export_segment(
+        self, seg: Segment, bot: Bot | None, fallback: bool | FallbackStrategy, msg_type: type[TM]
+    ) -> TM:
+        message = msg_type([])
+        seg_type = seg.__class__
+        if seg_type in self._mapping:
+            try:
+                res = await self._mapping[seg_type](seg, bot)
+            except (SerializeFailed, NotImplementedError):
+                pass
+            else:
                 if isinstance(res, list):
                     message.extend(res)
                 else:
                     message.append(res)
-                continue
-            if isinstance(seg, Other):
-                message.append(seg.origin)  # type: ignore
-            elif bot and bot.adapter.get_name() == SupportAdapter.nonebug:
+                return message
+        if res := await custom.export(self, seg, bot, fallback):  # type: ignore
+            if isinstance(res, list):
+                message.extend(res)
+            else:
+                message.append(res)
+            return message
+        if isinstance(seg, Other):
+            message.append(seg.origin)  # type: ignore
+        elif bot and bot.adapter.get_name() == SupportAdapter.nonebug:
+            message += str(seg)
+        elif isinstance(fallback, FallbackStrategy) and fallback != FallbackStrategy.forbid:
+            if fallback == FallbackStrategy.ignore:
+                return message
+            if fallback == FallbackStrategy.to_text:
                 message += str(seg)
-            elif isinstance(fallback, FallbackStrategy) and fallback != FallbackStrategy.forbid:
-                if fallback == FallbackStrategy.ignore:
-                    continue
-                if fallback == FallbackStrategy.to_text:
-                    message += str(seg)
-                elif fallback == FallbackStrategy.rollback and seg.children:
-                    if isinstance(seg, Reference):
-                        for node in seg.children:
-                            if isinstance(node, CustomNode):
-                                if isinstance(node.content, str):
-                                    message.append(msg_type(node.content))
-                                else:
-                                    message.extend(await self.export(node.content, bot, FallbackStrategy.auto))
+            elif fallback == FallbackStrategy.rollback and seg.children:
+                if isinstance(seg, Reference):
+                    for node in seg.children:
+                        if isinstance(node, CustomNode):
+                            if isinstance(node.content, str):
+                                message.append(msg_type(node.content))
                             else:
-                                message += f"> msg:{node.id}\n"
-                    else:
-                        message.extend(await self.export(seg.children, bot, fallback))
+                                message.extend(await self.export(node.content, bot, FallbackStrategy.auto))
+                        else:
+                            message += f"> msg:{node.id}\n"
                 else:
-                    message.extend(await self.export((await _auto_fallback(seg, bot)), bot, FallbackStrategy.auto))
-            elif fallback is True:
-                message.extend(await self.export((await _auto_fallback(seg, bot)), bot, FallbackStrategy.auto))
+                    message.extend(await self.export(seg.children, bot, fallback))
             else:
-                raise SerializeFailed(
-                    lang.require("nbp-uniseg", "failed").format(
-                        target=seg, adapter=bot.adapter.get_name() if bot else "Unknown"
-                    )
+                message.extend(await self.export((await _auto_fallback(seg, bot)), bot, FallbackStrategy.auto))
+        elif fallback is True:
+            message.extend(await self.export((await _auto_fallback(seg, bot)), bot, FallbackStrategy.auto))
+        else:
+            raise SerializeFailed(
+                lang.require("nbp-uniseg", "failed").format(
+                    target=seg, adapter=bot.adapter.get_name() if bot else "Unknown"
                 )
-
-        return merge_text(message)
+            )
+        return message
 
     @abstractmethod
     async def send_to(self, target: Target | Event, bot: Bot, message: Message, **kwargs):
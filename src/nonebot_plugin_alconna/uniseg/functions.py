@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NamedTuple
 
 from nonebot.adapters import Bot, Event
 from nonebot.internal.matcher import current_bot, current_event
@@ -136,3 +136,61 @@ def get_target(event: Event | None = None, bot: Bot | None = None, adapter: str
     if fn := alter_get_exporter(adapter):
         return fn.get_target(event, bot)
     raise SerializeFailed(lang.require("nbp-uniseg", "unsupported").format(adapter=adapter))
+
+
+class MessageCacheInfo(NamedTuple):
+    hits: int
+    """直接复用已转换消息的次数"""
+    misses: int
+    """实际调用适配器转换消息的次数"""
+
+
+_message_cache_stats = [0, 0]
+
+
+def message_cache_info() -> MessageCacheInfo:
+    """获取事件消息转换缓存的命中情况"""
+    return MessageCacheInfo(*_message_cache_stats)
+
+
+def message_cache_clear() -> None:
+    """重置事件消息转换缓存的命中计数"""
+    _message_cache_stats[0] = _message_cache_stats[1] = 0
+
+
+async def get_event_message(
+    event: Event, bot: Bot, origin: bool = False, reply: bool = False, cache: bool = True
+) -> UniMessage:
+    """获取事件消息对应的通用消息
+
+    转换结果缓存在事件对象上，同一事件下的规则、依赖注入等共享同一次转换。返回的消息为共享对象，修改前请先复制。
+
+    参数:
+        event: 事件
+        bot: 事件对应的 Bot
+        origin: 是否使用未经 to_me 等处理过的消息; 事件没有原始消息时与 `origin=False` 等价
+        reply: 是否在消息开头附加回复消息段
+        cache: 是否使用缓存
+    """
+    from .message import UniMessage
+
+    origin = origin and getattr(event, "original_message", None) is not None
+    if not cache:
+        _message_cache_stats[1] += 1
+        msg = UniMessage.of(event.original_message if origin else event.get_message(), bot=bot)  # type: ignore
+        return await msg.attach_reply(event, bot) if reply else msg
+    store: dict[tuple[bool, bool], UniMessage] | None = getattr(event, "__uniseg_message_cache__", None)
+    if store is None:
+        store = {}
+        setattr(event, "__uniseg_message_cache__", store)
+    if (msg := store.get((origin, reply))) is not None:
+        _message_cache_stats[0] += 1
+        return msg
+    if reply:
+        base = await get_event_message(event, bot, origin)
+        msg = store[(origin, True)] = await base[:].attach_reply(event, bot)
+        return msg
+    _message_cache_stats[1] += 1
+    msg = UniMessage.of(event.original_message if origin else event.get_message(), bot=bot)  # type: ignore
+    store[(origin, False)] = msg
+    return msg
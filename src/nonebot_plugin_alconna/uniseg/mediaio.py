@@ -0,0 +1,186 @@
+import asyncio
+import contextlib
+import hashlib
+import mmap
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, TypeVar
+from uuid import uuid4
+
+T = TypeVar("T")
+
+
+def write_atomic(path: Path, data: bytes | memoryview) -> Path:
+    """先写入同目录下的临时文件再重命名，避免读者看到写了一半的文件"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.parent / f".{path.name}.{uuid4().hex}.tmp"
+    # 不使用 mkstemp (权限固定为 0600)，以 0o666 创建使权限由 umask 决定，与直接写入文件时一致
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        temp.replace(path)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+    return path
+
+
+class MediaPayload:
+    """惰性媒体数据
+
+    可由文件路径、memoryview 或 bytes 提供。由文件提供时不会读入内存，
+    仅在需要完整内容时以只读 mmap 映射文件；哈希、类型识别与写入均通过 `view` 进行，不复制数据。
+
+    Args:
+        source: 文件路径，或 bytes、bytearray、memoryview 等支持缓冲区协议的对象
+    """
+
+    __slots__ = ("_mmap", "_source", "path")
+
+    def __init__(self, source: str | Path | bytes | bytearray | memoryview):
+        self._mmap: mmap.mmap | None = None
+        if isinstance(source, (str, Path)):
+            self.path: Path | None = Path(source)
+            self._source = None
+        else:
+            self.path = None
+            self._source = source
+
+    @classmethod
+    def from_path(cls, path: str | Path):
+        return cls(path)
+
+    def view(self) -> memoryview:
+        """获取数据的只读视图；由文件提供时按需映射文件"""
+        if self._source is not None:
+            return memoryview(self._source)
+        if self._mmap is None:
+            with self.path.open("rb") as f:  # type: ignore
+                if os.fstat(f.fileno()).st_size == 0:
+                    return memoryview(b"")
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)
+
+    def header(self, size: int = 128) -> bytes:
+        """读取开头的若干字节，用于识别文件类型"""
+        if self._source is None and self._mmap is None:
+            with self.path.open("rb") as f:  # type: ignore
+                return f.read(size)
+        with self.view() as view:
+            return view[:size].tobytes()
+
+    def tobytes(self) -> bytes:
+        """获取完整内容；由 bytes 提供时直接返回原对象"""
+        if isinstance(self._source, bytes):
+            return self._source
+        if self._source is None and self._mmap is None:
+            return self.path.read_bytes()  # type: ignore
+        with self.view() as view:
+            return view.tobytes()
+
+    def md5(self) -> str:
+        with self.view() as view:
+            return hashlib.md5(view).hexdigest()
+
+    def close(self):
+        """解除文件映射；之后仍可再次读取"""
+        if self._mmap is not None:
+            with contextlib.suppress(BufferError):
+                self._mmap.close()
+                self._mmap = None
+
+    def __len__(self):
+        if self._source is not None:
+            return memoryview(self._source).nbytes
+        if self._mmap is not None:
+            return len(self._mmap)
+        return self.path.stat().st_size  # type: ignore
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __eq__(self, other):
+        if not isinstance(other, MediaPayload):
+            return NotImplemented
+        if self.path is not None or other.path is not None:
+            return self.path == other.path
+        return self.view() == other.view()
+
+    def __hash__(self):
+        return hash(self.path) if self.path is not None else hash(self.md5())
+
+    def __repr__(self):
+        if self.path is not None:
+            return f"MediaPayload(path={str(self.path)!r})"
+        return f"MediaPayload(size={len(self)})"
+
+
+class MediaIO:
+    """基于有界线程池的媒体文件读写
+
+    哈希、读取与写入等阻塞操作在线程池中执行，避免大文件阻塞事件循环。
+
+    Args:
+        workers: 线程池大小
+    """
+
+    def __init__(self, workers: int = 4):
+        self.workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        self.pending = 0
+        self.max_pending = 0
+        self.completed = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="alconna-media")
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """在线程池中执行阻塞函数，并记录排队深度与耗时"""
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, partial(func, *args, **kwargs))
+        finally:
+            latency = time.perf_counter() - start
+            self.pending -= 1
+            self.completed += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    async def read(self, path: str | Path) -> bytes:
+        return await self.run(Path(path).read_bytes)
+
+    async def write(self, path: str | Path, data: bytes) -> Path:
+        return await self.run(write_atomic, Path(path), data)
+
+    async def md5(self, data: bytes) -> str:
+        return await self.run(lambda: hashlib.md5(data).hexdigest())
+
+    def metrics(self) -> dict[str, float]:
+        """当前排队中的任务数、历史最大排队数、已完成数及平均/最大耗时 (毫秒)"""
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "avg_latency_ms": self.total_latency / self.completed * 1000 if self.completed else 0.0,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+media_io = MediaIO()
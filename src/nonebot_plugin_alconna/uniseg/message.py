@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
+import re
+import tempfile
 from collections.abc import Iterable, Sequence
-from copy import deepcopy
 from io import BytesIO
 from json import dumps, loads
 from pathlib import Path
@@ -12,7 +14,7 @@ from typing_extensions import Self, SupportsIndex, deprecated
 from nonebot import get_driver
 from nonebot.exception import FinishedException
 from nonebot.internal.adapter import Bot, Event, Message
-from nonebot.internal.driver import HTTPClientMixin, Request
+from nonebot.internal.driver import HTTPClientMixin, HTTPClientSession, Request
 from nonebot.internal.matcher import current_bot, current_event
 from tarina import lang
 from tarina.context import ContextModel
@@ -20,9 +22,10 @@ from tarina.lang.model import LangItem
 
 from .adapters import alter_get_builder, alter_get_exporter
 from .constraint import SerializeFailed
+from .exporter import MessageExporter
 from .fallback import FallbackMessage, FallbackStrategy
 from .functions import get_message_id, get_target
-from .receipt import Receipt
+from .receipt import BroadcastResult, Receipt
 from .segment import (
     At,
     AtAll,
@@ -47,11 +50,22 @@ from .segment import (
 )
 from .target import Target
 from .template import UniMessageTemplate
+from .tools import TokenBucket
 
 TS = TypeVar("TS", bound=Segment)
 _TM = TypeVar("_TM", bound="str | Message | UniMessage")
 
 
+def _safe_suffix(name: str) -> str:
+    """取文件名中仅由字母与数字组成的扩展名，用作临时文件的后缀"""
+    suffix = Path(name).suffix
+    return suffix if re.fullmatch(r"\.[A-Za-z0-9]{1,16}", suffix) else ""
+
+
+async def _single(content: str | bytes | None):
+    yield content
+
+
 class _method:
     def __init__(self, func: FunctionType):
         self.__func__ = func
@@ -642,8 +656,13 @@ class UniMessage(list[TS]):
         return ret  # type: ignore
 
     def copy(self) -> UniMessage[TS]:
-        """深拷贝消息"""
-        return deepcopy(self)
+        """拷贝消息
+
+        各消息段通过 `Segment.clone` 结构化复制，`origin`、媒体数据等负载与原消息共享
+        """
+        result = self.__class__()
+        result.extend(seg.clone() for seg in self)
+        return result
 
     def include(self, *types: type[Segment]):
         """过滤消息
@@ -712,22 +731,20 @@ class UniMessage(list[TS]):
 
     @staticmethod
     def _visit_sync(seg: Segment, rules: dict | Callable[[Segment], Any]):
-        _type, data, children = seg.type, seg.data, seg.children
         if not isinstance(rules, dict):
             return rules(seg)
-        result = rules.get(_type, True)
+        result = rules.get(seg.type, True)
         if not isinstance(result, (bool, Segment, Iterable)):
-            result = result(data, children)
+            result = result(seg.data, seg.children)
         return result
 
     @staticmethod
     async def _visit_async(seg: Segment, rules: dict | Callable[[Segment], Any]):
-        _type, data, children = seg.type, seg.data, seg.children
         if not isinstance(rules, dict):
             return await rules(seg)
-        result = rules.get(_type, True)
+        result = rules.get(seg.type, True)
         if not isinstance(result, (bool, Segment, Iterable)):
-            result = await result(data, children)
+            result = await result(seg.data, seg.children)
         return result
 
     def transform(self, rules: dict) -> UniMessage:
@@ -1135,6 +1152,71 @@ class UniMessage(list[TS]):
         res = await fn.send_to(target, bot, msg, **kwargs)
         return Receipt(bot, target, fn, res if isinstance(res, list) else [res], UniMessage)  # type: ignore
 
+    async def broadcast(
+        self,
+        targets: Iterable[Target],
+        fallback: bool | FallbackStrategy = FallbackStrategy.auto,
+        concurrency: int = 8,
+        rate: float | None = None,
+        burst: int = 1,
+        **kwargs,
+    ) -> BroadcastResult:
+        """向多个目标群发消息
+
+        目标按所选 Bot 分组，每个 Bot 只转换一次消息，随后以有限并发发送
+
+        Args:
+            targets: 发送目标
+            fallback: 回退策略
+            concurrency: 同时进行的发送数量上限
+            rate: 每个 Bot 每秒的发送数量上限，为 None 时不限速
+            burst: 每个 Bot 允许的突发发送数量
+        Returns:
+            BroadcastResult: 成功的回执与失败的目标
+        """
+        targets = list(targets)
+        result = BroadcastResult()
+        bots = await asyncio.gather(*(target.select() for target in targets), return_exceptions=True)
+        groups: dict[str, tuple[Bot, list[Target]]] = {}
+        for target, bot in zip(targets, bots, strict=True):
+            if isinstance(bot, BaseException):
+                if not isinstance(bot, Exception):
+                    # 取消等非普通异常不视为发送失败
+                    raise bot
+                result.failures.append((target, bot))
+            elif isinstance(bot, Bot):
+                groups.setdefault(bot.self_id, (bot, []))[1].append(target)
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def _send(bot: Bot, fn: MessageExporter, msg: Message, target: Target, bucket: TokenBucket | None):
+            # 先等待该 Bot 的令牌再占用全局并发名额，避免被限速的 Bot 阻塞其他 Bot 的发送
+            if bucket:
+                await bucket.acquire()
+            async with semaphore:
+                try:
+                    res = await fn.send_to(target, bot, msg.copy(), **kwargs)
+                except Exception as e:
+                    result.failures.append((target, e))
+                else:
+                    result.receipts.append(
+                        Receipt(bot, target, fn, res if isinstance(res, list) else [res], UniMessage)  # type: ignore
+                    )
+
+        async def _group(bot: Bot, group: list[Target]):
+            adapter_name = bot.adapter.get_name()
+            try:
+                if not (fn := alter_get_exporter(adapter_name)):
+                    raise SerializeFailed(lang.require("nbp-uniseg", "unsupported").format(adapter=adapter_name))
+                msg = await self.export(bot, fallback)
+            except Exception as e:
+                result.failures.extend((target, e) for target in group)
+                return
+            bucket = TokenBucket(rate, burst) if rate else None
+            await asyncio.gather(*(_send(bot, fn, msg, target, bucket) for target in group))
+
+        await asyncio.gather(*(_group(bot, group) for bot, group in groups.values()))
+        return result
+
     async def finish(
         self,
         target: Event | Target | None = None,
@@ -1166,6 +1248,22 @@ class UniMessage(list[TS]):
         result = [seg.dump(media_save_dir=media_save_dir) for seg in self]
         return dumps(result, ensure_ascii=False) if json else result
 
+    async def dump_async(
+        self, media_save_dir: str | Path | bool | None = None, json: bool = False
+    ) -> str | list[dict[str, Any]]:
+        """将消息序列化为 JSON 格式，需要保存的媒体文件会在线程池中并发写入
+
+        参数与返回值同 `UniMessage.dump`
+        """
+        if media_save_dir is True or media_save_dir is False:
+            return self.dump(media_save_dir, json)
+        msg = self.copy()
+        medias = [media for media in msg.select(Media) if media.raw and not media.url and not media.path]
+        paths = await asyncio.gather(*(media.save_async(media_save_dir) for media in medias))
+        for media, path in zip(medias, paths, strict=True):
+            media.path = str(path.resolve().as_posix())
+        return msg.dump(media_save_dir, json)
+
     @classmethod
     def load(cls: type[UniMessage[Segment]], data: str | list[dict[str, Any]]):
         """从 JSON 数据加载消息
@@ -1182,28 +1280,122 @@ class UniMessage(list[TS]):
             _data = data
         return cls(get_segment_class(seg_data["type"]).load(seg_data) for seg_data in _data)
 
-    async def download(self, stream: bool = False, **kwargs):
+    def dump_bytes(self, media_save_dir: str | Path | bool | None = False) -> bytes:
+        """将消息序列化为紧凑的二进制格式，媒体数据以原始字节存储
+
+        Args:
+            media_save_dir (Union[str, Path, bool, None], optional): 若不为 True/False，则同 `dump` 保存媒体文件并仅存储路径. Defaults to False.
+        """
+        from .codec import encode
+
+        return encode(self, media_save_dir)
+
+    @classmethod
+    def load_bytes(cls: type[UniMessage[Segment]], data: bytes | bytearray | memoryview):
+        """从 `dump_bytes` 得到的二进制数据加载消息"""
+        from .codec import decode
+
+        return cls.load(decode(data))
+
+    async def download(
+        self,
+        stream: bool = False,
+        *,
+        concurrency: int = 4,
+        max_size: int | None = None,
+        max_total: int | None = None,
+        spool_threshold: int | None = None,
+        spool_dir: str | Path | None = None,
+        **kwargs,
+    ):
         """将消息中的媒体链接下载为文件数据
 
+        所有媒体共用同一个会话并发下载。超过 `spool_threshold` 的媒体会写入临时文件并设置 `Media.path`，
+        而非保存在内存中的 `Media.raw`；临时文件需由调用方自行清理。
+
         Args:
             stream (bool, optional): 是否以流式下载. Defaults to False.
+            concurrency (int, optional): 同时下载的媒体数量上限. Defaults to 4.
+            max_size (int | None, optional): 单个媒体的大小上限 (字节)，超出时抛出 ValueError. Defaults to None.
+            max_total (int | None, optional): 整条消息的媒体总大小上限 (字节)，超出时抛出 ValueError. Defaults to None.
+            spool_threshold (int | None, optional): 媒体大小超过该值时写入临时文件，为 None 时始终保存在内存中. Defaults to None.
+            spool_dir (str | Path | None, optional): 临时文件所在目录，为 None 时使用系统临时目录. Defaults to None.
             **kwargs: 传递给下载器的参数
         """
+        medias = [media for media in self.select(Media) if media.url]
+        if not medias:
+            return self
         driver = get_driver()
-        for media in self.select(Media):
-            if not media.url:
-                continue
-            if not isinstance(driver, HTTPClientMixin):
-                raise TypeError("Current driver does not support http client")
-            request = Request("GET", media.url)
-            sess = driver.get_session(**kwargs)
-            raw = b""
-            if stream:
-                async for chunk in sess.stream_request(request):
-                    raw += chunk.content  # type: ignore
-            else:
-                response = await sess.request(request)
-                raw = response.content  # type: ignore
+        if not isinstance(driver, HTTPClientMixin):
+            raise TypeError("Current driver does not support http client")
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        total = 0
+
+        def _consume(size: int, url: str):
+            nonlocal total
+            total += size
+            if max_total is not None and total > max_total:
+                raise ValueError(f"media in message exceeds {max_total} bytes when downloading {url}")
+
+        async def _download(media: Media, sess: HTTPClientSession) -> bytes | Path:
+            url: str = media.url  # type: ignore
+            # 非流式下载时只有一块数据，直接使用响应内容而不复制
+            parts: list[bytes] = []
+            size = 0
+            file = None
+            try:
+                async with semaphore:
+                    if stream:
+                        chunks = (chunk.content async for chunk in sess.stream_request(Request("GET", url)))
+                    else:
+                        chunks = _single((await sess.request(Request("GET", url))).content)
+                    async for content in chunks:
+                        if not content:
+                            continue
+                        data = content.encode() if isinstance(content, str) else content
+                        size += len(data)
+                        if max_size is not None and size > max_size:
+                            raise ValueError(f"media {url} exceeds {max_size} bytes")
+                        _consume(len(data), url)
+                        if file is None and spool_threshold is not None and size > spool_threshold:
+                            file = tempfile.NamedTemporaryFile(  # noqa: SIM115
+                                dir=spool_dir, prefix="alconna-", suffix=_safe_suffix(media.name), delete=False
+                            )
+                            file.writelines(parts)
+                            parts.clear()
+                        if file is not None:
+                            file.write(data)
+                        else:
+                            parts.append(data)
+            except BaseException:
+                if file is not None:
+                    file.close()
+                    Path(file.name).unlink(missing_ok=True)
+                raise
+            if file is not None:
+                file.close()
+                return Path(file.name)
+            return parts[0] if len(parts) == 1 else b"".join(parts)
+
+        async with driver.get_session(**kwargs) as sess:
+            tasks = [asyncio.create_task(_download(media, sess)) for media in medias]
+            try:
+                results = await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                # 任一媒体下载失败时消息保持不变，删除已完成的媒体写入的临时文件
+                for task in tasks:
+                    if not task.cancelled() and task.exception() is None and isinstance(path := task.result(), Path):
+                        path.unlink(missing_ok=True)
+                raise
+        for media, result in zip(medias, results):
             media.url = None
-            media.raw = raw
+            if isinstance(result, Path):
+                media.path = result
+                media.raw = None
+            else:
+                media.raw = result
+            media._fingerprint_ = None
         return self
@@ -9,7 +9,7 @@ from tarina.context import ContextModel
 from tarina.lang.model import LangItem
 
 from .fallback import FallbackStrategy
-from .receipt import Receipt
+from .receipt import BroadcastResult, Receipt
 from .segment import (
     At,
     AtAll,
@@ -397,6 +397,15 @@ class UniMessage(list[_TS]):
         no_wrapper: bool = False,
         **kwargs,
     ) -> Receipt: ...
+    async def broadcast(
+        self,
+        targets: Iterable[Target],
+        fallback: bool | FallbackStrategy = ...,
+        concurrency: int = 8,
+        rate: float | None = None,
+        burst: int = 1,
+        **kwargs,
+    ) -> BroadcastResult: ...
     async def finish(
         self,
         target: Event | Target | None = None,
@@ -410,6 +419,23 @@ class UniMessage(list[_TS]):
     def dump(self, media_save_dir: str | Path | bool | None = None) -> list[dict]: ...
     @overload
     def dump(self, media_save_dir: str | Path | bool | None = None, json: Literal[True] = True) -> str: ...
+    @overload
+    async def dump_async(self, media_save_dir: str | Path | bool | None = None) -> list[dict]: ...
+    @overload
+    async def dump_async(self, media_save_dir: str | Path | bool | None = None, json: Literal[True] = True) -> str: ...
     @classmethod
     def load(cls: type[UniMessage[Segment]], data: str | list[dict[str, Any]]): ...
-    async def download(self, stream: bool = False, **kwargs) -> Self: ...
+    def dump_bytes(self, media_save_dir: str | Path | bool | None = False) -> bytes: ...
+    @classmethod
+    def load_bytes(cls: type[UniMessage[Segment]], data: bytes | bytearray | memoryview) -> UniMessage[Segment]: ...
+    async def download(
+        self,
+        stream: bool = False,
+        *,
+        concurrency: int = 4,
+        max_size: int | None = None,
+        max_total: int | None = None,
+        spool_threshold: int | None = None,
+        spool_dir: str | Path | None = None,
+        **kwargs,
+    ) -> Self: ...
@@ -1,13 +1,13 @@
 from typing import Annotated
 
 from nonebot.exception import SkippedException
-from nonebot.internal.adapter import Bot, Event, Message
+from nonebot.internal.adapter import Bot, Event
 from nonebot.internal.params import Depends
 from nonebot.typing import T_State
 
 from .constraint import UNISEG_MESSAGE, UNISEG_MESSAGE_ID, UNISEG_TARGET
 from .exporter import SerializeFailed, Target
-from .functions import get_message_id, get_target
+from .functions import get_event_message, get_message_id, get_target
 from .message import UniMessage
 from .segment import TS
 
@@ -18,25 +18,19 @@ async def _uni_msg(bot: Bot, event: Event, state: T_State) -> UniMessage:
     if UNISEG_MESSAGE in state:
         return state[UNISEG_MESSAGE]
     try:
-        msg = event.get_message()
+        # 缓存的消息为同一事件的所有响应器共享，需返回副本
+        return (await get_event_message(event, bot))[:]
     except (NotImplementedError, ValueError):
         raise SkippedException from None
-    return UniMessage.of(msg, bot=bot)
 
 
 async def _orig_uni_msg(bot: Bot, event: Event, state: T_State) -> UniMessage:
     if event.get_type() != "message":
         raise SkippedException from None
     try:
-        msg: Message = event.get_message()
+        return (await get_event_message(event, bot, origin=True, reply=True))[:]
     except (NotImplementedError, ValueError):
         raise SkippedException from None
-    try:
-        msg: Message = getattr(event, "original_message", msg)  # type: ignore
-    except (NotImplementedError, ValueError):
-        pass
-    ans = UniMessage.of(msg, bot=bot)
-    return await ans.attach_reply(event=event, bot=bot)
 
 
 def _target(bot: Bot, event: Event, state: T_State) -> Target:
@@ -63,7 +57,8 @@ def MessageTarget() -> Target:
 
 
 def UniversalMessage(origin: bool = False) -> UniMessage:
-    return Depends(_orig_uni_msg, use_cache=True) if origin else Depends(_uni_msg, use_cache=True)
+    # 依赖缓存为同一事件的所有响应器共享；转换结果已缓存在事件上，此处每次返回新的副本
+    return Depends(_orig_uni_msg, use_cache=False) if origin else Depends(_uni_msg, use_cache=False)
 
 
 def MessageId() -> str:
@@ -2,8 +2,8 @@ from __future__ import annotations
 
 import asyncio
 from collections.abc import Iterable
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any, overload
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Literal, overload
 from typing_extensions import Self
 
 from nonebot.compat import custom_validation
@@ -65,6 +65,20 @@ class Receipt:
         except NotImplementedError:
             return None
 
+    def schedule(self, action: Literal["recall", "edit", "reaction", "send"], delay: float, **kwargs: Any) -> str:
+        """在后台调度延时操作，不阻塞当前协程
+
+        Args:
+            action: 操作名称，对应同名方法
+            delay: 延时 (秒)
+            **kwargs: 传递给对应方法的参数 (不含 delay)
+        Returns:
+            任务 id，可通过 `receipt_scheduler.cancel` 取消
+        """
+        from .scheduler import receipt_scheduler
+
+        return receipt_scheduler.schedule(self, action, delay, **kwargs)
+
     async def recall(self, delay: float = 0, index: int | None = None):
         if not self.msg_ids:
             return self
@@ -194,3 +208,17 @@ class Receipt:
         if isinstance(value, cls):
             return value
         raise ValueError(f"Type {type(value)} can not be converted to {cls}")
+
+
+@dataclass
+class BroadcastResult:
+    """群发结果"""
+
+    receipts: list[Receipt] = field(default_factory=list)
+    """发送成功的回执"""
+    failures: list[tuple[Target, Exception]] = field(default_factory=list)
+    """发送失败的目标及其异常"""
+
+    @property
+    def success(self) -> bool:
+        return not self.failures
@@ -1,9 +1,9 @@
-from nonebot.adapters import Bot, Event, Message
+from nonebot.adapters import Bot, Event
 from nonebot.internal.rule import Rule
 from nonebot.params import Depends
 
 from .constraint import SupportScope
-from .functions import get_target
+from .functions import get_event_message, get_target
 from .message import UniMessage
 from .segment import At, Reply, Text
 
@@ -12,14 +12,9 @@ async def _get_message(event: Event, bot: Bot):
     if event.get_type() != "message":
         return None
     try:
-        msg: Message = event.get_message()
+        return (await get_event_message(event, bot, origin=True))[:]
     except (NotImplementedError, ValueError):
         return None
-    try:
-        msg: Message = getattr(event, "original_message", msg)  # type: ignore
-    except (NotImplementedError, ValueError):
-        pass
-    return UniMessage.of(message=msg, bot=bot)
 
 
 class AtInRule:
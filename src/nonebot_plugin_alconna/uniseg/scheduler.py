@@ -0,0 +1,326 @@
+"""回执延时操作的集中调度
+
+所有延时的撤回、编辑、回应与发送由同一个后台任务按截止时间统一执行，
+调度方无需保持协程存活。截止时间按 `resolution` 向上取整，
+同一时刻到期的操作按 Bot 分批并发执行。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import json
+import math
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal
+from uuid import uuid4
+
+from nonebot import get_bots
+from nonebot.internal.adapter import Bot
+
+from .constraint import log
+from .segment import Segment, get_segment_class
+from .target import Target
+
+if TYPE_CHECKING:
+    from .receipt import Receipt
+
+Action = Literal["recall", "edit", "reaction", "send"]
+ACTIONS = ("recall", "edit", "reaction", "send")
+
+
+def _serialize(value: Any) -> Any:
+    from .message import UniMessage
+
+    if isinstance(value, UniMessage):
+        return {"$message": value.dump(True)}
+    if isinstance(value, Segment):
+        return {"$segment": value.dump(media_save_dir=True)}
+    return value
+
+
+def _deserialize(value: Any) -> Any:
+    from .message import UniMessage
+
+    if isinstance(value, dict):
+        if "$message" in value:
+            return UniMessage.load(value["$message"])
+        if "$segment" in value:
+            data = value["$segment"]
+            return get_segment_class(data["type"]).load(data)
+    return value
+
+
+@dataclass
+class ScheduledJob:
+    id: str
+    deadline: float
+    action: Action
+    self_id: str
+    kwargs: dict[str, Any]
+    receipt: Receipt | None = None
+    """为 None 时表示从本地存储恢复，执行时再根据 `data` 重建回执"""
+    data: dict[str, Any] | None = field(default=None, repr=False)
+    """用于本地存储的数据，无法序列化时为 None"""
+
+    def dump(self, receipt: Receipt) -> dict[str, Any] | None:
+        context = receipt.context
+        try:
+            target = context if isinstance(context, Target) else receipt.exporter.get_target(context, receipt.bot)
+            data = {
+                "id": self.id,
+                "deadline": self.deadline,
+                "action": self.action,
+                "adapter": receipt.bot.adapter.get_name(),
+                "self_id": self.self_id,
+                "target": target.dump(),
+                "msg_ids": list(receipt.msg_ids),
+                "kwargs": {key: _serialize(value) for key, value in self.kwargs.items()},
+            }
+            json.dumps(data, ensure_ascii=False)
+        except Exception as e:
+            log("DEBUG", f"scheduled {self.action} of bot:{self.self_id} will not be persisted: {e}")
+            return None
+        return data
+
+    @classmethod
+    def load(cls, data: dict[str, Any]) -> ScheduledJob:
+        return cls(
+            data["id"],
+            data["deadline"],
+            data["action"],
+            data["self_id"],
+            {key: _deserialize(value) for key, value in data["kwargs"].items()},
+            data=data,
+        )
+
+    def restore(self, bot: Bot) -> Receipt | None:
+        from .adapters import alter_get_exporter
+        from .message import UniMessage
+        from .receipt import Receipt
+
+        assert self.data
+        if not (exporter := alter_get_exporter(self.data["adapter"])):
+            return None
+        return Receipt(bot, Target.load(dict(self.data["target"])), exporter, list(self.data["msg_ids"]), UniMessage)
+
+
+class ReceiptScheduler:
+    """回执延时操作调度器
+
+    以最小堆保存待执行的操作，由单个后台任务在最近的截止时间唤醒并执行到期的操作。
+
+    Args:
+        resolution: 截止时间的精度 (秒)，同一精度内到期的操作合并为一批执行
+        concurrency: 每个 Bot 每批操作的最大并发数
+        store: 本地存储文件路径，为 None 时仅保存在内存中
+        flush_interval: 写入本地存储的最小间隔 (秒)
+    """
+
+    def __init__(
+        self,
+        resolution: float = 0.5,
+        concurrency: int = 8,
+        store: Path | None = None,
+        flush_interval: float = 5,
+    ):
+        self.resolution = resolution
+        self.concurrency = concurrency
+        self.store = store
+        self.flush_interval = flush_interval
+        self._jobs: dict[str, ScheduledJob] = {}
+        self._heap: list[tuple[float, int, str]] = []
+        self._counter = itertools.count()
+        self._waiting: dict[str, list[ScheduledJob]] = defaultdict(list)
+        self._running: set[asyncio.Task] = set()
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._dirty = False
+        self._saved = 0.0
+
+    def __len__(self):
+        return len(self._jobs) + sum(len(jobs) for jobs in self._waiting.values())
+
+    def _deadline(self, delay: float) -> float:
+        deadline = time.time() + max(delay, 0)
+        if self.resolution > 0:
+            deadline = math.ceil(deadline / self.resolution) * self.resolution
+        return deadline
+
+    def schedule(self, receipt: Receipt, action: Action, delay: float, **kwargs: Any) -> str:
+        """调度一次延时操作，立即返回任务 id
+
+        Args:
+            receipt: 回执
+            action: 操作名称，对应 `Receipt` 的同名方法
+            delay: 延时 (秒)
+            **kwargs: 传递给对应方法的参数 (不含 delay)
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown receipt action {action!r}")
+        if "message" in kwargs:
+            kwargs["message"] = receipt.uni_factory(kwargs["message"])
+        job = ScheduledJob(uuid4().hex, self._deadline(delay), action, receipt.bot.self_id, kwargs, receipt)
+        if self.store:
+            job.data = job.dump(receipt)
+        self._push(job)
+        self._dirty = self._dirty or job.data is not None
+        return job.id
+
+    def _push(self, job: ScheduledJob):
+        self._jobs[job.id] = job
+        heapq.heappush(self._heap, (job.deadline, next(self._counter), job.id))
+        self._ensure_task()
+        if self._wakeup and self._heap[0][2] == job.id:
+            self._wakeup.set()
+
+    def cancel(self, job_id: str) -> bool:
+        """取消尚未执行的操作，返回是否取消成功"""
+        if job := self._jobs.pop(job_id, None):
+            # 堆中的记录在弹出时跳过，失效记录过多时重建堆
+            if len(self._heap) > 2 * len(self._jobs) + 64:
+                self._heap = [item for item in self._heap if item[2] in self._jobs]
+                heapq.heapify(self._heap)
+        else:
+            for jobs in self._waiting.values():
+                if job := next((item for item in jobs if item.id == job_id), None):
+                    jobs.remove(job)
+                    break
+        if not job:
+            return False
+        self._dirty = self._dirty or job.data is not None
+        return True
+
+    def _ensure_task(self):
+        if self._task and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        assert self._wakeup
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            due: list[ScheduledJob] = []
+            while self._heap and self._heap[0][0] <= now:
+                _, _, job_id = heapq.heappop(self._heap)
+                if job := self._jobs.pop(job_id, None):
+                    due.append(job)
+            try:
+                if due:
+                    self._dispatch(due)
+            except Exception as e:
+                log("ERROR", f"dispatch scheduled receipt actions failed: {e!r}")
+            if self._dirty and now - self._saved >= self.flush_interval:
+                try:
+                    self.save()
+                except Exception as e:
+                    # 保留未写入的标记，间隔到达后重试
+                    self._dirty = True
+                    log("ERROR", f"save scheduled receipt actions failed: {e!r}")
+            timeout = self._heap[0][0] - now if self._heap else None
+            if self._dirty:
+                timeout = min(timeout, self.flush_interval) if timeout is not None else self.flush_interval
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+
+    def _dispatch(self, due: list[ScheduledJob]):
+        batches: dict[str, list[tuple[ScheduledJob, Receipt]]] = defaultdict(list)
+        try:
+            bots = get_bots()
+        except Exception as e:
+            log("ERROR", f"get bots for scheduled receipt actions failed: {e!r}")
+            bots = {}
+        for job in due:
+            if job.data is not None:
+                self._dirty = True
+            if job.receipt is not None:
+                batches[job.self_id].append((job, job.receipt))
+                continue
+            if not (bot := bots.get(job.self_id)):
+                # 恢复的操作所属的 Bot 尚未连接，连接后再执行
+                self._waiting[job.self_id].append(job)
+                continue
+            try:
+                receipt = job.restore(bot)
+            except Exception as e:
+                log("ERROR", f"restore scheduled {job.action} of bot:{job.self_id} failed, dropped: {e!r}")
+                continue
+            if receipt:
+                batches[job.self_id].append((job, receipt))
+            else:
+                # 对应适配器的导出器尚不可用，Bot 重新连接后再尝试
+                self._waiting[job.self_id].append(job)
+        for self_id, batch in batches.items():
+            task = asyncio.create_task(self._execute(self_id, batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, self_id: str, batch: list[tuple[ScheduledJob, Receipt]]):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(job: ScheduledJob, receipt: Receipt):
+            async with semaphore:
+                try:
+                    await getattr(receipt, job.action)(**job.kwargs)
+                except Exception as e:
+                    log("ERROR", f"scheduled {job.action} of bot:{self_id} failed: {e!r}")
+
+        log("TRACE", f"execute {len(batch)} scheduled actions of bot:{self_id}")
+        await asyncio.gather(*(run(job, receipt) for job, receipt in batch))
+
+    def resume(self, bot: Bot):
+        """Bot 连接后执行其等待中的操作"""
+        if jobs := self._waiting.pop(bot.self_id, None):
+            self._dispatch(jobs)
+
+    def save(self):
+        self._dirty = False
+        self._saved = time.time()
+        if not self.store:
+            return
+        jobs = itertools.chain(self._jobs.values(), *self._waiting.values())
+        data = [job.data for job in jobs if job.data is not None]
+        self.store.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.store.with_suffix(".tmp")
+        temp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        temp.replace(self.store)
+
+    def load(self):
+        """从本地存储文件恢复尚未执行的操作，已过期的操作会尽快执行"""
+        if not self.store or not self.store.exists():
+            return
+        try:
+            data: list[dict[str, Any]] = json.loads(self.store.read_text(encoding="utf-8"))
+        except Exception as e:
+            log("WARNING", f"load scheduled receipt actions failed: {e}")
+            return
+        for item in data:
+            try:
+                job = ScheduledJob.load(item)
+            except Exception as e:
+                log("WARNING", f"skip malformed scheduled receipt action {item!r}: {e!r}")
+                continue
+            if job.id not in self._jobs:
+                self._push(job)
+
+    async def stop(self):
+        """停止后台任务并保存尚未执行的操作"""
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        if self.store:
+            self.save()
+
+
+receipt_scheduler = ReceiptScheduler()
@@ -4,13 +4,18 @@ import base64
 import contextlib
 import hashlib
 import importlib
+import inspect
 import json
+import operator
 import re
+from bisect import bisect_left, bisect_right
 from collections.abc import Awaitable, Iterable
+from copy import copy, deepcopy
 from dataclasses import InitVar, asdict, dataclass, field, fields
 from datetime import datetime
 from functools import lru_cache, reduce
 from io import BytesIO
+from itertools import pairwise
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Callable, ClassVar, Literal, Protocol, TypeVar, Union, overload
 from typing_extensions import Self
@@ -25,6 +30,7 @@ from tarina.lang.model import LangItem
 
 from .constraint import lang
 from .fallback import FallbackStrategy
+from .mediaio import MediaPayload, media_io, write_atomic
 from .utils import fleep
 
 if TYPE_CHECKING:
@@ -37,18 +43,107 @@ TS = TypeVar("TS", bound="Segment")
 TS1 = TypeVar("TS1", bound="Segment")
 
 
+def segment_classes() -> Iterable[type["Segment"]]:
+    """遍历所有消息段类型
+
+    `dataclass(slots=True)` 会重建类，被替换掉的旧类在回收前仍会出现在 `__subclasses__` 中，此处将其跳过
+    """
+    for cls in gen_subclass(Segment):
+        if cls.__module__ == __name__ and globals().get(cls.__qualname__) is not cls:
+            continue
+        yield cls
+
+
+@lru_cache(None)
+def data_fields(cls: type["Segment"]) -> tuple[str, ...]:
+    """消息段类型中作为数据的字段名 (不含 `origin` 与子元素)"""
+    return tuple(f.name for f in fields(cls) if f.name not in ("origin", "_children_", "_fingerprint_"))
+
+
+def _fingerprint_of(value: Any) -> Any:
+    """将字段值转换为可哈希的指纹片段"""
+    if value is None or isinstance(value, (str, int, float, bytes)):
+        return value
+    if isinstance(value, Segment):
+        return value.fingerprint()
+    if isinstance(value, Path):
+        return str(value)
+    if isinstance(value, BytesIO):
+        return value.getvalue()
+    if isinstance(value, MediaPayload):
+        return str(value.path) if value.path else value.md5()
+    if isinstance(value, (list, tuple)):
+        return tuple(_fingerprint_of(item) for item in value)
+    return repr(value)
+
+
 @lru_cache(4096)
 def get_segment_class(name: str) -> type["Segment"]:
-    return next((cls for cls in gen_subclass(Segment) if cls.__name__.lower() == name), Segment)
+    return next((cls for cls in segment_classes() if cls.__name__.lower() == name), Segment)
+
+
+class _NoChildren:
+    """子元素列表尚未创建时的占位对象，与空列表等价"""
+
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return isinstance(other, (list, _NoChildren)) and not other
+
+    def __hash__(self):
+        return 0
+
+    def __bool__(self):
+        return False
+
+    def __len__(self):
+        return 0
+
+    def __iter__(self):
+        return iter(())
+
+    def __repr__(self):
+        return "[]"
+
+
+_NO_CHILDREN = _NoChildren()
 
 
 @custom_validation
-@dataclass
+@dataclass(slots=True)
 class Segment:
     """基类标注"""
 
     origin: MessageSegment | None = field(init=False, hash=False, repr=False, compare=False, default=None)
-    _children: list["Segment"] = field(init=False, default_factory=list, repr=False, hash=False)
+    _children_: list["Segment"] = field(init=False, default=_NO_CHILDREN, repr=False, hash=False)  # type: ignore
+    """子元素列表，首次访问 `_children` 时才会创建"""
+    _fingerprint_: tuple[tuple[Any, ...], int] | None = field(
+        init=False, default=None, repr=False, hash=False, compare=False
+    )
+    """结构指纹缓存，包括计算时各标识字段的值与指纹"""
+
+    __fingerprint_fields__: ClassVar[tuple[str, ...] | None] = None
+    """参与计算结构指纹的标识字段，为 None 时使用全部数据字段"""
+
+    def __init_subclass__(cls, **kwargs):
+        super(Segment, cls).__init_subclass__(**kwargs)
+        if "__slots__" in cls.__dict__:
+            return
+        # 未启用 slots 的子类 (如自定义消息段) 需要类属性作为 `init=False` 字段的默认值
+        annotations = inspect.get_annotations(cls)
+        for name, default in (("origin", None), ("_children_", _NO_CHILDREN), ("_fingerprint_", None)):
+            if name not in annotations and name not in cls.__dict__:
+                setattr(cls, name, default)
+
+    @property
+    def _children(self) -> list["Segment"]:
+        if not isinstance(children := self._children_, list):
+            children = self._children_ = []
+        return children
+
+    @_children.setter
+    def _children(self, value: list["Segment"]):
+        self._children_ = value
 
     def __str__(self):
         return f"[{self.__class__.__name__.lower()}]"
@@ -100,24 +195,55 @@ class Segment:
 
     @property
     def data(self) -> dict[str, Any]:
-        try:
-            res = asdict(self)  # type: ignore
-        except (TypeError, ValueError):
-            res = vars(self)
-        res.pop("origin", None)
-        res.pop("_children", None)
-        return res
+        """消息段的数据字段，字段值不会被复制"""
+        return {name: getattr(self, name) for name in data_fields(self.__class__)}
 
     def __call__(self, *segments: Union[str, "TS"]) -> Self:
         if not segments:
             return self
         self._children.extend(Text(s) if isinstance(s, str) else s for s in segments)
+        self._fingerprint_ = None
         return self
 
     @property
     def children(self):
         return self._children
 
+    def fingerprint(self) -> int:
+        """消息段的结构指纹
+
+        由消息段类型、标识字段 (见 `__fingerprint_fields__`) 与子元素计算，并缓存在消息段上；
+        缓存同时记录各标识字段的值，任一字段被重新赋值后会重新计算。
+        子元素列表可被原地修改，因此含子元素的消息段不做缓存。
+        媒体数据等负载只参与哈希而不会被格式化，因此远比 `repr` 廉价。
+        """
+        names = self.__fingerprint_fields__
+        if names is None:
+            names = data_fields(self.__class__)
+        values = tuple(getattr(self, name) for name in names)
+        if (cached := self._fingerprint_) is not None and all(map(operator.is_, cached[0], values)):
+            return cached[1]
+        value = hash(
+            (
+                self.__class__,
+                *(_fingerprint_of(item) for item in values),
+                *(_fingerprint_of(child) for child in self._children_),
+            )
+        )
+        if not self._children_:
+            self._fingerprint_ = (values, value)
+        return value
+
+    def clone(self) -> Self:
+        """结构化复制消息段
+
+        仅复制子元素列表、样式等可变容器，`origin`、媒体数据等负载与原对象共享
+        """
+        new = copy(self)
+        if isinstance(self._children_, list):
+            new._children_ = [child.clone() for child in self._children_]
+        return new
+
     @classmethod
     def __get_validators__(cls):
         yield cls._validate
@@ -136,8 +262,10 @@ class Segment:
             若不指定 media_save_dir，则会尝试导入 `nonebot_plugin_localstore` 并使用其提供的路径。
             否则，将会尝试使用当前工作目录。
         """
-        data = {f.name: getattr(self, f.name) for f in fields(self) if f.name not in ("origin", "_children")}
-        data = {"type": self.type, **{k: v for k, v in data.items() if v is not None}}
+        data = {"type": self.type}
+        for name in data_fields(self.__class__):
+            if (value := getattr(self, name)) is not None:
+                data[name] = value
         if isinstance(self, Media):
             if self.name == self.__default_name__:
                 data.pop("name", None)
@@ -145,14 +273,15 @@ class Segment:
                 data.pop("raw", None)
                 data.pop("mimetype", None)
             elif media_save_dir is True:
-                data["raw"] = base64.b64encode(self.raw_bytes).decode()
+                with self.raw_view as raw:
+                    data["raw"] = base64.b64encode(raw).decode()
             elif media_save_dir is not False:
                 path = self.save(media_save_dir=media_save_dir)
                 data.pop("raw", None)
                 data.pop("mimetype", None)
                 data["path"] = str(path.resolve().as_posix())
-        if self._children:
-            data["children"] = [child.dump(media_save_dir=media_save_dir) for child in self._children]
+        if self._children_:
+            data["children"] = [child.dump(media_save_dir=media_save_dir) for child in self._children_]
         return data
 
     @classmethod
@@ -235,12 +364,138 @@ STYLE_TYPE_MAP = {
 }
 
 
-@dataclass
+def _dirty(name: str):
+    method = getattr(dict, name)
+
+    def wrapper(self: "_Styles", *args, **kwargs):
+        self.runs = None
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+class _Styles(dict[tuple[int, int], list[str]]):
+    """Text 的样式表
+
+    整理后各区间有序、互不重叠且相邻区间样式不同，`runs` 记录排好序的区间，便于二分查找；
+    通过字典接口直接修改后 `runs` 会失效，下次使用时重新整理
+    """
+
+    __slots__ = ("runs",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.runs: list[tuple[int, int]] | None = None
+
+    __setitem__ = _dirty("__setitem__")
+    __delitem__ = _dirty("__delitem__")
+    __ior__ = _dirty("__ior__")
+    pop = _dirty("pop")
+    popitem = _dirty("popitem")
+    setdefault = _dirty("setdefault")
+    update = _dirty("update")
+    clear = _dirty("clear")
+
+    def normalize(self) -> list[tuple[int, int]]:
+        """整理样式区间，返回有序的区间列表"""
+        if self.runs is not None:
+            return self.runs
+        spans = [(start, end, styles) for (start, end), styles in self.items() if start < end and styles]
+        runs: list[tuple[int, int]] = []
+        values: list[list[str]] = []
+        if spans:
+            points = sorted({p for start, end, _ in spans for p in (start, end)})
+            order = sorted(range(len(spans)), key=lambda i: spans[i][0])
+            active: list[int] = []
+            index = 0
+            for left, right in pairwise(points):
+                while index < len(order) and spans[order[index]][0] <= left:
+                    active.append(order[index])
+                    index += 1
+                active = [i for i in active if spans[i][1] > left]
+                if not active:
+                    continue
+                merged: list[str] = []
+                for i in sorted(active):
+                    merged.extend(sty for sty in spans[i][2] if sty not in merged)
+                if runs and runs[-1][1] == left and values[-1] == merged:
+                    runs[-1] = (runs[-1][0], right)
+                else:
+                    runs.append((left, right))
+                    values.append(merged)
+        dict.clear(self)
+        dict.update(self, zip(runs, values, strict=True))
+        self.runs = runs
+        return runs
+
+    def copy(self) -> "_Styles":
+        new = _Styles(self)
+        if self.runs is not None:
+            new.runs = self.runs[:]
+        return new
+
+    def overlaps(self, start: int, end: int) -> list[tuple[int, int]]:
+        """二分查找与 [start, end) 相交的区间"""
+        runs = self.normalize()
+        lo = bisect_right(runs, start, key=lambda x: x[1])
+        hi = bisect_left(runs, end, lo, key=lambda x: x[0])
+        return runs[lo:hi]
+
+    def insert(self, start: int, end: int, styles: list[str]):
+        """为 [start, end) 添加样式，并与相邻的同样式区间合并"""
+        runs = self.normalize()
+        lo = bisect_right(runs, start, key=lambda x: x[1])
+        hi = bisect_left(runs, end, lo, key=lambda x: x[0])
+        # 连同左右相邻的区间一起重建，以便合并样式相同的区间
+        lo = max(lo - 1, 0)
+        hi = min(hi + 1, len(runs))
+        pieces: list[tuple[tuple[int, int], list[str]]] = []
+
+        def push(scale: tuple[int, int], value: list[str]):
+            if pieces and pieces[-1][0][1] == scale[0] and pieces[-1][1] == value:
+                pieces[-1] = ((pieces[-1][0][0], scale[1]), value)
+            else:
+                pieces.append((scale, value))
+
+        pos = start
+        for scale in runs[lo:hi]:
+            value = dict.pop(self, scale)
+            left, right = scale
+            if right <= start or left >= end:
+                if left >= end and pos < end:
+                    push((pos, end), styles[:])
+                    pos = end
+                push(scale, value)
+                continue
+            if left < start:
+                push((left, start), value)
+            elif pos < left:
+                push((pos, left), styles[:])
+            push((max(left, start), min(right, end)), value + [sty for sty in styles if sty not in value])
+            if right > end:
+                push((end, right), value)
+            pos = min(right, end)
+        if pos < end:
+            push((pos, end), styles[:])
+        tail = hi == len(runs)
+        runs[lo:hi] = [scale for scale, _ in pieces]
+        if tail:
+            dict.update(self, pieces)
+        else:
+            items = [(scale, dict.__getitem__(self, scale)) for scale in runs[:lo]]
+            items.extend(pieces)
+            items.extend((scale, dict.__getitem__(self, scale)) for scale in runs[lo + len(pieces) :])
+            dict.clear(self)
+            dict.update(self, items)
+
+
+@dataclass(slots=True)
 class Text(Segment):
     """Text对象, 表示一类文本元素"""
 
     text: str
-    styles: dict[tuple[int, int], list[str]] = field(default_factory=dict)
+    styles: dict[tuple[int, int], list[str]] = field(default_factory=_Styles)
 
     @staticmethod
     def br():
@@ -248,40 +503,32 @@ class Text(Segment):
 
     def __post_init__(self):
         self.text = str(self.text)
+        if self.styles.__class__ is not _Styles:
+            self.styles = _Styles(self.styles)
+
+    @property
+    def _styles(self) -> _Styles:
+        if self.styles.__class__ is not _Styles:
+            self.styles = _Styles(self.styles)
+        return self.styles  # type: ignore
 
     def is_text(self) -> bool:
         return True
 
+    def fingerprint(self) -> int:
+        # 文本会被原地合并与标记样式，不做缓存
+        return hash((self.__class__, self.text, *((scale, *value) for scale, value in self.styles.items())))
+
+    def clone(self) -> Self:
+        new = super(Text, self).clone()
+        new.styles = styles = _Styles({scale: value[:] for scale, value in self.styles.items()})
+        if (runs := getattr(self.styles, "runs", None)) is not None:
+            styles.runs = runs[:]
+        return new
+
     def __merge__(self):
-        data = {}
-        styles = self.styles
-        if not styles:
-            return
-        for scale, _styles in styles.items():
-            for i in range(*scale):
-                if i not in data:
-                    data[i] = _styles[:]
-                else:
-                    data[i].extend(s for s in _styles if s not in data[i])
-        styles.clear()
-        data1: dict[str, list] = {}
-        for i, _styles in data.items():
-            key = "\x01".join(_styles)
-            data1.setdefault(key, []).append(i)
-        data.clear()
-        for key, indexes in data1.items():
-            start = indexes[0]
-            end = start
-            for i in indexes[1:]:
-                if i - end == 1:
-                    end = i
-                else:
-                    data[(start, end + 1)] = key.split("\x01")
-                    start = end = i
-            if end >= start:
-                data[(start, end + 1)] = key.split("\x01")
-        for scale in sorted(data.keys()):
-            styles[scale] = data[scale]
+        """整理样式区间"""
+        self._styles.normalize()
 
     def cover(self, text: str):
         self._children = [Text(text)]
@@ -298,11 +545,11 @@ class Text(Segment):
             end += len(self.text)
         if not styles:
             return self
-        _styles = self.styles.setdefault((start, end), [])
-        for sty in styles:
-            if sty not in _styles:
-                _styles.append(sty)
-        self.__merge__()
+        _styles = self._styles
+        if start < end:
+            _styles.insert(start, end, list(dict.fromkeys(styles)))
+        else:
+            _styles.normalize()
         return self
 
     def bold(self, start: int | None = None, end: int | None = None):
@@ -337,11 +584,12 @@ class Text(Segment):
     def __str__(self) -> str:
         result = []
         text = self.text
-        styles = self.styles
+        styles = self._styles
         if not styles:
             return text
-        self.__merge__()
-        scales = sorted(styles.keys(), key=lambda x: x[0])
+        scales = styles.normalize()
+        if not scales:
+            return text
         left = scales[0][0]
         result.append(text[:left])
         right = scales[0][1]
@@ -365,11 +613,12 @@ class Text(Segment):
     def __rich__(self):
         result = []
         text = self.text
-        styles = self.styles
+        styles = self._styles
         if not styles:
             return text
-        self.__merge__()
-        scales = sorted(styles.keys(), key=lambda x: x[0])
+        scales = styles.normalize()
+        if not scales:
+            return text
         left = scales[0][0]
         result.append(text[:left])
         right = scales[0][1]
@@ -397,11 +646,12 @@ class Text(Segment):
     def style_split(self):
         result: list[Text] = []
         text = self.text
-        styles = self.styles
+        styles = self._styles
         if not styles:
             return [self]
-        self.__merge__()
-        scales = sorted(styles.keys(), key=lambda x: x[0])
+        scales = styles.normalize()
+        if not scales:
+            return [self]
         left = scales[0][0]
         if left > 0:
             result.append(Text(text[:left]))
@@ -420,9 +670,26 @@ class Text(Segment):
         if not other.text:
             return self
         self.text += other.text
-        for scale, styles in other.styles.items():
-            self.styles[(scale[0] + _len, scale[1] + _len)] = styles[:]
-        self.__merge__()
+        styles = self._styles
+        other_styles = other._styles
+        runs = styles.normalize()
+        other_runs = other_styles.normalize()
+        if (runs and runs[-1][1] > _len) or (other_runs and other_runs[0][0] < 0):
+            for scale, value in other_styles.items():
+                styles[(scale[0] + _len, scale[1] + _len)] = value[:]
+            styles.normalize()
+            return self
+        # 另一段文本的样式区间都在末尾之后，依次追加即可，只需合并衔接处样式相同的区间
+        for start, end in other_runs:
+            value = other_styles[(start, end)][:]
+            start += _len
+            end += _len
+            if runs and runs[-1][1] == start and dict.__getitem__(styles, runs[-1]) == value:
+                last = runs.pop()
+                dict.__delitem__(styles, last)
+                start = last[0]
+            runs.append((start, end))
+            dict.__setitem__(styles, (start, end), value)
         return self
 
     @overload
@@ -434,13 +701,13 @@ class Text(Segment):
         from .message import UniMessage
 
         if isinstance(item, str):
-            return Text(self.text + item, self.styles)
+            return Text(self.text + item, self.styles.copy())
 
         if isinstance(item, Text):
-            new = Text(self.text, self.styles)
+            new = Text(self.text, self.styles.copy())
             return new._merge_text(item)
 
-        return UniMessage(Text(self.text, self.styles)) + item
+        return UniMessage(Text(self.text, self.styles.copy())) + item
 
     @overload
     def __radd__(self, item: Union[str, "Text"]) -> "Text": ...
@@ -455,10 +722,10 @@ class Text(Segment):
             return Text(item)._merge_text(self)
 
         if isinstance(item, Text):
-            new = Text(item.text, item.styles)
+            new = Text(item.text, item.styles.copy())
             return new._merge_text(self)
 
-        return UniMessage(item) + Text(self.text, self.styles)
+        return UniMessage(item) + Text(self.text, self.styles.copy())
 
     @overload
     def __getitem__(self, item: int) -> str: ...
@@ -475,12 +742,12 @@ class Text(Segment):
             end += len(self.text)
         text = self.text[item]
         len_ = len(text)
+        styles = self._styles
         res = Text(
             text,
             {
-                (max(_start - start, 0), min(_end - start, len_)): style
-                for (_start, _end), style in self.styles.items()
-                if _start < end and _end > start
+                (max(_start - start, 0), min(_end - start, len_)): styles[(_start, _end)]
+                for _start, _end in styles.overlaps(start, end)
             },
         )
         res.__merge__()
@@ -489,8 +756,9 @@ class Text(Segment):
     def split(self, pattern: str | None = None):
         parts = self.text.split(pattern)
         if len(parts) == 1:
-            return [Text(self.text, self.styles)]
-        styles = self.styles
+            return [Text(self.text, self.styles.copy())]
+        styles = self._styles
+        styles.normalize()
         text = self.text
         index = 0
         result: list[Text] = []
@@ -500,19 +768,17 @@ class Text(Segment):
                 result.append(Text(part))
                 continue
             index = start + len(part)
+            if not part:
+                # 空片段不携带样式
+                result.append(Text(part))
+                continue
             if maybe := styles.get((start, index)):
                 result.append(Text(part, {(0, len(part)): maybe}))
                 continue
-            _styles = {}
-            for scale, style in styles.items():
-                if start <= scale[0] < index <= scale[1]:
-                    _styles[(scale[0] - start, index - start)] = style
-                elif scale[0] <= start < scale[1] <= index:
-                    _styles[(0, scale[1] - start)] = style
-                elif start <= scale[0] < scale[1] <= index:
-                    _styles[(scale[0] - start, scale[1] - start)] = style
-                elif scale[0] <= start < index <= scale[1]:
-                    _styles[(0, index - start)] = style
+            _styles = {
+                (max(_start, start) - start, min(_end, index) - start): styles[(_start, _end)]
+                for _start, _end in styles.overlaps(start, index)
+            }
             result.append(Text(part, _styles))
         return result
 
@@ -578,7 +844,7 @@ class Text(Segment):
         return cls(data["text"], styles)
 
 
-@dataclass
+@dataclass(slots=True)
 class At(Segment):
     """At对象, 表示一类提醒某用户的元素"""
 
@@ -586,15 +852,17 @@ class At(Segment):
     target: str
     display: str | None = field(default=None)
 
+    __fingerprint_fields__ = ("flag", "target")
 
-@dataclass
+
+@dataclass(slots=True)
 class AtAll(Segment):
     """AtAll对象, 表示一类提醒所有人的元素"""
 
     here: bool = field(default=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class Emoji(Segment):
     """Emoji对象, 表示一类表情元素"""
 
@@ -602,6 +870,8 @@ class Emoji(Segment):
     name: str | None = field(default=None)
     url: str | None = field(default=None)
 
+    __fingerprint_fields__ = ("id",)
+
 
 class MediaToUrl(Protocol):
     def __call__(
@@ -609,16 +879,17 @@ class MediaToUrl(Protocol):
     ) -> Awaitable[str]: ...
 
 
-@dataclass
+@dataclass(slots=True)
 class Media(Segment):
     id: str | None = field(default=None)
     url: str | None = field(default=None)
     path: str | Path | None = field(default=None)
-    raw: bytes | BytesIO | None = field(default=None)
+    raw: bytes | BytesIO | MediaPayload | None = field(default=None)
     mimetype: str | None = field(default=None)
     name: str = field(default="media")
 
     __default_name__ = "media"
+    __fingerprint_fields__ = ("id", "url", "path", "raw")
     to_url: ClassVar[MediaToUrl | None] = None
 
     def __is_default_name(self) -> bool:
@@ -630,19 +901,63 @@ class Media(Segment):
         if self.url and not urlparse(self.url).hostname:
             self.url = f"https://{self.url}"
 
-    @property
-    def raw_bytes(self) -> bytes:
-        if not self.raw:
-            raise ValueError(f"{self} has no raw data")
-        raw = self.raw.getvalue() if isinstance(self.raw, BytesIO) else self.raw
+    def _header(self, size: int = 128) -> bytes:
+        if isinstance(self.raw, MediaPayload):
+            return self.raw.header(size)
+        if isinstance(self.raw, BytesIO):
+            with self.raw.getbuffer() as view:
+                return view[:size].tobytes()
+        return self.raw[:size]  # type: ignore
+
+    def _sniff(self):
         if (not self.mimetype) or self.__is_default_name():
-            header = raw[:128]
-            info = fleep.get(header)
+            info = fleep.get(self._header())
             if not self.mimetype:
                 self.mimetype = info.mimes[0] if info.mimes else self.mimetype
             if self.__is_default_name() and info.types and info.extensions:
                 self.name = f"{info.types[0]}.{info.extensions[0]}"
-        return raw
+
+    @property
+    def raw_bytes(self) -> bytes:
+        if not self.raw:
+            raise ValueError(f"{self} has no raw data")
+        self._sniff()
+        if isinstance(self.raw, BytesIO):
+            return self.raw.getvalue()
+        if isinstance(self.raw, MediaPayload):
+            return self.raw.tobytes()
+        return self.raw
+
+    async def raw_bytes_async(self) -> bytes:
+        """`raw_bytes` 的异步版本，由文件提供的数据在 `media_io` 线程池中读取，不阻塞事件循环"""
+        if isinstance(self.raw, MediaPayload) and self.raw.path is not None:
+            return await media_io.run(lambda: self.raw_bytes)
+        return self.raw_bytes
+
+    def _view(self) -> memoryview:
+        if isinstance(self.raw, BytesIO):
+            return self.raw.getbuffer().toreadonly()
+        if isinstance(self.raw, MediaPayload):
+            return self.raw.view()
+        return memoryview(self.raw)  # type: ignore
+
+    @property
+    def raw_view(self) -> memoryview:
+        """不复制数据地获取原始数据的只读视图，使用完毕后应调用 `release`"""
+        if not self.raw:
+            raise ValueError(f"{self} has no raw data")
+        self._sniff()
+        return self._view()
+
+    @property
+    def raw_source(self) -> bytes | BytesIO | Path | None:
+        """传递给 `to_url` 等上传函数的数据
+
+        由文件提供的 `MediaPayload` 返回其路径，其余 `MediaPayload` 返回 bytes
+        """
+        if isinstance(self.raw, MediaPayload):
+            return self.raw.path or self.raw.tobytes()
+        return self.raw
 
     @classmethod
     def load(cls, data: dict) -> Self:
@@ -666,19 +981,19 @@ class Media(Segment):
             except ImportError:
                 get_data_dir = None
                 dir_ = Path.cwd() / ".data" / "media"
-        raw = self.raw.getvalue() if isinstance(self.raw, BytesIO) else self.raw
-        header = raw[:128]
-        info = fleep.get(header)
+        info = fleep.get(self._header())
         ext = info.extensions[0] if info.extensions else "bin"
-        md5 = hashlib.md5(raw).hexdigest()
-        path = dir_ / md5[:2] / f"{md5}.{ext}"
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("wb+") as f:
-            f.write(raw)
-        return path.resolve()
+        with self._view() as raw:
+            md5 = hashlib.md5(raw).hexdigest()
+            path = dir_ / md5[:2] / f"{md5}.{ext}"
+            return write_atomic(path, raw).resolve()
 
+    async def save_async(self, media_save_dir: str | Path | None = None) -> Path:
+        """在线程池中保存媒体文件，不阻塞事件循环"""
+        return await media_io.run(self.save, media_save_dir)
 
-@dataclass
+
+@dataclass(slots=True)
 class Image(Media):
     """Image对象, 表示一类图片元素"""
 
@@ -690,7 +1005,7 @@ class Image(Media):
     __default_name__ = "image.png"
 
 
-@dataclass
+@dataclass(slots=True)
 class Audio(Media):
     """Audio对象, 表示一类音频元素"""
 
@@ -700,7 +1015,7 @@ class Audio(Media):
     __default_name__ = "audio.mp3"
 
 
-@dataclass
+@dataclass(slots=True)
 class Voice(Media):
     """Voice对象, 表示一类语音元素"""
 
@@ -710,7 +1025,7 @@ class Voice(Media):
     __default_name__ = "voice.wav"
 
 
-@dataclass
+@dataclass(slots=True)
 class Video(Media):
     """Video对象, 表示一类视频元素"""
 
@@ -718,10 +1033,16 @@ class Video(Media):
     duration: float | None = field(default=None)
     name: str = field(default="video.mp4")
 
+    def clone(self) -> Self:
+        new = super(Video, self).clone()
+        if self.thumbnail:
+            new.thumbnail = self.thumbnail.clone()
+        return new
+
     __default_name__ = "video.mp4"
 
 
-@dataclass
+@dataclass(slots=True)
 class File(Media):
     """File对象, 表示一类文件元素"""
 
@@ -730,7 +1051,7 @@ class File(Media):
     __default_name__ = "file.bin"
 
 
-@dataclass(init=False)
+@dataclass(init=False, slots=True)
 class Reply(Segment):
     """Reply对象，表示一类回复消息"""
 
@@ -739,6 +1060,8 @@ class Reply(Segment):
     msg: Message | str | None
     origin: Any | None
 
+    __fingerprint_fields__ = ("id",)
+
     def __init__(
         self,
         id: str,
@@ -748,20 +1071,17 @@ class Reply(Segment):
         self.id = id
         self.msg = msg
         self.origin = origin
-        self._children1 = []
-
-    @property
-    def _children(self):
-        return self._children1
+        self._children_ = _NO_CHILDREN  # type: ignore
+        self._fingerprint_ = None
 
     def dump(self, *, media_save_dir: str | Path | bool | None = None) -> dict:
-        data = super().dump(media_save_dir=media_save_dir)
+        data = super(Reply, self).dump(media_save_dir=media_save_dir)
         data["id"] = self.id
         data.pop("msg", None)
         return data
 
 
-@dataclass
+@dataclass(slots=True)
 class RefNode:
     """表示转发消息的引用消息元素"""
 
@@ -770,6 +1090,9 @@ class RefNode:
     context: str | None = None
     """可能的群聊id"""
 
+    def clone(self) -> "RefNode":
+        return copy(self)
+
     def dump(self, **kwargs):
         return {"type": "ref", "id": self.id, "context": self.context}
 
@@ -778,7 +1101,7 @@ class RefNode:
         return cls(data["id"], data.get("context"))
 
 
-@dataclass
+@dataclass(slots=True)
 class CustomNode:
     """表示转发消息的自定义消息元素"""
 
@@ -793,6 +1116,16 @@ class CustomNode:
     context: str | None = None
     """可能的群聊id"""
 
+    def clone(self) -> "CustomNode":
+        from .message import UniMessage
+
+        new = copy(self)
+        if isinstance(self.content, UniMessage):
+            new.content = self.content.copy()
+        elif not isinstance(self.content, str):
+            new.content = [seg.clone() for seg in self.content]
+        return new
+
     def dump(self, *, media_save_dir: str | Path | bool | None = None):
         return {
             "type": "custom",
@@ -822,14 +1155,13 @@ class CustomNode:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Reference(Segment):
     """Reference对象，表示一类引用消息。转发消息 (Forward) 也属于此类"""
 
     id: str | None = field(default=None)
     """此处不一定是消息ID，可能是其他ID，如消息序号等"""
     nodes: InitVar[list[RefNode] | list[CustomNode] | list[RefNode | CustomNode] | None] = field(default=None)
-    _children: list[RefNode | CustomNode] = field(init=False, default_factory=list)
 
     def __post_init__(self, nodes: list[RefNode] | list[CustomNode] | list[RefNode | CustomNode] | None):
         if nodes:
@@ -843,6 +1175,7 @@ class Reference(Segment):
         if not segments:
             return self
         self._children.extend(segments)  # type: ignore
+        self._fingerprint_ = None
         return self
 
     def dump(self, *, media_save_dir: str | Path | bool | None = None) -> dict:
@@ -858,7 +1191,7 @@ class Reference(Segment):
         return cls(data["id"], nodes)
 
 
-@dataclass
+@dataclass(slots=True)
 class Hyper(Segment):
     """Hyper对象，表示一类超级消息。如卡片消息、ark消息、小程序等"""
 
@@ -866,6 +1199,11 @@ class Hyper(Segment):
     raw: str | None = field(default=None)
     content: dict | list | None = field(default=None)
 
+    def clone(self) -> Self:
+        new = super(Hyper, self).clone()
+        new.content = deepcopy(self.content)
+        return new
+
     def __post_init__(self):
         if self.raw and not self.content and self.format == "json":
             with contextlib.suppress(json.JSONDecodeError):
@@ -879,7 +1217,7 @@ class Hyper(Segment):
 # telegram: InlineKeyboardButton & bot_command
 
 
-@dataclass
+@dataclass(slots=True)
 class Button(Segment):
     """Button对象，表示一类按钮消息
 
@@ -942,8 +1280,16 @@ class Button(Segment):
             label += f"[{self.text}]"
         self._children.insert(0, label)
 
+    def clone(self) -> Self:
+        new = super(Button, self).clone()
+        if isinstance(self.label, Text):
+            new.label = self.label.clone()
+        if isinstance(self.permission, list):
+            new.permission = [at.clone() for at in self.permission]
+        return new
 
-@dataclass
+
+@dataclass(slots=True)
 class Keyboard(Segment):
     """Keyboard对象，表示一行按钮元素"""
 
@@ -952,7 +1298,8 @@ class Keyboard(Segment):
     """此处一般用来表示模板id，特殊情况下可能表示例如 bot_appid 等"""
     row: int | None = None
     """当消息中只写有一个 Keyboard 时可根据此参数约定按钮组的列数"""
-    _children: list[Button] = field(init=False, default_factory=list)
+
+    __fingerprint_fields__ = ("id", "row")
 
     def __post_init__(self, buttons: list[Button] | None):
         if buttons:
@@ -966,15 +1313,18 @@ class Keyboard(Segment):
         if not segments:
             return self
         self._children.extend(segments)  # type: ignore
+        self._fingerprint_ = None
         return self
 
 
-@dataclass
+@dataclass(slots=True)
 class Other(Segment):
     """其他 Segment"""
 
     origin: MessageSegment
 
+    __fingerprint_fields__ = ("origin",)
+
     def __str__(self):
         return f"[{self.origin.type}]"
 
@@ -997,6 +1347,8 @@ class Other(Segment):
 class I18n(Segment):
     """特殊的 Segment，用于 i18n 消息"""
 
+    __fingerprint_fields__ = ("item", "args", "kwargs")
+
     @overload
     def __init__(self, item: LangItem, /, *args, mapping: dict | None = None, **kwargs): ...
     @overload
@@ -1025,6 +1377,11 @@ class I18n(Segment):
     def __str__(self):
         return lang.require(self.item.scope, self.item.type)
 
+    def clone(self) -> Self:
+        new = super().clone()
+        new.kwargs = self.kwargs.copy()
+        return new
+
     def dump(self, **kwargs):
         return {
             "type": "i18n",
@@ -1061,21 +1418,44 @@ class _CustomMounter:
             ],
         ]
     ] = {}
+    version: ClassVar[int] = 0
+    """自定义构建器的版本号，注册新的构建器后递增，用于使各 MessageBuilder 的分派表失效"""
 
     @classmethod
     def custom_register(cls, custom_type: type[TS], condition: str | Callable[[MessageSegment], bool]):
         def _register(func: Callable[["MessageBuilder", MessageSegment], TS | None]):
             cls.BUILDERS[condition] = func
+            cls.version += 1
             return func
 
         return _register
 
-    def solve(self, builder: "MessageBuilder[TMS]", seg: TMS):
+    def resolve(
+        self, seg_type: str
+    ) -> tuple[tuple[Callable[[MessageSegment], bool] | None, Callable[["MessageBuilder", MessageSegment], Any]], ...]:
+        """按注册顺序列出可能处理该类型消息段的构建器
+
+        字符串条件在此处直接判定，首个匹配的字符串条件之后的条目不会被用到；谓词条件仍需对每个消息段调用
+        """
+        entries = []
         for condition, func in self.BUILDERS.items():
             if isinstance(condition, str):
-                if seg.type == condition:
-                    return func(builder, seg)
-            elif condition(seg):
+                if condition == seg_type:
+                    entries.append((None, func))
+                    break
+            else:
+                entries.append((condition, func))
+        return tuple(entries)
+
+    def solve(self, builder: "MessageBuilder[TMS]", seg: TMS):
+        version = (self.version, len(self.BUILDERS))
+        if builder._custom_version != version:
+            builder._custom_table.clear()
+            builder._custom_version = version
+        if (entries := builder._custom_table.get(seg.type)) is None:
+            entries = builder._custom_table[seg.type] = self.resolve(seg.type)
+        for condition, func in entries:
+            if condition is None or condition(seg):
                 return func(builder, seg)
         return None
 
@@ -1126,4 +1506,6 @@ env[Media] = BasePattern(
 
 def apply_media_to_url(func: MediaToUrl):
     """为 Media 对象设置 to_url 方法，用于将文件或数据上传到文件服务器并返回 URL"""
-    Media.to_url = func
+    from .upload import upload_cache
+
+    Media.to_url = upload_cache.wrap(func) if upload_cache.enabled else func
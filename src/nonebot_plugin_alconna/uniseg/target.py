@@ -1,12 +1,19 @@
+import asyncio
+import json
+import random
 from abc import ABCMeta, abstractmethod
-from collections.abc import AsyncIterator, Awaitable
+from collections.abc import AsyncIterator, Awaitable, Iterable
+from copy import copy
 from datetime import datetime, timezone
 from functools import partial
-from typing import TYPE_CHECKING, Any, Callable, Union
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Union
+from urllib.parse import quote
 
-from nonebot.adapters import Adapter, Bot, Message
+from nonebot import get_bots
+from nonebot.adapters import Adapter, Bot, Event, Message
 
-from .constraint import SerializeFailed, SupportAdapter, SupportScope, lang
+from .constraint import SerializeFailed, SupportAdapter, SupportScope, lang, log
 from .segment import Reply
 from .tools import get_bot
 
@@ -24,6 +31,57 @@ async def _cache_selector(target: "Target", bot: Bot):
     return True
 
 
+def _is_cached(bot: Bot) -> bool:
+    """判断 Bot 时是否无需拉取目标列表"""
+    if bot.self_id not in TARGET_RECORD:
+        return True
+    from .adapters import alter_get_fetcher
+
+    return not (fn := alter_get_fetcher(bot.adapter.get_name())) or bot.self_id in fn.cache
+
+
+class TargetIndex:
+    """目标倒排索引
+
+    以 (id, channel, private) 为键，记录能够触达该目标的 Bot 及其缓存的目标，
+    使 `Target.select` 无需对每个 Bot 逐一遍历其缓存的目标。
+    """
+
+    def __init__(self):
+        self._index: dict[tuple[str, bool, bool], dict[str, list[Target]]] = {}
+
+    def add(self, self_id: str, target: "Target"):
+        self._index.setdefault((target.id, target.channel, target.private), {}).setdefault(self_id, []).append(target)
+
+    def discard(self, self_id: str, targets: Iterable["Target"]):
+        for target in targets:
+            key = (target.id, target.channel, target.private)
+            if (entry := self._index.get(key)) and entry.pop(self_id, None) is not None and not entry:
+                del self._index[key]
+
+    def remove(self, self_id: str, target: "Target"):
+        key = (target.id, target.channel, target.private)
+        if not (entry := self._index.get(key)) or not (targets := entry.get(self_id)):
+            return
+        targets[:] = [tg for tg in targets if tg != target]
+        if not targets:
+            del entry[self_id]
+            if not entry:
+                del self._index[key]
+
+    def lookup(self, target: "Target") -> set[str]:
+        """查询能够触达目标的 Bot id"""
+        if not (entry := self._index.get((target.id, target.channel, target.private))):
+            return set()
+        return {self_id for self_id, targets in entry.items() if any(target.verify(tg) for tg in targets)}
+
+    def clear(self):
+        self._index.clear()
+
+
+TARGET_INDEX = TargetIndex()
+
+
 class Target:
     id: str
     """目标id；若为群聊则为group_id或者channel_id，若为私聊则为user_id"""
@@ -79,8 +137,12 @@ class Target:
         self.self_id = self_id
         self.extra = extra or {}
         self.selector = None
+        self._indexed = selector is _cache_selector
+        """是否可以通过 `TARGET_INDEX` 选择 Bot"""
+        self._prefilter: Callable[[Bot], Awaitable[bool]] | None = None
+        """除缓存选择器外的适配器范围与平台筛选"""
         if scope:
-            self.selector = partial(SCOPES[scope], self)
+            self.selector = self._prefilter = partial(SCOPES[scope], self)
             self.extra["scope"] = scope
         if selector:
             if self.selector:
@@ -120,6 +182,7 @@ class Target:
                 return False
 
             _selector = self.selector
+            _scope_filter = self._prefilter
 
             async def _(bot: Bot):
                 if not _predicate(bot):
@@ -128,7 +191,13 @@ class Target:
                     return True
                 return await _selector(bot)
 
+            async def _prefilter(bot: Bot):
+                if not _predicate(bot):
+                    return False
+                return not _scope_filter or await _scope_filter(bot)
+
             self.selector = _
+            self._prefilter = _prefilter
 
     def __hash__(self):
         args = (self.id, self.channel, self.private, self.self_id)
@@ -195,14 +264,41 @@ class Target:
     ):
         return cls(user_id, private=True, scope=scope, adapter=adapter, platform=platform)
 
+    async def _select_indexed(self) -> list[Bot]:
+        """通过目标索引选出候选 Bot；未启用目标缓存或索引未命中时返回空列表"""
+        if not TARGET_RECORD:
+            return []
+        bots = get_bots()
+        candidates = [bot for self_id in TARGET_INDEX.lookup(self) if (bot := bots.get(self_id))]
+        if not candidates:
+            return []
+        # 没有目标缓存的 Bot 在缓存选择器中总是视为可用
+        candidates.extend(bot for self_id, bot in bots.items() if self_id not in TARGET_RECORD)
+        if not self._prefilter:
+            return candidates
+        return [bot for bot in candidates if await self._prefilter(bot)]
+
     async def select(self):
         if self.self_id:
             try:
                 return await get_bot(bot_id=self.self_id)
             except KeyError:
                 self.self_id = None
+        if self._indexed and (bots := await self._select_indexed()):
+            return random.choice(bots)
         if self.selector:
-            return await get_bot(predicate=self.selector, rand=True)
+            selector = self.selector
+
+            async def _cached(bot: Bot):
+                return _is_cached(bot) and await selector(bot)
+
+            async def _uncached(bot: Bot):
+                return not _is_cached(bot) and await selector(bot)
+
+            # 先在已缓存目标列表的 Bot 中选择，均不满足时才对其余 Bot 拉取目标列表
+            if bots := await get_bot(predicate=_cached):
+                return random.choice(bots)
+            return await get_bot(predicate=_uncached, rand=True)
         raise SerializeFailed(lang.require("nbp-uniseg", "bot_missing"))
 
     async def send(
@@ -264,9 +360,19 @@ class Target:
 
 
 class TargetFetcher(metaclass=ABCMeta):
+    ttl: ClassVar[float] = 600
+    """目标缓存的有效期 (秒)，过期后查询未命中时会在后台刷新"""
+    concurrency: ClassVar[int] = 4
+    """同时拉取目标列表的 Bot 数量上限"""
+    store: ClassVar[Path | None] = None
+    """目标缓存的本地存储目录，为 None 时不持久化"""
+    _semaphore: ClassVar[asyncio.Semaphore | None] = None
+
     def __init__(self) -> None:
         self.cache: dict[str, set[Target]] = {}
         self.last_refresh: dict[str, datetime] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
 
     @classmethod
     @abstractmethod
@@ -275,38 +381,171 @@ class TargetFetcher(metaclass=ABCMeta):
     @abstractmethod
     def fetch(self, bot: Bot, target: Target | None = None) -> AsyncIterator[Target]: ...
 
-    async def refresh(self, bot: Bot, target: Target | None = None):
-        if bot.self_id in self.cache:
-            del self.cache[bot.self_id]
-        self.last_refresh[bot.self_id] = datetime.now(tz=timezone.utc)
-        _cache = self.cache.setdefault(bot.self_id, set())
+    def changes(self, bot: Bot, event: Event) -> tuple[list[Target], list[Target]] | None:
+        """从通知事件 (如入群、退群、添加好友) 中解析目标的增减
+
+        Returns:
+            (新增的目标, 移除的目标)；事件与目标无关时返回 None
+        """
+        return None
+
+    @classmethod
+    def _limit(cls) -> asyncio.Semaphore:
+        if cls._semaphore is None:
+            TargetFetcher._semaphore = asyncio.Semaphore(max(cls.concurrency, 1))
+        return TargetFetcher._semaphore  # type: ignore
+
+    def _lock(self, self_id: str) -> asyncio.Lock:
+        if self_id not in self._locks:
+            self._locks[self_id] = asyncio.Lock()
+        return self._locks[self_id]
+
+    def expired(self, self_id: str) -> bool:
+        """Bot 的目标缓存是否已过期"""
+        if self_id not in self.last_refresh:
+            return True
+        return (datetime.now(tz=timezone.utc) - self.last_refresh[self_id]).total_seconds() >= self.ttl
+
+    def add(self, self_id: str, target: Target):
+        """向 Bot 的目标缓存中添加单个目标"""
+        _cache = self.cache.setdefault(self_id, set())
+        if target not in _cache:
+            _cache.add(target)
+            TARGET_INDEX.add(self_id, target)
+
+    def remove(self, self_id: str, target: Target):
+        """从 Bot 的目标缓存中移除单个目标"""
+        if (_cache := self.cache.get(self_id)) is not None and target in _cache:
+            _cache.discard(target)
+            TARGET_INDEX.remove(self_id, target)
+
+    def discard(self, self_id: str):
+        """移除 Bot 的目标缓存及其索引"""
+        if (task := self._tasks.pop(self_id, None)) is not None:
+            task.cancel()
+        self._locks.pop(self_id, None)
+        self.last_refresh.pop(self_id, None)
+        if (targets := self.cache.pop(self_id, None)) is not None:
+            TARGET_INDEX.discard(self_id, targets)
+
+    def _replace(self, self_id: str, targets: set[Target], time: datetime):
+        if (old := self.cache.pop(self_id, None)) is not None:
+            TARGET_INDEX.discard(self_id, old)
+        self.last_refresh[self_id] = time
+        self.cache[self_id] = targets
+        for tg in targets:
+            TARGET_INDEX.add(self_id, tg)
+
+    def _store_path(self, self_id: str) -> Path | None:
+        if self.store is None:
+            return None
+        return self.store / self.get_adapter().name / f"{quote(self_id, safe='')}.json"
+
+    def save(self, self_id: str):
+        """将 Bot 的目标缓存写入本地文件"""
+        if not (path := self._store_path(self_id)) or (targets := self.cache.get(self_id)) is None:
+            return
+        data = {
+            "time": self.last_refresh[self_id].timestamp(),
+            "targets": [tg.dump(save_self_id=False) for tg in targets],
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_suffix(".tmp")
+        temp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        temp.replace(path)
+
+    def restore(self, self_id: str) -> bool:
+        """从本地文件恢复 Bot 的目标缓存，返回是否恢复成功"""
+        if not (path := self._store_path(self_id)) or not path.exists():
+            return False
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            targets = {Target.load({**item, "self_id": self_id}) for item in data["targets"]}
+            time = datetime.fromtimestamp(data["time"], tz=timezone.utc)
+        except Exception as e:
+            log("WARNING", f"load cached targets of bot:{self_id} failed: {e}")
+            return False
+        self._replace(self_id, targets, time)
+        return True
+
+    def update(self, bot: Bot, event: Event) -> bool:
+        """根据通知事件增量更新目标缓存，返回是否有更新"""
+        if bot.self_id not in self.cache or not (diff := self.changes(bot, event)):
+            return False
+        added, removed = diff
+        for tg in removed:
+            self.remove(bot.self_id, tg)
+        for tg in added:
+            self.add(bot.self_id, tg)
+        if added or removed:
+            self.save(bot.self_id)
+            return True
+        return False
+
+    async def _update(self, bot: Bot, target: Target | None = None) -> AsyncIterator[Target]:
+        fetched: set[Target] = set()
         async for tg in self.fetch(bot, target):
-            _cache.add(tg)
+            fetched.add(tg)
+            yield tg
+        # 拉取完成后再替换缓存，避免刷新期间的查询落空
+        self._replace(bot.self_id, fetched, datetime.now(tz=timezone.utc))
+        self.save(bot.self_id)
+
+    async def refresh(self, bot: Bot, target: Target | None = None):
+        """刷新 Bot 的目标缓存
+
+        同一 Bot 的刷新互斥，不同 Bot 之间至多 `concurrency` 个同时进行
+        """
+        async with self._lock(bot.self_id), self._limit():
+            async for _ in self._update(bot, target):
+                pass
+
+    def refresh_background(self, bot: Bot):
+        """在后台刷新 Bot 的目标缓存，已有进行中的刷新时不重复发起"""
+        if (task := self._tasks.get(bot.self_id)) and not task.done():
+            return task
+
+        async def _refresh():
+            try:
+                await self.refresh(bot)
+            except Exception as e:
+                log("ERROR", f"bot:{bot} fetch targets failed: {e}")
+
+        task = self._tasks[bot.self_id] = asyncio.create_task(_refresh())
+        task.add_done_callback(
+            lambda t: self._tasks.pop(bot.self_id, None) if self._tasks.get(bot.self_id) is t else None
+        )
+        return task
+
+    def _match(self, bot: Bot, target: Target) -> bool:
+        targets = self.cache[bot.self_id]
+        if target in targets:
+            return True
+        # 以当前 Bot 的身份比较；不修改传入的目标，其可能正被其他 Bot 并发检查
+        probe = copy(target)
+        probe.self_id = bot.self_id
+        probe.extra = {**target.extra, "adapter": self.get_adapter()}
+        if probe in targets:
+            return True
+        return any(probe.verify(tg) for tg in targets)
 
     def get_selector(self, bot: Bot):
         async def _check(target: Target):
             if bot.self_id in self.cache:
-                targets = self.cache[bot.self_id]
-                if target in targets:
+                if self._match(bot, target):
                     return True
-                target.self_id = bot.self_id
-                target.extra["adapter"] = self.get_adapter()
-                if target in targets:
-                    return True
-                for tg in targets:
-                    if target.verify(tg):
-                        return True
-            now = datetime.now(tz=timezone.utc)
-            if bot.self_id in self.last_refresh and (now - self.last_refresh[bot.self_id]).seconds < 600:
+                # 缓存过期时在后台刷新，不阻塞本次发送
+                if self.expired(bot.self_id):
+                    self.refresh_background(bot)
                 return False
-            self.cache.pop(bot.self_id, None)
-            _cache = self.cache.setdefault(bot.self_id, set())
-            self.last_refresh[bot.self_id] = now
-            count = 0
-            async for tg in self.fetch(bot, target):
-                _cache.add(tg)
-                if target.verify(tg):
-                    count += 1
+            async with self._lock(bot.self_id):
+                if bot.self_id in self.cache:
+                    return self._match(bot, target)
+                async with self._limit():
+                    count = 0
+                    async for tg in self._update(bot, target):
+                        if target.verify(tg):
+                            count += 1
             return count > 0
 
         return _check
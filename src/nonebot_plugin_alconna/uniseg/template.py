@@ -1,15 +1,14 @@
 import _string  # type: ignore
 import functools
 import re
-from collections.abc import Mapping, Sequence
+from collections.abc import Iterable, Mapping, Sequence
 from string import Formatter
-from typing import TYPE_CHECKING, Any, Callable, TypeVar, Union, cast
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, TypeVar, Union, cast
 from typing_extensions import TypeAlias
 
 from tarina import lang
-from tarina.tools import gen_subclass
 
-from .segment import Segment
+from .segment import Segment, Text, segment_classes
 
 if TYPE_CHECKING:
     from .message import UniMessage
@@ -17,17 +16,23 @@ if TYPE_CHECKING:
 FormatSpecFunc: TypeAlias = Callable[[Any], str]
 FormatSpecFunc_T = TypeVar("FormatSpecFunc_T", bound=FormatSpecFunc)
 
-_MAPPING = {cls.__name__: cls for cls in gen_subclass(Segment)}
+_MAPPING = {cls.__name__: cls for cls in segment_classes()}
 _PATTERN = re.compile("(" + "|".join(_MAPPING.keys()) + r")\((.*)\)$")
 _I18N_PATTERN = re.compile(r"[^@]+\s*@\s*[^@]+")
 
 
+_KV_PATTERN = re.compile(".+=.+")
+_ROUTE_PATTERN = re.compile(r"\.|(\[.+\])|(\(.*\))")
+
+
+@functools.lru_cache(maxsize=256)
+def _route_parts(route: str) -> tuple[str, ...]:
+    return tuple(part for part in _ROUTE_PATTERN.split(route)[1:] if part)
+
+
 def _eval(route: str, obj: Any):
     res = obj
-    parts = re.split(r"\.|(\[.+\])|(\(.*\))", route)
-    for part in parts[1:]:
-        if not part:
-            continue
+    for part in _route_parts(route):
         if part.startswith("_"):
             raise ValueError(route)
         if part.startswith("[") and part.endswith("]"):
@@ -48,7 +53,7 @@ def _eval(route: str, obj: Any):
                 _kwargs = {}
                 for part in _parts:
                     part = part.strip()
-                    if re.match(".+=.+", part):
+                    if _KV_PATTERN.match(part):
                         k, v = part.split("=")
                         _kwargs[k] = v
                     else:
@@ -59,6 +64,81 @@ def _eval(route: str, obj: Any):
     return res
 
 
+class _Arg(NamedTuple):
+    """预解析的参数片段"""
+
+    part: str
+    ref: str | None
+    """以 `$` 开头时的引用名"""
+    kv: tuple[str, ...] | None
+    """形如 `k=v` 时的分割结果"""
+    value_ref: str | None
+    """形如 `k=$v` 时的引用名"""
+
+
+class _Field(NamedTuple):
+    """普通替换字段"""
+
+    name: str
+    conversion: str | None
+    spec: str
+
+
+class _I18nField(NamedTuple):
+    """i18n 字段"""
+
+    scope: str
+    key: str
+    args: tuple[_Arg, ...]
+
+
+class _SegmentField(NamedTuple):
+    """消息段构造字段"""
+
+    cls: type[Segment]
+    args: tuple[_Arg, ...]
+
+
+def _compile_arg(part: str) -> _Arg:
+    kv = tuple(part.split("=")) if _KV_PATTERN.match(part) else None
+    return _Arg(
+        part,
+        part.split(".", 1)[0] if part.startswith("$") else None,
+        kv,
+        kv[-1].split(".", 1)[0] if kv and kv[-1].startswith("$") else None,
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile(format_string: str) -> tuple[str | _Field | _I18nField | _SegmentField, ...]:
+    """将模板字符串编译为操作序列，结果按模板字符串缓存"""
+    ops: list[str | _Field | _I18nField | _SegmentField] = []
+    for literal_text, field_name, format_spec, conversion in _string.formatter_parser(format_string):
+        if literal_text:
+            ops.append(literal_text)
+        if field_name is None:
+            continue
+        if mat := _I18N_PATTERN.match(field_name):
+            scope, key = mat[0].split("@")
+            args = tuple(_compile_arg(part) for part in format_spec.split(",")) if format_spec else ()
+            ops.append(_I18nField(scope.strip(), key.strip(), args))
+        elif field_name == "" and format_spec and (mat := _PATTERN.match(format_spec)):
+            ops.append(_SegmentField(_MAPPING[mat[1]], tuple(_compile_arg(part.strip()) for part in mat[2].split(","))))
+        else:
+            ops.append(_Field(field_name, conversion, format_spec))
+    return tuple(ops)
+
+
+def _flatten(obj: Any, out: list[str | Segment]):
+    if isinstance(obj, (str, Segment)):
+        out.append(obj)
+    elif isinstance(obj, Iterable):
+        for item in obj:
+            _flatten(item, out)
+    else:
+        raise TypeError(f"Unsupported type {type(obj)!r}")
+
+
 class UniMessageTemplate(Formatter):
     """通用消息模板格式化实现类。
 
@@ -143,60 +223,14 @@ class UniMessageTemplate(Formatter):
         used_args: set[int | str],
         auto_arg_index: int = 0,
     ) -> tuple["UniMessage", int]:
-        results: list = [self.factory()]
-
-        for literal_text, field_name, format_spec, conversion in self.parse(format_string):
-            # output the literal text
-            if literal_text:
-                results.append(literal_text)
-
-            # if there's a field, output it
-            if field_name is not None:
-                if mat := _I18N_PATTERN.match(field_name):
-                    scope, key = mat[0].split("@")
-                    ans = lang.require(scope.strip(), key.strip())
-                    if format_spec:
-                        _kwargs = {}
-                        for part in format_spec.split(","):
-                            if re.match(".+=.+", part):
-                                k, v = part.split("=")
-                                if v in kwargs:
-                                    _kwargs[k] = kwargs[v]
-                                    used_args.add(v)
-                                elif v.startswith("$") and (key := v.split(".")[0]) in kwargs:
-                                    _kwargs[k] = _eval(v[1:], kwargs[key])
-                                else:
-                                    _kwargs[k] = v
-                            elif part in kwargs:
-                                _kwargs[part] = kwargs[part]
-                        if _kwargs:
-                            ans = ans.format_map(_kwargs)
-                    results.append(ans)
-                    continue
-                if field_name == "" and format_spec and (mat := _PATTERN.match(format_spec)):
-                    cls, parts = _MAPPING[mat[1]], mat[2].split(",")
-                    _args = []
-                    _kwargs = {}
-                    for part in parts:
-                        part = part.strip()
-                        if part.startswith("$") and (key := part.split(".")[0]) in kwargs:
-                            _args.append(_eval(part[1:], kwargs[key]))
-                        elif re.match(".+=.+", part):
-                            k, v = part.split("=")
-                            if v in kwargs:
-                                _kwargs[k] = kwargs[v]
-                                used_args.add(v)
-                            elif v.startswith("$") and (key := v.split(".")[0]) in kwargs:
-                                _kwargs[k] = _eval(v[1:], kwargs[key])
-                            else:
-                                _kwargs[k] = v
-                        elif part in kwargs:
-                            _args.append(kwargs[part])
-                            used_args.add(part)
-                        else:
-                            _args.append(part)
-                    results.append(cls(*_args, **_kwargs))  # type: ignore
-                    continue
+        parts: list[Segment] = []
+
+        for op in _compile(format_string):
+            if isinstance(op, str):
+                # output the literal text
+                self._append(parts, op)
+            elif isinstance(op, _Field):
+                field_name = op.name
                 if field_name == "":
                     if auto_arg_index is False:
                         raise ValueError("cannot switch from manual field specification to automatic field numbering")
@@ -215,13 +249,76 @@ class UniMessageTemplate(Formatter):
                 used_args.add(arg_used)
 
                 # do any conversion on the resulting object
-                obj = self.convert_field(obj, conversion) if conversion else obj
+                obj = self.convert_field(obj, op.conversion) if op.conversion else obj
 
                 # format the object and append to the result
-                formatted_text = self.format_field(obj, format_spec) if format_spec else obj
-                results.append(formatted_text)
+                self._append(parts, self.format_field(obj, op.spec) if op.spec else obj)
+            elif isinstance(op, _I18nField):
+                ans = lang.require(op.scope, op.key)
+                _kwargs = {}
+                for arg in op.args:
+                    if arg.kv:
+                        k, v = arg.kv
+                        if v in kwargs:
+                            _kwargs[k] = kwargs[v]
+                            used_args.add(v)
+                        elif arg.value_ref is not None and arg.value_ref in kwargs:
+                            _kwargs[k] = _eval(v[1:], kwargs[arg.value_ref])
+                        else:
+                            _kwargs[k] = v
+                    elif arg.part in kwargs:
+                        _kwargs[arg.part] = kwargs[arg.part]
+                if _kwargs:
+                    ans = ans.format_map(_kwargs)
+                self._append(parts, ans)
+            else:
+                _args = []
+                _kwargs = {}
+                for arg in op.args:
+                    if arg.ref is not None and arg.ref in kwargs:
+                        _args.append(_eval(arg.part[1:], kwargs[arg.ref]))
+                    elif arg.kv:
+                        k, v = arg.kv
+                        if v in kwargs:
+                            _kwargs[k] = kwargs[v]
+                            used_args.add(v)
+                        elif arg.value_ref is not None and arg.value_ref in kwargs:
+                            _kwargs[k] = _eval(v[1:], kwargs[arg.value_ref])
+                        else:
+                            _kwargs[k] = v
+                    elif arg.part in kwargs:
+                        _args.append(kwargs[arg.part])
+                        used_args.add(arg.part)
+                    else:
+                        _args.append(arg.part)
+                self._append(parts, op.cls(*_args, **_kwargs))  # type: ignore
+
+        result = self.factory()
+        result.extend(parts)
+        return result, auto_arg_index
+
+    @staticmethod
+    def _append(parts: list[Segment], obj: Any) -> None:
+        """将格式化结果追加到消息段列表，并与末尾的文本段合并，等价于 `UniMessage + obj`
 
-        return functools.reduce(self._add, results), auto_arg_index
+        传入的消息段会先复制，`parts` 中的消息段均为新对象，可以原地合并而不影响调用方
+        """
+        try:
+            items: list[str | Segment] = []
+            _flatten(obj, items)
+        except TypeError:
+            items = [str(obj)]
+        for item in items:
+            last = parts[-1] if parts else None
+            if isinstance(item, str):
+                if isinstance(last, Text):
+                    last.text += item
+                else:
+                    parts.append(Text(item))
+            elif isinstance(item, Text) and isinstance(last, Text):
+                parts[-1] = last + item
+            else:
+                parts.append(item.clone())
 
     def format_field(self, value: Any, format_spec: str) -> Any:
         formatter: FormatSpecFunc | None = self.format_specs.get(format_spec)
@@ -240,9 +337,3 @@ class UniMessageTemplate(Formatter):
             obj = getattr(obj, value) if is_attr else obj[value]
 
         return obj, first
-
-    def _add(self, a: Any, b: Any) -> Any:
-        try:
-            return a + b
-        except TypeError:
-            return a + str(b)
@@ -1,4 +1,6 @@
+import asyncio
 import random
+import time
 from base64 import b64decode
 from collections.abc import Awaitable
 from pathlib import Path
@@ -14,9 +16,38 @@ from nonebot.typing import T_State
 from yarl import URL
 
 from .constraint import log
+from .mediaio import media_io
 from .segment import Image
 
 
+class TokenBucket:
+    """令牌桶限速器
+
+    Args:
+        rate: 每秒补充的令牌数
+        capacity: 桶容量，即允许的突发数量
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """获取一个令牌，令牌不足时等待"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
 async def reply_fetch(event: Event | None = None, bot: Bot | None = None):
     from .adapters import alter_get_builder
 
@@ -39,9 +70,9 @@ async def reply_fetch(event: Event | None = None, bot: Bot | None = None):
 
 async def image_fetch(event: Event, bot: Bot, state: T_State, img: Image, **kwargs) -> bytes | None:
     if img.raw:
-        return img.raw_bytes
+        return await img.raw_bytes_async()
     if img.path:
-        return Path(img.path).read_bytes()
+        return await media_io.read(img.path)
     adapter_name = bot.adapter.get_name()
     if adapter_name == "RedProtocol":
         origin = img.origin
@@ -90,7 +121,7 @@ async def image_fetch(event: Event, bot: Bot, state: T_State, img: Image, **kwar
         if not res.file_path:
             raise ActionFailed("Telegram", "get file failed")
         if (p := Path(res.file_path)).exists():  # telegram api local mode
-            return p.read_bytes()
+            return await media_io.read(p)
         url = URL(bot.bot_config.api_server) / "file" / f"bot{bot.bot_config.token}" / res.file_path
         req = Request("GET", url, **kwargs)
         resp = await bot.adapter.request(req)
@@ -166,19 +197,19 @@ async def get_bot(
         if index is not None:
             return list(get_bots().values())[index]
         return _get_bot(bot_id)
-    bots = []
-    for bot in get_bots().values():
-        if not predicate:
-
-            async def _check_adapter(bot: Bot):
-                _adapter = bot.adapter
-                if isinstance(adapter, str):
-                    return _adapter.get_name() == adapter
-                return isinstance(_adapter, adapter)  # type: ignore
-
-            predicate = _check_adapter
-        if await predicate(bot):
-            bots.append(bot)
+    if not predicate:
+
+        async def _check_adapter(bot: Bot):
+            _adapter = bot.adapter
+            if isinstance(adapter, str):
+                return _adapter.get_name() == adapter
+            return isinstance(_adapter, adapter)  # type: ignore
+
+        predicate = _check_adapter
+    # 各 Bot 的判断 (可能涉及拉取目标列表) 并发进行
+    candidates = list(get_bots().values())
+    results = await asyncio.gather(*(predicate(bot) for bot in candidates))
+    bots = [bot for bot, result in zip(candidates, results, strict=True) if result]
     log("TRACE", f"get bots: {bots}")
     if not bot_id:
         if rand:
@@ -0,0 +1,185 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import time
+from collections.abc import Awaitable
+from io import BytesIO
+from pathlib import Path
+from typing import Callable
+
+from nonebot.adapters import Bot
+from tarina import LRU
+
+from .constraint import log
+from .mediaio import MediaPayload
+from .segment import Media, MediaToUrl
+
+
+def content_digest(data: str | Path | bytes | BytesIO | MediaPayload) -> str:
+    """计算媒体内容的哈希
+
+    bytes 与 BytesIO 以内容计算；路径 (包括由文件提供的 MediaPayload) 以绝对路径、修改时间与大小计算，无需读取文件；
+    其余字符串 (如 url) 以其本身计算
+    """
+    if isinstance(data, MediaPayload):
+        if data.path is None:
+            return data.md5()
+        data = data.path
+    if isinstance(data, BytesIO):
+        with data.getbuffer() as view:
+            return hashlib.md5(view).hexdigest()
+    if isinstance(data, bytes):
+        return hashlib.md5(data).hexdigest()
+    if isinstance(data, Path) or (isinstance(data, str) and Path(data).is_file()):
+        path = Path(data).resolve()
+        stat = path.stat()
+        return hashlib.md5(f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest()
+    return hashlib.md5(data.encode()).hexdigest()
+
+
+def media_digest(seg: Media) -> str | None:
+    """计算媒体段内容的哈希，媒体段没有可用内容时返回 None"""
+    if seg.url:
+        return content_digest(seg.url)
+    if seg.path:
+        return content_digest(Path(seg.path))
+    if seg.raw:
+        return content_digest(seg.raw)
+    return None
+
+
+class UploadCache:
+    """媒体上传结果缓存
+
+    以 (适配器, Bot, 类别, 内容哈希) 为键，缓存上传后得到的 URL 或平台文件 id，
+    有效期内重复发送相同的媒体时不再重复上传。超出容量时淘汰最久未使用的记录。
+
+    Args:
+        size: 缓存容量
+        ttl: 缓存有效期 (秒)
+        store: 本地存储文件路径，为 None 时仅缓存在内存中
+        flush_interval: 写入本地存储的最小间隔 (秒)
+    """
+
+    def __init__(self, size: int = 1024, ttl: float = 86400, store: Path | None = None, flush_interval: float = 5):
+        self.enabled = False
+        self.ttl = ttl
+        self.store = store
+        self.flush_interval = flush_interval
+        self._cache: LRU[str, tuple[str, float]] = LRU(size)
+        self._dirty = False
+        self._saved = 0.0
+        self._flusher: asyncio.Task | None = None
+
+    @staticmethod
+    def key(adapter: str, bot: Bot | None, kind: str, digest: str) -> str:
+        return f"{adapter}|{bot.self_id if bot else ''}|{kind}|{digest}"
+
+    def get(self, key: str) -> str | None:
+        if not (item := self._cache.get(key)):
+            return None
+        value, expire = item
+        if expire < time.time():
+            del self._cache[key]
+            return None
+        return value
+
+    def set(self, key: str, value: str):
+        self._cache[key] = (value, time.time() + self.ttl)
+        self._mark_dirty()
+
+    def clear(self):
+        self._cache.clear()
+        self._mark_dirty()
+
+    def _mark_dirty(self):
+        if not self.store:
+            return
+        self._dirty = True
+        if self._flusher and not self._flusher.done():
+            return
+        try:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_later())
+        except RuntimeError:
+            # 没有运行中的事件循环时直接写入
+            self.save()
+
+    async def _flush_later(self):
+        await asyncio.sleep(max(self._saved + self.flush_interval - time.time(), 0))
+        if self._dirty:
+            self.save()
+
+    async def fetch(
+        self,
+        adapter: str,
+        bot: Bot | None,
+        kind: str,
+        digest: str | None,
+        upload: Callable[[], Awaitable[str]],
+    ) -> str:
+        """获取缓存的上传结果，未命中时调用 upload 上传并缓存其结果"""
+        if not self.enabled or digest is None:
+            return await upload()
+        key = self.key(adapter, bot, kind, digest)
+        if (value := self.get(key)) is not None:
+            return value
+        value = await upload()
+        self.set(key, value)
+        return value
+
+    def wrap(self, func: MediaToUrl) -> MediaToUrl:
+        """包装 `Media.to_url`，使其结果经过缓存"""
+        if getattr(func, "__upload_cached__", False):
+            return func
+
+        async def to_url(data: str | Path | bytes | BytesIO, bot: Bot | None, name: str | None = None) -> str:
+            return await self.fetch(
+                bot.adapter.get_name() if bot else "",
+                bot,
+                f"url:{name or ''}",
+                content_digest(data),
+                lambda: func(data, bot, name),
+            )
+
+        to_url.__upload_cached__ = True  # type: ignore
+        to_url.__wrapped__ = func  # type: ignore
+        return to_url
+
+    def load(self):
+        """从本地存储文件载入未过期的缓存"""
+        if not self.store or not self.store.exists():
+            return
+        try:
+            data: dict[str, list] = json.loads(self.store.read_text(encoding="utf-8"))
+        except Exception as e:
+            log("WARNING", f"load upload cache failed: {e}")
+            return
+        now = time.time()
+        for key, (value, expire) in sorted(data.items(), key=lambda item: item[1][1]):
+            if expire > now:
+                self._cache[key] = (value, expire)
+
+    async def flush(self):
+        """取消等待中的写入，并立即保存尚未写入的缓存"""
+        if self._flusher:
+            self._flusher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flusher
+            self._flusher = None
+        if self._dirty:
+            self.save()
+
+    def save(self):
+        self._dirty = False
+        self._saved = time.time()
+        if not self.store:
+            return
+        self.store.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.store.with_suffix(".tmp")
+        data = {key: list(item) for key, item in self._cache.items()}
+        temp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        temp.replace(self.store)
+
+
+upload_cache = UploadCache()
@@ -6,12 +6,61 @@ License: MIT
 """
 
 import json
+from functools import lru_cache
 from pathlib import Path
 
 with (Path(__file__).parent / "data.json").open(encoding="utf-8") as data_file:
     data = json.load(data_file)
 
 
+def _compile():
+    """将签名表按偏移量编译为字节前缀树
+
+    树的每个节点为 {字节: 子节点}，键 None 处记录在该节点结束的签名的 (表内序号, 签名长度)
+    """
+    tries: dict[int, dict] = {}
+    end = 0
+    for index, element in enumerate(data):
+        offset = element["offset"]
+        for signature in element["signature"]:
+            node = tries.setdefault(offset, {})
+            pattern = bytes.fromhex(signature)
+            for byte in pattern:
+                node = node.setdefault(byte, {})
+            node.setdefault(None, []).append((index, len(signature)))
+            end = max(end, offset + len(pattern))
+    return sorted(tries.items()), end
+
+
+_TRIES, _HEADER_SIZE = _compile()
+
+
+@lru_cache(maxsize=1024)
+def _match(header: bytes) -> tuple[tuple[str, ...], tuple[str, ...], tuple[str, ...]]:
+    hits = []
+    for offset, node in _TRIES:
+        for byte in header[offset:]:
+            if (node := node.get(byte)) is None:
+                break
+            if None in node:
+                hits.extend(node[None])
+    # 按签名表顺序回放匹配结果，保持与逐条比较时相同的排序
+    hits.sort()
+    types = {}
+    extensions = {}
+    mimes = {}
+    for index, length in hits:
+        element = data[index]
+        types[element["type"]] = length
+        extensions[element["extension"]] = length
+        mimes[element["mime"]] = length
+    return (
+        tuple(sorted(types, key=lambda x: types.get(x, False), reverse=True)),
+        tuple(sorted(extensions.keys(), key=lambda x: extensions.get(x, False), reverse=True)),
+        tuple(sorted(mimes.keys(), key=lambda x: mimes.get(x, False), reverse=True)),
+    )
+
+
 class Info:
     """
     Generates object with given arguments
@@ -57,23 +106,8 @@ def get(obj: bytes):
     if not isinstance(obj, bytes):
         raise TypeError("object type must be bytes")
 
-    stream = " ".join([f"{byte:02X}" for byte in obj])
-
-    types = {}
-    extensions = {}
-    mimes = {}
-    for element in data:
-        for signature in element["signature"]:
-            offset = element["offset"] * 2 + element["offset"]
-            if signature == stream[offset : len(signature) + offset]:
-                types[element["type"]] = len(signature)
-                extensions[element["extension"]] = len(signature)
-                mimes[element["mime"]] = len(signature)
-    return Info(
-        sorted(types, key=lambda x: types.get(x, False), reverse=True),
-        sorted(extensions.keys(), key=lambda x: extensions.get(x, False), reverse=True),
-        sorted(mimes.keys(), key=lambda x: mimes.get(x, False), reverse=True),
-    )
+    types, extensions, mimes = _match(obj[:_HEADER_SIZE])
+    return Info(list(types), list(extensions), list(mimes))
 
 
 def supported_types():
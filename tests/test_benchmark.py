@@ -0,0 +1,280 @@
+"""端到端分发与媒体类型识别基准测试
+
+默认跳过，设置环境变量 `ALCONNA_BENCHMARK=1` 后运行:
+
+    ALCONNA_BENCHMARK=1 pytest tests/test_benchmark.py -q
+
+- `ALCONNA_BENCHMARK_SIZES`: 响应器数量，逗号分隔，默认 `10,100,1000`
+- `ALCONNA_BENCHMARK_EVENTS`: 每个适配器投递的事件数，默认 `100`
+- `ALCONNA_BENCHMARK_OUTPUT`: 结果文件路径，默认 `benchmark.json`
+"""
+
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+from nonebot import get_adapter, get_driver
+from nonebot.log import logger
+from nonebug import App
+
+from tests.fake import (
+    fake_group_message_event_v11,
+    fake_message_event_discord,
+    fake_message_event_guild,
+    fake_message_event_satori,
+    fake_satori_bot_params,
+)
+
+pytestmark = pytest.mark.skipif(not os.getenv("ALCONNA_BENCHMARK"), reason="set ALCONNA_BENCHMARK=1 to run benchmarks")
+
+SIZES = [int(size) for size in os.getenv("ALCONNA_BENCHMARK_SIZES", "10,100,1000").split(",") if size]
+EVENTS = int(os.getenv("ALCONNA_BENCHMARK_EVENTS", "100"))
+OUTPUT = Path(os.getenv("ALCONNA_BENCHMARK_OUTPUT", "benchmark.json"))
+ALLOC_SAMPLES = 20
+
+RESULTS: list[dict] = []
+
+
+def _dump():
+    from nonebot_plugin_alconna import __version__
+
+    OUTPUT.write_text(
+        json.dumps(
+            {
+                "version": __version__,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": RESULTS,
+            },
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+
+
+def _percentile(data: list[float], percent: float) -> float:
+    data = sorted(data)
+    return data[min(len(data) - 1, int(len(data) * percent))]
+
+
+@contextmanager
+def _quiet_log():
+    """基准测试期间屏蔽 DEBUG/INFO 日志，避免日志输出主导测量结果"""
+    logger.configure(extra={"nonebot_log_level": "WARNING"})
+    try:
+        yield
+    finally:
+        logger.configure(extra={"nonebot_log_level": get_driver().config.log_level})
+
+
+def _make_matchers(size: int):
+    """按固定比例混合前缀、快捷指令、扩展与补全配置创建响应器"""
+    from nonebot_plugin_alconna import Alconna, Args, Extension, on_alconna
+    from nonebot_plugin_alconna.builtins.extensions.reply import ReplyRecordExtension
+
+    class BenchExtension(Extension):
+        @property
+        def priority(self) -> int:
+            return 20
+
+        @property
+        def id(self) -> str:
+            return "tests.benchmark:BenchExtension"
+
+        async def permission_check(self, bot, event, command) -> bool:
+            return True
+
+    result = []
+    for index in range(size):
+        kind = index % 5
+        if kind == 0:
+            matcher = on_alconna(Alconna(f"bench{index}", Args["content", str]))
+        elif kind == 1:
+            matcher = on_alconna(Alconna(["/", "!"], f"bench{index}", Args["num", int]))
+        elif kind == 2:
+            matcher = on_alconna(Alconna(["/"], f"bench{index}"))
+            matcher.shortcut(f"bs{index}", prefix=True)
+        elif kind == 3:
+            matcher = on_alconna(
+                Alconna(f"bench{index}", Args["content?", str]),
+                extensions=[ReplyRecordExtension(), BenchExtension()],
+            )
+        else:
+            matcher = on_alconna(Alconna(["/"], f"bench{index}", Args["num", int]), comp_config={"lite": True})
+
+        @matcher.handle()
+        async def _():
+            pass
+
+        result.append(matcher)
+    return result
+
+
+def _contents(size: int, count: int) -> list[str]:
+    """生成事件文本：一半命中某个命令，一半为普通聊天"""
+    contents = []
+    for index in range(count):
+        target = (index * 7919) % size
+        if index % 2:
+            contents.append(f"今天天气不错 {index}")
+            continue
+        kind = target % 5
+        if kind == 0:
+            contents.append(f"bench{target} hello")
+        elif kind == 1:
+            contents.append(f"!bench{target} {index}")
+        elif kind == 2:
+            contents.append(f"/bs{target}")
+        elif kind == 3:
+            contents.append(f"bench{target}")
+        else:
+            contents.append(f"/bench{target} {index}")
+    return contents
+
+
+def _adapters(ctx, contents: list[str]):
+    from nonebot.adapters.discord import Adapter as DiscordAdapter
+    from nonebot.adapters.discord import Bot as DiscordBot
+    from nonebot.adapters.onebot.v11 import Adapter as OneBot11Adapter
+    from nonebot.adapters.onebot.v11 import Bot as OneBot11Bot
+    from nonebot.adapters.onebot.v11 import Message as OneBot11Message
+    from nonebot.adapters.qq import Adapter as QQAdapter
+    from nonebot.adapters.qq import Bot as QQBot
+    from nonebot.adapters.qq import Message as QQMessage
+    from nonebot.adapters.satori import Adapter as SatoriAdapter
+    from nonebot.adapters.satori import Bot as SatoriBot
+    from nonebot.adapters.satori import Message as SatoriMessage
+
+    onebot11 = ctx.create_bot(base=OneBot11Bot, adapter=get_adapter(OneBot11Adapter), self_id="onebot11")
+    qq = ctx.create_bot(base=QQBot, adapter=get_adapter(QQAdapter), self_id="qq", bot_info=None)
+    satori = ctx.create_bot(base=SatoriBot, adapter=get_adapter(SatoriAdapter), **fake_satori_bot_params("satori"))
+    discord = ctx.create_bot(base=DiscordBot, adapter=get_adapter(DiscordAdapter), self_id="12345", bot_info=None)
+    return {
+        "onebot11": (
+            onebot11,
+            lambda: [fake_group_message_event_v11(message=OneBot11Message(text), user_id=123) for text in contents],
+        ),
+        "qq": (qq, lambda: [fake_message_event_guild(message=QQMessage(text)) for text in contents]),
+        "satori": (satori, lambda: [fake_message_event_satori(message=SatoriMessage(text)) for text in contents]),
+        "discord": (discord, lambda: [fake_message_event_discord(text) for text in contents]),
+    }
+
+
+async def _rule_latency(matchers, bot, events) -> list[float]:
+    """每个事件依次检查所有响应器规则的耗时"""
+    latencies = []
+    for event in events:
+        start = time.perf_counter()
+        for matcher in matchers:
+            await matcher.rule(bot, event, {})
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def _throughput(bot, events) -> float:
+    """经由 `handle_event` 完整处理事件的吞吐量"""
+    from nonebot.message import handle_event
+
+    start = time.perf_counter()
+    for event in events:
+        await handle_event(bot, event)
+    return len(events) / (time.perf_counter() - start)
+
+
+async def _allocations(bot, events) -> tuple[float, float]:
+    """每个事件的平均内存峰值 (KiB) 与平均新增内存块数"""
+    from nonebot.message import handle_event
+
+    peaks = []
+    blocks = []
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for event in events:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            allocated = sys.getallocatedblocks()
+            await handle_event(bot, event)
+            blocks.append(sys.getallocatedblocks() - allocated)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks) / 1024, sum(blocks) / len(blocks)
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("index", [False, True], ids=["scan", "index"])
+async def test_dispatch_benchmark(app: App, size: int, index: bool):
+    from nonebot_plugin_alconna import apply_dispatch_index
+
+    dispose = apply_dispatch_index() if index else None
+    matchers = _make_matchers(size)
+    contents = _contents(size, EVENTS)
+    try:
+        async with app.test_api() as ctx:
+            adapters = _adapters(ctx, contents)
+            with _quiet_log():
+                for name, (bot, make_events) in adapters.items():
+                    # 预热，建立各类缓存
+                    await _throughput(bot, make_events()[:10])
+                    latencies = await _rule_latency(matchers, bot, make_events())
+                    throughput = await _throughput(bot, make_events())
+                    peak, blocks = await _allocations(bot, make_events()[:ALLOC_SAMPLES])
+                    RESULTS.append(
+                        {
+                            "adapter": name,
+                            "matchers": size,
+                            "dispatch_index": index,
+                            "events": EVENTS,
+                            "events_per_sec": round(throughput, 2),
+                            "rule_p50_ms": round(_percentile(latencies, 0.5) * 1000, 4),
+                            "rule_p99_ms": round(_percentile(latencies, 0.99) * 1000, 4),
+                            "alloc_peak_kib": round(peak, 2),
+                            "alloc_blocks": round(blocks, 1),
+                        }
+                    )
+    finally:
+        if dispose:
+            dispose()
+        for matcher in matchers:
+            matcher.clean()
+    _dump()
+
+
+def test_fleep_benchmark():
+    """文件类型识别：逐条比较签名表 vs 前缀树索引 (冷/热缓存)"""
+    from nonebot_plugin_alconna.uniseg.utils import fleep
+    from tests.test_fleep_vendor import CORPUS, linear_get
+
+    rounds = 2000
+
+    def measure(func, clear=None) -> float:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            if clear:
+                clear()
+            for raw in CORPUS:
+                func(raw[:128])
+        return (time.perf_counter() - start) / (rounds * len(CORPUS)) * 1e6
+
+    linear = measure(linear_get)
+    cold = measure(fleep.get, fleep._match.cache_clear)
+    warm = measure(fleep.get)
+    RESULTS.append(
+        {
+            "benchmark": "fleep",
+            "linear_us": round(linear, 3),
+            "index_cold_us": round(cold, 3),
+            "index_warm_us": round(warm, 3),
+        }
+    )
+    _dump()
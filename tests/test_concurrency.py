@@ -0,0 +1,108 @@
+import asyncio
+import random
+
+import pytest
+from nonebot import get_adapter
+from nonebot.adapters import Event
+from nonebot.params import Depends
+from nonebot.typing import T_State
+from nonebug import App
+
+from tests.fake import fake_group_message_event_v11
+
+
+@pytest.mark.asyncio()
+async def test_rule_concurrency(app: App):
+    from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+
+    from nonebot_plugin_alconna import Alconna, Args, Extension, on_alconna
+    from nonebot_plugin_alconna.consts import ALCONNA_RESULT
+
+    mismatches = []
+
+    async def _event(event: Event):
+        return event
+
+    event_dep = Depends(_event, use_cache=False)
+
+    class SlowExtension(Extension):
+        @property
+        def priority(self) -> int:
+            return 1
+
+        @property
+        def id(self) -> str:
+            return "slow"
+
+        async def receive_wrapper(self, bot, event, command, receive):
+            await asyncio.sleep(random.random() / 100)
+            return receive
+
+        async def permission_check(self, bot, event, medium):
+            await asyncio.sleep(random.random() / 100)
+            if await self.inject(event_dep) is not event:
+                mismatches.append(("permission_check", event))
+            return True
+
+        async def parse_wrapper(self, bot, state, event, res) -> None:
+            await asyncio.sleep(random.random() / 100)
+            if await self.inject(event_dep) is not event:
+                mismatches.append(("parse_wrapper", event))
+            if res.matched and res.call(lambda event, state: (event, state)) != (event, state):
+                mismatches.append(("additional", event))
+
+    stress = on_alconna(
+        Alconna("stress", Args["num", int]),
+        extensions=[SlowExtension],
+        auto_send_output=False,
+        skip_for_unmatch=False,
+    )
+
+    async with app.test_api() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+        events = [
+            fake_group_message_event_v11(
+                message=Message("stress --help" if index % 3 == 0 else f"stress {index}"), user_id=index
+            )
+            for index in range(200)
+        ]
+        states = [{} for _ in events]
+        results = await asyncio.gather(
+            *(stress.rule(bot, event, state) for event, state in zip(events, states, strict=True))
+        )
+
+    assert all(results)
+    assert not mismatches
+    for index, state in enumerate(states):
+        res = state[ALCONNA_RESULT]
+        if index % 3 == 0:
+            assert res.output
+            assert not res.result.matched
+        else:
+            assert res.output is None
+            assert res.result.main_args["num"] == index
+    stress.clean()
+
+
+@pytest.mark.asyncio()
+async def test_arparma_call_in_handler(app: App):
+    from arclet.alconna import Arparma
+    from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+
+    from nonebot_plugin_alconna import Alconna, Args, on_alconna
+
+    matcher = on_alconna(Alconna("arp_call", Args["num", int]))
+
+    @matcher.handle()
+    async def _(arp: Arparma, matcher_state: T_State):
+        bot, event, state, num = arp.call(lambda bot, event, state, num: (bot, event, state, num))
+        assert state is matcher_state
+        await matcher.send(f"{bot.self_id} {event.get_user_id()} {num}")
+
+    async with app.test_matcher(matcher) as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter, self_id="42")
+        event = fake_group_message_event_v11(message=Message("arp_call 7"), user_id=123)
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "42 123 7")
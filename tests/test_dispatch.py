@@ -0,0 +1,70 @@
+import pytest
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+
+from tests.fake import fake_group_message_event_v11
+
+
+@pytest.mark.asyncio()
+async def test_dispatch_index(app: App):
+    from nonebot_plugin_alconna import Alconna, Args, apply_dispatch_index, on_alconna
+    from nonebot_plugin_alconna.dispatch import dispatch_index, literal_heads
+
+    dispose = apply_dispatch_index()
+    matchers = []
+    try:
+        echo = on_alconna(Alconna(["/"], "dispatch_echo", Args["content", str]))
+        other = on_alconna(Alconna(["/"], "dispatch_other"))
+        pattern = on_alconna(Alconna("dispatch_re{num:int}"))
+        matchers.extend([echo, other, pattern])
+
+        @echo.handle()
+        async def _(content: str):
+            await echo.send(content)
+
+        @other.handle()
+        async def _():
+            await other.send("other")
+
+        @pattern.handle()
+        async def _():
+            await pattern.send("pattern")
+
+        assert literal_heads(echo.command()) == {"/dispatch_echo"}
+        assert literal_heads(pattern.command()) is None
+
+        async with app.test_matcher([echo, other, pattern]) as ctx:
+            adapter = get_adapter(Adapter)
+            bot = ctx.create_bot(base=Bot, adapter=adapter)
+            event = fake_group_message_event_v11(message=Message("/dispatch_echo hello"), user_id=123)
+            ctx.receive_event(bot, event)
+            ctx.should_pass_rule(echo)
+            ctx.should_not_pass_rule(other)
+            ctx.should_not_pass_rule(pattern)
+            ctx.should_call_send(event, "hello")
+            event1 = fake_group_message_event_v11(message=Message("dispatch_re123"), user_id=123)
+            ctx.receive_event(bot, event1)
+            ctx.should_call_send(event1, "pattern")
+
+        result = dispatch_index.lookup("/dispatch_echo hello")
+        assert result is not None
+        assert id(echo._rule) in result
+        assert id(other._rule) not in result
+        assert dispatch_index.lookup("'/dispatch_echo' hello") is None
+
+        other.shortcut("dispatch_alias", prefix=True)
+
+        async with app.test_matcher(other) as ctx:
+            adapter = get_adapter(Adapter)
+            bot = ctx.create_bot(base=Bot, adapter=adapter)
+            event = fake_group_message_event_v11(message=Message("/dispatch_alias"), user_id=123)
+            ctx.receive_event(bot, event)
+            ctx.should_call_send(event, "other")
+
+        assert "/dispatch_alias" in literal_heads(other.command())  # type: ignore
+        assert id(other._rule) in dispatch_index.lookup("/dispatch_alias")  # type: ignore
+    finally:
+        dispose()
+        for matcher in matchers:
+            matcher.clean()
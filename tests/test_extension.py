@@ -153,3 +153,120 @@ async def test_extension_permission(app: App):
         event = fake_group_message_event_v11(message=Message("calc add 1 2"), user_id=456)
         ctx.receive_event(bot, event)
         ctx.should_not_pass_rule()
+
+
+@pytest.mark.asyncio()
+async def test_extension_chains(app: App):
+    from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+
+    from nonebot_plugin_alconna import Extension, add_global_extension, on_alconna
+    from nonebot_plugin_alconna.extension import ExtensionExecutor
+
+    class StaticExtension(Extension):
+        @property
+        def priority(self) -> int:
+            return 5
+
+        @property
+        def id(self) -> str:
+            return "static"
+
+        async def permission_check(self, bot, event, medium):
+            return True
+
+    class DynamicExtension(Extension):
+        using = True
+
+        @property
+        def priority(self) -> int:
+            return 1
+
+        @property
+        def id(self) -> str:
+            return "dynamic"
+
+        def validate(self, bot, event) -> bool:
+            return self.using
+
+        async def send_wrapper(self, bot, event, send):
+            return send
+
+    dynamic = DynamicExtension()
+    mat = on_alconna(Alconna("chains"), extensions=[StaticExtension, dynamic])
+    executor = mat.executor
+
+    async with app.test_api() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+        event = fake_group_message_event_v11(message=Message("chains"), user_id=123)
+        selected = executor.select(bot, event)
+        assert [ext.id for ext in selected.context] == ["dynamic", "static", "!default"]
+        assert [ext.id for ext in selected.chains["permission_check"]] == ["static"]
+        assert executor.select(bot, event) is selected
+
+        dynamic.using = False
+        assert [ext.id for ext in executor.select(bot, event).context] == ["static", "!default"]
+        dynamic.using = True
+        assert executor.select(bot, event) is selected
+
+        class GlobalExtension(StaticExtension):
+            @property
+            def id(self) -> str:
+                return "global"
+
+        global_ext = GlobalExtension()
+        add_global_extension(global_ext)
+        try:
+            selected = executor.select(bot, event)
+            assert [ext.id for ext in selected.chains["permission_check"]] == ["static", "global"]
+        finally:
+            ExtensionExecutor.globals.remove(global_ext)
+    mat.clean()
+
+
+@pytest.mark.asyncio()
+async def test_shared_extension_executor(app: App):
+    import asyncio
+
+    from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+
+    from nonebot_plugin_alconna import Extension, on_alconna
+
+    seen = []
+
+    class SharedExtension(Extension):
+        @property
+        def priority(self) -> int:
+            return 5
+
+        @property
+        def id(self) -> str:
+            return "shared"
+
+        async def permission_check(self, bot, event, medium):
+            executor = self.executor
+            await asyncio.sleep(0.01)
+            # 并发的规则检查各自看到所属的执行器
+            seen.append((str(event.get_message()), executor, self.executor))
+            return True
+
+    shared = SharedExtension()
+    mat_a = on_alconna(Alconna("shared_a"), extensions=[shared])
+    mat_b = on_alconna(Alconna("shared_b"), extensions=[shared])
+    fallback = shared._executor
+
+    async with app.test_api() as ctx:
+        bot = ctx.create_bot(base=Bot, adapter=get_adapter(Adapter))
+        event_a = fake_group_message_event_v11(message=Message("shared_a"), user_id=123)
+        event_b = fake_group_message_event_v11(message=Message("shared_b"), user_id=123)
+        rule_a, rule_b = mat_a.executor._rule, mat_b.executor._rule
+        assert all(await asyncio.gather(rule_a(bot, event_a, {}), rule_b(bot, event_b, {})))
+
+    assert sorted(seen, key=lambda item: item[0]) == [
+        ("shared_a", mat_a.executor, mat_a.executor),
+        ("shared_b", mat_b.executor, mat_b.executor),
+    ]
+    # 选择扩展不会改写共用实例上的执行器
+    assert shared._executor is fallback
+    mat_a.clean()
+    mat_b.clean()
@@ -1,10 +1,53 @@
+import random
+
+raw_png = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00\x00\x00\x0cIDAT\x08\x99c```\x00\x00\x00\x04\x00\x01\x1d\x00\x00\x00\x00IEND\xaeB`\x82"  # noqa: E501
+raw_jpeg = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x01\x00`\x00`\x00\x00\xff\xdb\x00C\x00\x02\x01\x01\x02\x01\x01\x02\x02\x02\x02\x02\x02\x02\x02\x03\x05\x03\x03\x03\x03\x03\x06\x04\x04\x03\x05\x07\x06\x07\x07\x07\x06\x07\x07\x08\t\x0b\t\x08\x08\n\x08\x07\x07\t\x0c\x0f\x0c\x0c\x0b\x0f\x0b\x07\x08\x0e\x0f\x0d\x0e\x0c\x0d\x0d\x0d\x0e\xff\xdb\x00C\xff\xd9"  # noqa: E501
+raw_gif = b"GIF89a\x01\x00\x01\x00\x80\x01\x00\x00\x00\x00ccc\x00\x00\x00\x00\x00\x00!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"  # noqa: E501
+
+CORPUS = [raw_png, raw_jpeg, raw_gif]
+
+
+def linear_get(obj: bytes):
+    """逐条比较签名表的原始实现，用作对照"""
+    from nonebot_plugin_alconna.uniseg.utils.fleep import data
+
+    stream = " ".join([f"{byte:02X}" for byte in obj])
+    types = {}
+    extensions = {}
+    mimes = {}
+    for element in data:
+        for signature in element["signature"]:
+            offset = element["offset"] * 2 + element["offset"]
+            if signature == stream[offset : len(signature) + offset]:
+                types[element["type"]] = len(signature)
+                extensions[element["extension"]] = len(signature)
+                mimes[element["mime"]] = len(signature)
+    return (
+        sorted(types, key=lambda x: types.get(x, False), reverse=True),
+        sorted(extensions.keys(), key=lambda x: extensions.get(x, False), reverse=True),
+        sorted(mimes.keys(), key=lambda x: mimes.get(x, False), reverse=True),
+    )
+
+
 def test_fleep():
     from nonebot_plugin_alconna.uniseg.utils.fleep import get
 
-    raw_png = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00\x00\x00\x0cIDAT\x08\x99c```\x00\x00\x00\x04\x00\x01\x1d\x00\x00\x00\x00IEND\xaeB`\x82"  # noqa: E501
-    raw_jpeg = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x01\x00`\x00`\x00\x00\xff\xdb\x00C\x00\x02\x01\x01\x02\x01\x01\x02\x02\x02\x02\x02\x02\x02\x02\x03\x05\x03\x03\x03\x03\x03\x06\x04\x04\x03\x05\x07\x06\x07\x07\x07\x06\x07\x07\x08\t\x0b\t\x08\x08\n\x08\x07\x07\t\x0c\x0f\x0c\x0c\x0b\x0f\x0b\x07\x08\x0e\x0f\x0d\x0e\x0c\x0d\x0d\x0d\x0e\xff\xdb\x00C\xff\xd9"  # noqa: E501
-    raw_gif = b"GIF89a\x01\x00\x01\x00\x80\x01\x00\x00\x00\x00ccc\x00\x00\x00\x00\x00\x00!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"  # noqa: E501
-
     assert get(raw_png).mimes == ["image/png"]
     assert get(raw_jpeg).mimes == ["image/jpeg"]
     assert get(raw_gif).mimes == ["image/gif"]
+
+
+def test_fleep_index():
+    from nonebot_plugin_alconna.uniseg.utils.fleep import data, get
+
+    rand = random.Random(0)
+    headers = [*CORPUS, b"", b"\x00" * 128]
+    for element in data:
+        for signature in element["signature"]:
+            header = bytearray(rand.randbytes(128))
+            pattern = bytes.fromhex(signature)
+            header[element["offset"] : element["offset"] + len(pattern)] = pattern
+            headers.append(bytes(header))
+    for header in headers:
+        info = get(header)
+        assert (info.types, info.extensions, info.mimes) == linear_get(header)
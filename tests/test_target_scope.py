@@ -1,4 +1,6 @@
 import asyncio
+import time
+from datetime import datetime, timezone
 
 import pytest
 from nonebot import get_adapter, get_driver, on_command
@@ -64,6 +66,8 @@ async def test_bots(app: App):
 @pytest.mark.asyncio()
 async def test_enable(app: App, mocker: MockerFixture):
     from nonebot_plugin_alconna import Target, apply_fetch_targets
+    from nonebot_plugin_alconna.uniseg import get_fetcher
+    from nonebot_plugin_alconna.uniseg.target import TARGET_INDEX
 
     # 结束后会自动恢复到原来的状态
     mocker.patch("nonebot_plugin_alconna.uniseg._enable_fetch_targets", False)
@@ -106,12 +110,144 @@ async def test_enable(app: App, mocker: MockerFixture):
         with pytest.raises(IndexError):
             await Target("11", adapter=QQAdapter).select()
 
+        assert TARGET_INDEX.lookup(Target("13")) == {satori_bot1.self_id, satori_bot2.self_id}
+        assert TARGET_INDEX.lookup(Target("23", parent_id="12")) == set()
+        get_fetcher(satori_bot1).discard(satori_bot1.self_id)  # type: ignore
+        assert TARGET_INDEX.lookup(Target("13")) == {satori_bot2.self_id}
+
+        # 已缓存的 Bot 均不满足时，才拉取未缓存 Bot 的目标列表
+        ctx.should_call_api("friend_list", {}, PageResult(data=[Friend(user=User(id="99", name="test3"))]))
+        assert await Target("99", private=True).select() is satori_bot1
+
     # 清理
     driver = get_driver()
     driver._bot_connection_hook.clear()
     driver._bot_disconnection_hook.clear()
 
 
+@pytest.mark.asyncio()
+async def test_fetch_update(app: App):
+    from datetime import timedelta
+
+    from nonebot.adapters.onebot.v11.event import GroupDecreaseNoticeEvent, GroupIncreaseNoticeEvent
+
+    from nonebot_plugin_alconna import Target
+    from nonebot_plugin_alconna.uniseg.adapters.onebot11.target import Onebot11TargetFetcher
+    from nonebot_plugin_alconna.uniseg.target import TARGET_INDEX
+
+    fetcher = Onebot11TargetFetcher()
+
+    def notice(cls, notice_type: str, group_id: int, sub_type: str):
+        return cls(
+            time=1000000,
+            self_id=4,
+            post_type="notice",
+            notice_type=notice_type,
+            sub_type=sub_type,
+            user_id=4,
+            group_id=group_id,
+            operator_id=0,
+        )
+
+    async with app.test_api() as ctx:
+        bot = ctx.create_bot(base=Onebot11Bot, adapter=get_adapter(Onebot11Adapter), self_id="4")
+        selector = fetcher.get_selector(bot)
+        ctx.should_call_api("get_group_list", {}, [{"group_id": 1}])
+        assert await selector(Target("1"))
+
+        assert fetcher.update(bot, notice(GroupIncreaseNoticeEvent, "group_increase", 2, "approve"))
+        assert await selector(Target("2"))
+        assert TARGET_INDEX.lookup(Target("2")) == {"4"}
+        assert fetcher.update(bot, notice(GroupDecreaseNoticeEvent, "group_decrease", 1, "kick_me"))
+        assert not await selector(Target("1"))
+        assert TARGET_INDEX.lookup(Target("1")) == set()
+
+        # 过期后未命中的查询不等待刷新，而是在后台刷新
+        fetcher.last_refresh["4"] -= timedelta(seconds=fetcher.ttl)
+        ctx.should_call_api("get_group_list", {}, [{"group_id": 3}])
+        ctx.should_call_api("get_friend_list", {}, [])
+        assert not await selector(Target("3"))
+        await fetcher._tasks["4"]
+        assert await selector(Target("3"))
+        assert not fetcher.expired("4")
+
+    fetcher.discard("4")
+
+
+def test_fetch_persist(tmp_path, mocker: MockerFixture):
+    from nonebot_plugin_alconna import Target
+    from nonebot_plugin_alconna.uniseg.adapters.satori.target import SatoriTargetFetcher
+    from nonebot_plugin_alconna.uniseg.target import TARGET_INDEX, TargetFetcher
+
+    mocker.patch.object(TargetFetcher, "store", tmp_path)
+    fetcher = SatoriTargetFetcher()
+    assert not fetcher.restore("chronocat:9")
+    fetcher.add("chronocat:9", Target("91", private=True, adapter=fetcher.get_adapter(), self_id="chronocat:9"))
+    fetcher.add("chronocat:9", Target("93", "92", channel=True, adapter=fetcher.get_adapter(), self_id="chronocat:9"))
+    fetcher.last_refresh["chronocat:9"] = datetime.now(timezone.utc)
+    fetcher.save("chronocat:9")
+    fetcher.discard("chronocat:9")
+
+    restored = SatoriTargetFetcher()
+    assert restored.restore("chronocat:9")
+    assert restored.cache["chronocat:9"] == {
+        Target("91", private=True, adapter=fetcher.get_adapter(), self_id="chronocat:9"),
+        Target("93", "92", channel=True, adapter=fetcher.get_adapter(), self_id="chronocat:9"),
+    }
+    assert TARGET_INDEX.lookup(Target("93", channel=True)) == {"chronocat:9"}
+    assert not restored.expired("chronocat:9")
+    restored.discard("chronocat:9")
+
+
+@pytest.mark.asyncio()
+async def test_broadcast(app: App, mocker: MockerFixture):
+    from nonebot_plugin_alconna import SupportAdapter, Target, UniMessage
+    from nonebot_plugin_alconna.uniseg.adapters.onebot11.exporter import Onebot11MessageExporter
+
+    export = mocker.spy(Onebot11MessageExporter, "export")
+    targets = [
+        Target("1", self_id="4"),
+        Target("2", self_id="4"),
+        Target("3", private=True, self_id="5"),
+        Target("9", adapter=SupportAdapter.qq),
+    ]
+
+    async with app.test_api() as ctx:
+        onebot11_adapter = get_adapter(Onebot11Adapter)
+        ctx.create_bot(base=Onebot11Bot, adapter=onebot11_adapter, self_id="4")
+        ctx.create_bot(base=Onebot11Bot, adapter=onebot11_adapter, self_id="5")
+        message = [MessageSegment(type="text", data={"text": "hello"})]
+        ctx.should_call_api("send_msg", {"message_type": "group", "group_id": 1, "message": message}, {"message_id": 1})
+        ctx.should_call_api(
+            "send_msg", {"message_type": "private", "user_id": 3, "message": message}, {"message_id": 3}
+        )
+        ctx.should_call_api("send_msg", {"message_type": "group", "group_id": 2, "message": message}, {"message_id": 2})
+        result = await UniMessage.text("hello").broadcast(targets, concurrency=1, rate=1000)
+
+    assert export.call_count == 2
+    assert sorted(receipt.context.id for receipt in result.receipts) == ["1", "2", "3"]  # type: ignore
+    assert [target.id for target, _ in result.failures] == ["9"]
+    assert not result.success
+
+    # 被限速的 Bot 等待令牌时不占用全局并发名额
+    sent: dict[str, float] = {}
+
+    async def send_to(self, target, bot, message, **kwargs):
+        sent[target.id] = time.perf_counter()
+        return {"message_id": target.id}
+
+    mocker.patch.object(Onebot11MessageExporter, "send_to", send_to)
+    targets = [Target("1", self_id="4"), Target("2", self_id="4"), Target("3", self_id="4"), Target("4", self_id="5")]
+    async with app.test_api() as ctx:
+        ctx.create_bot(base=Onebot11Bot, adapter=onebot11_adapter, self_id="4")
+        ctx.create_bot(base=Onebot11Bot, adapter=onebot11_adapter, self_id="5")
+        start = time.perf_counter()
+        result = await UniMessage.text("hello").broadcast(targets, concurrency=1, rate=5)
+    assert result.success
+    assert sent["4"] - start < 0.15
+    assert sent["3"] - start >= 0.35
+
+
 @pytest.mark.asyncio()
 async def test_switch(app: App, mocker: MockerFixture):
     from nonebot.adapters.qq import Message
@@ -1,3 +1,5 @@
+import os
+
 import pytest
 from arclet.alconna import Alconna, Args
 from nonebot import get_adapter
@@ -17,10 +19,14 @@ def ansi(*code) -> str:
 def test_uniseg():
     from nonebot_plugin_alconna import Other, Segment, Text, Video, select
     from nonebot_plugin_alconna.uniseg import FallbackSegment
+    from nonebot_plugin_alconna.uniseg.segment import get_segment_class
 
     assert str(Other(FallbackSegment.text("123"))) == "[text]"
     assert str(Segment()) == "[segment]"
     assert str(Text("123")) == "123"
+    assert not hasattr(Text("123"), "__dict__")
+    assert Text("123") == Text("123")()
+    assert get_segment_class("text") is Text
 
     text = Text("hello world").color("red", 0, -3).italic(3, -2)
     assert text.split() == [Text("hello").color("red").italic(3), Text("world").color("red", 0, -3).italic(0, -2)]
@@ -32,7 +38,18 @@ def test_uniseg():
         Text("world").color("red").italic(),
         Text("man").italic(0, 1),
     ]
+    # 连续分隔符产生的空片段不带样式
+    parts = Text("a  b").bold(0, 4).split(" ")
+    assert parts == [Text("a").bold(), Text(""), Text("b").bold()]
+    assert parts[1].styles == {}
     assert text1.replace("o", "e") == Text("helle werld man").color("red", 0, -3).italic(3, -2)
+
+    text3 = Text("abcdef").bold(0, 2).bold(2, 4).italic(1, 5)
+    assert text3.styles == {(0, 1): ["bold"], (1, 4): ["bold", "italic"], (4, 5): ["italic"]}
+    assert text3[2:6].styles == {(0, 2): ["bold", "italic"], (2, 3): ["italic"]}
+    text3.styles[(5, 6)] = ["italic"]
+    assert str(text3) == "<bold>a<italic>bcd</italic></bold><italic>ef</italic>"
+    assert text3.styles == {(0, 1): ["bold"], (1, 4): ["bold", "italic"], (4, 6): ["italic"]}
     assert f"{text1:#}" == f"{ansi(31)}hel{ansi(0)}{ansi(31, 3)}lo world {ansi(0)}{ansi(3)}m{ansi(0)}an"
     pat = select(Text)
     assert pat.first.validate(Text("foobar")).value() == Text("foobar")
@@ -57,7 +74,7 @@ def test_uniseg():
 
 
 def test_unimsg():
-    from nonebot_plugin_alconna import At, Other, Segment, Text, UniMessage
+    from nonebot_plugin_alconna import At, Image, Other, Segment, Text, UniMessage
     from nonebot_plugin_alconna.uniseg import FallbackSegment
 
     msg = UniMessage([Other(FallbackSegment.text("123")), Segment(), Text("123")])
@@ -91,6 +108,167 @@ def test_unimsg():
 
     assert UniMessage.text("123").style("\n", "br").text("456").export_sync(adapter="OneBot V11") == Message("123\n456")
 
+    image = Image(raw=b"123")(Text("child"))
+    image.origin = MessageSegment.image(b"123")
+    msg3 = UniMessage([Text("abc").bold(), image])
+    msg4 = msg3.copy()
+    assert msg4 == msg3
+    assert msg4[1].origin is image.origin
+    assert msg4[1].raw is image.raw  # type: ignore
+    msg4[0].color("red")  # type: ignore
+    msg4[1].children[0].text = "changed"  # type: ignore
+    assert msg3[0] == Text("abc").bold()
+    assert image.children == [Text("child")]
+
+
+def test_lazy_adapter_loaders():
+    from pathlib import Path
+
+    from nonebot_plugin_alconna.uniseg import adapters, import_cost_report
+
+    packages = {path.name for path in Path(adapters.__file__).parent.iterdir() if path.is_dir() and path.name[0] != "_"}
+    assert packages == {module[1:] for module in adapters._BUILTIN_LOADERS.values()}
+    assert adapters.alter_get_builder("OneBot V11")
+    assert "OneBot V11" in import_cost_report()
+
+
+def test_custom_builder_dispatch():
+    from nonebot_plugin_alconna.uniseg import Other, Text, custom_register
+    from nonebot_plugin_alconna.uniseg.adapters import alter_get_builder
+
+    builder = alter_get_builder("OneBot V11")
+    assert builder
+    seg = MessageSegment("test_custom_dispatch", {"text": "foo"})
+    assert isinstance(builder.convert(seg), Other)
+    assert "test_custom_dispatch" in builder._custom_table
+
+    @custom_register(Text, lambda x: x.type == "test_custom_dispatch" and x.data["text"] == "bar")
+    def _(builder, seg):
+        return Text("predicate")
+
+    @custom_register(Text, "test_custom_dispatch")
+    def _(builder, seg):
+        return Text(seg.data["text"])
+
+    assert builder.convert(seg) == Text("foo")
+    assert builder.convert(MessageSegment("test_custom_dispatch", {"text": "bar"})) == Text("predicate")
+
+
+def test_segment_data():
+    from dataclasses import dataclass, field
+
+    from nonebot_plugin_alconna.uniseg import Image, Segment, Text
+    from nonebot_plugin_alconna.uniseg.segment import data_fields
+
+    @dataclass
+    class DataCustom(Segment):
+        foo: str
+        bar: int = field(default=1)
+
+    @dataclass
+    class DataSub(DataCustom):
+        baz: bool = False
+
+    assert Text("hello").bold(0, 2).data == {"text": "hello", "styles": {(0, 2): ["bold"]}}
+    assert set(Image(url="https://example.com/a.png").data) == {
+        "id",
+        "url",
+        "path",
+        "raw",
+        "mimetype",
+        "name",
+        "width",
+        "height",
+        "sticker",
+    }
+
+    custom = DataCustom("x")(Text("child"))
+    assert custom.data == {"foo": "x", "bar": 1}
+    assert custom.dump() == {
+        "type": "datacustom",
+        "foo": "x",
+        "bar": 1,
+        "children": [{"type": "text", "text": "child"}],
+    }
+    assert data_fields(DataSub) == ("foo", "bar", "baz")
+    assert DataSub("y", baz=True)(Text("child")).data == {"foo": "y", "bar": 1, "baz": True}
+    assert data_fields(DataCustom) == ("foo", "bar")
+
+
+def test_segment_fingerprint():
+    from nonebot_plugin_alconna.argv import MessageArgv
+    from nonebot_plugin_alconna.uniseg import At, Button, CustomNode, Image, Keyboard, Reference, Text
+
+    image = Image(raw=b"\x89PNG" * 1024)
+    assert image.fingerprint() == Image(raw=b"\x89PNG" * 1024).fingerprint()
+    assert image.fingerprint() != Image(raw=b"\x89PNG" * 1023).fingerprint()
+    assert image._fingerprint_[1] == image.fingerprint()  # type: ignore
+    assert image.clone().fingerprint() == image.fingerprint()
+    assert At("user", "123", "foo").fingerprint() == At("user", "123", "bar").fingerprint()
+    assert At("user", "123").fingerprint() != At("role", "123").fingerprint()
+    assert Text("abc").fingerprint() != Text("abc").mark(0, 1, "bold").fingerprint()
+
+    keyboard = Keyboard(buttons=[Button("action", "foo", id="1")])
+    before = keyboard.fingerprint()
+    keyboard(Button("action", "bar", id="2"))
+    assert keyboard.fingerprint() != before
+
+    mutable = Image(raw=b"\x89PNG")
+    before = mutable.fingerprint()
+    mutable.raw = b"GIF89a"
+    assert mutable.fingerprint() == Image(raw=b"GIF89a").fingerprint() != before
+
+    reference = Reference("1")
+    before = reference.fingerprint()
+    reference(CustomNode("2", "node", "content"))
+    assert reference.fingerprint() != before
+    before = reference.fingerprint()
+    reference.children.append(CustomNode("3", "node", "other"))
+    assert reference.fingerprint() != before
+
+    token = MessageArgv.generate_token(["cmd", image, At("user", "123")])
+    assert token == MessageArgv.generate_token(["cmd", Image(raw=b"\x89PNG" * 1024), At("user", "123")])
+    assert token != MessageArgv.generate_token(["cmd", Image(url="https://example.com/a.png"), At("user", "123")])
+
+
+@pytest.mark.asyncio()
+async def test_concurrent_export():
+    import asyncio
+    import time
+
+    from nonebot_plugin_alconna.uniseg import Image, Text, UniMessage
+    from nonebot_plugin_alconna.uniseg.exporter import MessageExporter, export
+
+    class SlowExporter(MessageExporter[Message]):
+        def get_message_type(self):
+            return Message
+
+        @classmethod
+        def get_adapter(cls):
+            return "SlowAdapter"
+
+        def get_message_id(self, send_response):
+            return ""
+
+        async def send_to(self, target, bot, message, **kwargs):
+            pass
+
+        @export
+        async def text(self, seg: Text, bot: Bot | None) -> "MessageSegment":
+            return MessageSegment.text(seg.text)
+
+        @export(concurrent=True)
+        async def image(self, seg: Image, bot: Bot | None) -> "MessageSegment":
+            await asyncio.sleep(0.2 if seg.id == "a" else 0.1)
+            return MessageSegment.image(seg.id)  # type: ignore
+
+    exporter = SlowExporter()
+    msg = UniMessage([Image(id="a"), Text("x"), Image(id="b"), Image(id="c")])
+    start = time.perf_counter()
+    res = await exporter.export(msg, None, True)
+    assert time.perf_counter() - start < 0.35
+    assert res == Message([MessageSegment.image("a"), "x", MessageSegment.image("b"), MessageSegment.image("c")])
+
 
 def test_persistence():
     from nonebot_plugin_alconna import Image, UniMessage
@@ -168,6 +346,21 @@ async def test_unimsg_template(app: App):
     assert UniMessage.template("{:At(flag=user, target=id)}").format(id="123") == UniMessage(At("user", "123"))
     assert UniMessage.template("{:At(flag=user, target=123)}").format() == UniMessage(At("user", "123"))
     assert UniMessage.template("{foo.target}").format(foo=At("user", "123")) == UniMessage("123")
+    template = UniMessage.template("{} {name}{:At(user, target)}")
+    for _ in range(2):
+        assert template.format(Text("hi").color("red"), name="foo", target="123") == UniMessage(
+            [Text("hi foo").color("red", 0, 2), At("user", "123")]
+        )
+    # 格式化不修改也不复用传入的消息段
+    text, at, msg = Text("hi"), At("user", "123"), UniMessage([Text("a"), At("user", "456")])
+    result = UniMessage.template("{} {name}{}{}").format(text, at, msg, name="foo")
+    assert result == UniMessage([Text("hi foo"), At("user", "123"), Text("a"), At("user", "456")])
+    assert text == Text("hi")
+    assert msg == UniMessage([Text("a"), At("user", "456")])
+    assert result[0] is not text
+    assert result[1] is not at
+    assert all(seg is not orig for seg in result for orig in msg)
+    assert UniMessage.template("{}").format(at)[0] is not at
 
     matcher = on_alconna(Alconna("test_unimsg_template"))
 
@@ -255,6 +448,65 @@ async def test_uniseg_recv(app: App):
         assert msg[UniReply, 0].msg
 
 
+@pytest.mark.asyncio()
+async def test_event_message_cache(app: App):
+    from nonebot import on_message
+
+    from nonebot_plugin_alconna import UniMsg, at_me, on_alconna
+    from nonebot_plugin_alconna.uniseg import message_cache_clear, message_cache_info
+
+    matcher = on_alconna("cache_test")
+    other = on_alconna("cache_test_other")
+    at_matcher = on_message(rule=at_me())
+
+    @matcher.handle()
+    async def _(msg: UniMsg):
+        await matcher.send(str(msg))
+
+    message_cache_clear()
+    async with app.test_matcher([matcher, other, at_matcher]) as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+        event = fake_group_message_event_v11(
+            message=Message("cache_test"), original_message=Message("cache_test"), user_id=123
+        )
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "cache_test")
+    info = message_cache_info()
+    assert info.misses == 2  # message and original_message
+    assert info.hits == 1
+
+
+@pytest.mark.asyncio()
+async def test_event_message_isolated(app: App):
+    from nonebot import on_message
+
+    from nonebot_plugin_alconna import OriginalUniMsg, Text, UniMsg
+
+    first = on_message(priority=1, block=False)
+    second = on_message(priority=2, block=False)
+
+    @first.handle()
+    async def _(msg: UniMsg, origin: OriginalUniMsg):
+        msg.append(Text("!"))
+        origin.pop()
+        await first.send(str(msg))
+
+    @second.handle()
+    async def _(msg: UniMsg, origin: OriginalUniMsg):
+        await second.send(f"{msg}|{origin}")
+
+    async with app.test_matcher([first, second]) as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+        event = fake_group_message_event_v11(message=Message("isolated"), user_id=123)
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "isolated!")
+        ctx.should_call_send(event, "isolated|isolated")
+    first.destroy()
+    second.destroy()
+
+
 @pytest.mark.asyncio()
 async def test_unimsg_send(app: App):
     from nonebot_plugin_alconna import MsgId, Target, UniMessage, on_alconna
@@ -308,3 +560,300 @@ async def test_unimsg_send(app: App):
         )
         target = Target("456", adapter=adapter.get_name())
         await target.send("hello!")
+
+
+@pytest.mark.asyncio()
+async def test_upload_cache(app: App, tmp_path):
+    from nonebot_plugin_alconna import Image, apply_media_to_url, apply_upload_cache
+    from nonebot_plugin_alconna.uniseg.upload import UploadCache, upload_cache
+
+    uploaded = []
+
+    async def to_url(data, bot, name=None):
+        uploaded.append(data)
+        return f"https://example.com/{len(uploaded)}"
+
+    # 全局缓存的设置在测试结束后恢复
+    ttl = upload_cache.ttl
+    apply_media_to_url(to_url)
+    dispose = apply_upload_cache(ttl=60)
+    try:
+        assert await Image.to_url(b"banner", None) == "https://example.com/1"  # type: ignore
+        assert await Image.to_url(b"banner", None) == "https://example.com/1"  # type: ignore
+        assert await Image.to_url(b"sticker", None) == "https://example.com/2"  # type: ignore
+        assert len(uploaded) == 2
+
+        upload_cache.ttl = -1
+        upload_cache.clear()
+        await Image.to_url(b"banner", None)  # type: ignore
+        await Image.to_url(b"banner", None)  # type: ignore
+        assert len(uploaded) == 4
+    finally:
+        upload_cache.ttl = ttl
+        dispose()
+        apply_media_to_url(None)  # type: ignore
+        upload_cache.clear()
+
+    # 启用期间替换的上传函数在移除缓存后仍然保留
+    async def other_to_url(data, bot, name=None):
+        return "https://example.com/other"
+
+    dispose = apply_upload_cache()
+    try:
+        apply_media_to_url(other_to_url)
+        dispose()
+        assert Image.to_url is other_to_url
+    finally:
+        upload_cache.ttl = ttl
+        apply_media_to_url(None)  # type: ignore
+        upload_cache.clear()
+
+    cache = UploadCache(store=tmp_path / "cache.json")
+    cache.set(cache.key("OneBot V11", None, "image", "abc"), "file-id")
+    cache.set(cache.key("OneBot V11", None, "image", "def"), "file-id-2")
+    # 写入被合并，在间隔到达或 flush 时才保存
+    assert not (tmp_path / "cache.json").exists()
+    await cache.flush()
+    restored = UploadCache(store=tmp_path / "cache.json")
+    restored.load()
+    assert restored.get(restored.key("OneBot V11", None, "image", "abc")) == "file-id"
+    assert restored.get(restored.key("OneBot V11", None, "image", "def")) == "file-id-2"
+
+
+@pytest.mark.asyncio()
+async def test_unimsg_download(app: App, mocker, tmp_path):
+    from nonebot import get_driver
+    from nonebot.internal.driver import Response
+
+    from nonebot_plugin_alconna import Image, UniMessage, Video
+
+    contents = {"https://example.com/a.png": b"a" * 10, "https://example.com/b.mp4": b"b" * 100}
+    sessions = []
+
+    class FakeSession:
+        async def __aenter__(self):
+            sessions.append(self)
+            return self
+
+        async def __aexit__(self, *args):
+            pass
+
+        async def request(self, setup):
+            return Response(200, content=contents[str(setup.url)], request=setup)
+
+        async def stream_request(self, setup, chunk_size: int = 16):
+            data = contents[str(setup.url)]
+            for index in range(0, len(data), chunk_size):
+                yield Response(200, content=data[index : index + chunk_size], request=setup)
+
+    mocker.patch.object(type(get_driver()), "get_session", lambda self, **kwargs: FakeSession())
+
+    msg = UniMessage(
+        [Image(url="https://example.com/a.png"), Video(url="https://example.com/b.mp4", name="../../evil/b.mp4")]
+    )
+    await msg.download(stream=True, spool_threshold=50, spool_dir=tmp_path)
+    assert len(sessions) == 1
+    assert msg[0].raw == b"a" * 10
+    assert msg[0].url is None
+    assert msg[1].raw is None
+    assert msg[1].path.read_bytes() == b"b" * 100  # type: ignore
+    # 临时文件名只保留媒体名中的扩展名
+    assert msg[1].path.parent == tmp_path  # type: ignore
+    assert msg[1].path.suffix == ".mp4"  # type: ignore
+    assert "evil" not in msg[1].path.name  # type: ignore
+    with pytest.raises(TypeError):
+        await msg.download(True, 4)  # type: ignore
+
+    msg = UniMessage([Image(url="https://example.com/a.png"), Video(url="https://example.com/b.mp4")])
+    with pytest.raises(ValueError, match="exceeds"):
+        await msg.download(max_size=50, spool_threshold=50, spool_dir=tmp_path)
+    with pytest.raises(ValueError, match="exceeds"):
+        await msg.download(stream=True, max_total=80, spool_threshold=20, spool_dir=tmp_path)
+    # 任一媒体下载失败时消息保持不变，已完成的媒体也不会残留临时文件
+    msg = UniMessage([Video(url="https://example.com/b.mp4"), Image(url="https://example.com/missing.png")])
+    with pytest.raises(KeyError):
+        await msg.download(spool_threshold=20, spool_dir=tmp_path)
+    assert msg[0].url == "https://example.com/b.mp4"
+    assert msg[0].path is None
+    # 下载失败时不会残留临时文件
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # 非流式下载直接使用响应内容
+    msg = UniMessage([Image(url="https://example.com/a.png")])
+    await msg.download()
+    assert msg[0].raw is contents["https://example.com/a.png"]
+
+
+@pytest.mark.asyncio()
+async def test_media_io(app: App, tmp_path):
+    from nonebot_plugin_alconna import Image, UniMessage
+    from nonebot_plugin_alconna.uniseg.mediaio import MediaPayload, media_io
+
+    completed = media_io.metrics()["completed"]
+    image = Image(raw=b"\x89PNG\r\n\x1a\n" + b"\x00" * 32)
+    path = await image.save_async(tmp_path)
+    assert path == image.save(tmp_path)
+    assert await media_io.read(path) == image.raw_bytes
+    assert not [file for file in path.parent.iterdir() if file.suffix == ".tmp"]
+    if os.name == "posix":
+        # 原子写入的文件权限与直接创建的文件一致，而非 mkstemp 的 0600
+        reference = tmp_path / "reference"
+        reference.write_bytes(b"")
+        assert path.stat().st_mode & 0o777 == reference.stat().st_mode & 0o777
+        reference.unlink()
+
+    msg = UniMessage(["hello", Image(raw=b"GIF89a" + b"\x00" * 32), image])
+    assert await msg.dump_async(tmp_path) == msg.dump(tmp_path)
+    assert msg[1].path is None
+
+    # 由文件提供的数据在线程池中读取
+    before = media_io.metrics()["completed"]
+    payload = Image(raw=MediaPayload(path))
+    assert await payload.raw_bytes_async() == image.raw_bytes
+    assert media_io.metrics()["completed"] == before + 1
+
+    metrics = media_io.metrics()
+    assert metrics["completed"] >= completed + 5
+    assert metrics["pending"] == 0
+
+
+@pytest.mark.asyncio()
+async def test_media_payload(app: App, tmp_path):
+    import tracemalloc
+
+    from nonebot_plugin_alconna import Image, MediaPayload, UniMessage
+    from nonebot_plugin_alconna.uniseg.upload import content_digest
+
+    source = tmp_path / "large.bin"
+    source.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * (8 << 20))
+    payload = MediaPayload.from_path(source)
+    image = Image(raw=payload)
+    assert len(payload) == source.stat().st_size
+    assert image.raw_source == source
+    assert content_digest(payload) == content_digest(source)
+
+    tracemalloc.start()
+    try:
+        path = image.save(tmp_path / "media")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 1 << 20
+    assert path.read_bytes() == source.read_bytes()
+    assert image.mimetype is None
+
+    with image.raw_view as view:
+        assert view.nbytes == len(payload)
+    assert image.mimetype == "image/png"
+    assert (await UniMessage(image).export(adapter="OneBot V11")) == Message(MessageSegment.image(source))
+    payload.close()
+
+    memory = Image(raw=MediaPayload(memoryview(b"GIF89a" + b"\x00" * 16)))
+    assert memory.fingerprint() == Image(raw=MediaPayload(b"GIF89a" + b"\x00" * 16)).fingerprint()
+    assert memory.raw_bytes == b"GIF89a" + b"\x00" * 16
+    assert memory.mimetype == "image/gif"
+    assert UniMessage.load_bytes(UniMessage(memory).dump_bytes())[0].raw == memory.raw_bytes
+
+
+@pytest.mark.asyncio()
+async def test_receipt_scheduler(app: App, tmp_path):
+    import asyncio
+    import json
+
+    from nonebot_plugin_alconna import Target, UniMessage
+    from nonebot_plugin_alconna.uniseg.adapters import alter_get_exporter
+    from nonebot_plugin_alconna.uniseg.receipt import Receipt
+    from nonebot_plugin_alconna.uniseg.scheduler import ReceiptScheduler
+
+    store = tmp_path / "receipts.json"
+    scheduler = ReceiptScheduler(resolution=0.05, store=store, flush_interval=0)
+    exporter = alter_get_exporter(Adapter.get_name())
+    async with app.test_api() as ctx:
+        bot = ctx.create_bot(base=Bot, adapter=get_adapter(Adapter))
+        receipts = [Receipt(bot, Target("456"), exporter, [index], UniMessage) for index in (1, 2, 3)]
+        scheduler.schedule(receipts[0], "recall", 0)
+        scheduler.schedule(receipts[1], "recall", 0)
+        cancelled = scheduler.schedule(receipts[2], "recall", 0)
+        assert scheduler.cancel(cancelled)
+        assert not scheduler.cancel(cancelled)
+        ctx.should_call_api("delete_msg", {"message_id": 1}, None)
+        ctx.should_call_api("delete_msg", {"message_id": 2}, None)
+        await asyncio.sleep(0.2)
+        assert not receipts[0].msg_ids
+        assert receipts[2].msg_ids == [3]
+        scheduler.schedule(receipts[2], "recall", 3600)
+        assert len(scheduler) == 1
+        await scheduler.stop()
+
+    data = json.loads(store.read_text(encoding="utf-8"))
+    assert [item["msg_ids"] for item in data] == [[3]]
+    data[0]["deadline"] = 0
+    store.write_text(json.dumps(data), encoding="utf-8")
+
+    restored = ReceiptScheduler(resolution=0.05, store=store, flush_interval=0)
+    restored.load()
+    await asyncio.sleep(0.1)
+    assert len(restored) == 1  # Bot 尚未连接
+    async with app.test_api() as ctx:
+        bot = ctx.create_bot(base=Bot, adapter=get_adapter(Adapter))
+        ctx.should_call_api("delete_msg", {"message_id": 3}, None)
+        restored.resume(bot)
+        await asyncio.sleep(0.1)
+        await restored.stop()
+    assert len(restored) == 0
+    assert json.loads(store.read_text(encoding="utf-8")) == []
+
+    # 存储中格式错误的记录被跳过，恢复失败的操作被丢弃，调度器继续运行
+    valid = {**data[0], "id": "valid", "deadline": 0}
+    broken = {**data[0], "id": "broken", "deadline": 0, "target": {}}
+    store.write_text(json.dumps([{"deadline": 0}, broken, valid]), encoding="utf-8")
+    restored = ReceiptScheduler(resolution=0.05, store=store, flush_interval=0)
+    restored.load()
+    assert len(restored) == 2
+    async with app.test_api() as ctx:
+        bot = ctx.create_bot(base=Bot, adapter=get_adapter(Adapter))
+        ctx.should_call_api("delete_msg", {"message_id": 3}, None)
+        await asyncio.sleep(0.1)
+        assert restored._task and not restored._task.done()
+        await restored.stop()
+    assert len(restored) == 0
+
+
+def test_unimsg_binary():
+    from io import BytesIO
+
+    from nonebot_plugin_alconna import At, CustomNode, Image, Reference, Text, UniMessage
+    from nonebot_plugin_alconna.uniseg.codec import ArchiveReader, ArchiveWriter, decode
+
+    raw = bytes(range(256)) * 64
+    msg = UniMessage(
+        [
+            Text("hello world").bold(0, 5),
+            At("user", "123"),
+            Image(raw=raw),
+            Reference("1", [CustomNode("2", "node", UniMessage([Text("inner"), Image(raw=b"GIF89a")]))]),
+        ]
+    )
+    encoded = msg.dump(True, json=True)
+    data = msg.dump_bytes()
+    assert len(data) < len(encoded)
+    loaded = UniMessage.load_bytes(data)
+    assert loaded.dump(True) == msg.dump(True)
+    assert loaded[2].raw == raw
+    assert loaded[0].styles == {(0, 5): ["bold"]}
+
+    with pytest.raises(ValueError, match="version"):
+        UniMessage.load_bytes(b"UNIM\x09" + data[5:])
+    # 截断的数据统一抛出 ValueError
+    for size in (5, 6, 7, 20, len(data) - 1):
+        with pytest.raises(ValueError, match="Unexpected end of data"):
+            decode(data[:size])
+    with pytest.raises(ValueError, match="Unexpected end of data"):
+        decode(data[:5] + b"\x04\x00")
+
+    fp = BytesIO()
+    writer = ArchiveWriter(fp)
+    for index in range(3):
+        writer.write(UniMessage([Text(f"msg{index}"), Image(raw=raw)]))
+    fp.seek(0)
+    assert [str(m[0]) for m in ArchiveReader(fp)] == ["msg0", "msg1", "msg2"]